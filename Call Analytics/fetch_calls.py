@@ -12,22 +12,28 @@ Usage:
     python3 fetch_calls.py --days 7  # Last 7 days
     python3 fetch_calls.py --start-date 2024-09-01 --end-date 2024-09-15
     python3 fetch_calls.py --office-only  # Only calls from your office users
+    python3 fetch_calls.py --days 90 --stream  # Write calls as they arrive (constant memory)
+    python3 fetch_calls.py --days 7 --analyze --trace Data/calls_trace.json  # Time each stage
 """
 
-import json
+import os
+import time
 import logging
+import tempfile
 import argparse
 from datetime import datetime, timedelta
 from pathlib import Path
 import sys
-import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Iterator, Tuple
+import requests
 
 # Add Configuration to path
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Configuration'))
 
 from config import Config
 from dialpad_service import DialpadAPI
+import serializer
+from tracing import tracer, add_trace_arguments, start_tracing, finish_tracing
 
 # Set up logging
 logging.basicConfig(
@@ -47,11 +53,14 @@ class CallAnalyticsFetcher:
         self.data_dir = Path(__file__).parent.parent / "Data"
         self.data_dir.mkdir(exist_ok=True)
         
-    def fetch_calls(self, limit: int = None, start_date: str = None, end_date: str = None, 
-                   office_only: bool = False) -> Dict[str, Any]:
-        """Fetch call data with optional filtering"""
-        logger.info("Starting call analytics fetch...")
+    def _iter_filtered_calls(self, counts: Dict[str, int], limit: int = None, start_date: str = None,
+                             end_date: str = None, office_only: bool = False) -> Iterator[Dict[str, Any]]:
+        """Stream calls from the API, yielding only those that pass the filters
         
+        ``counts['all_calls_fetched']`` is updated as calls arrive. A page that
+        still fails after retries ends the stream with the calls fetched so far,
+        and the error is left in ``counts['error']``.
+        """
         # Convert date strings to ISO format if provided
         start_time = None
         end_time = None
@@ -71,43 +80,36 @@ class CallAnalyticsFetcher:
         elif end_time:
             logger.info(f"  Until date: {end_date}")
             
-        # Fetch all calls
-        all_calls = self.api.get_calls(
-            limit=limit,
-            start_time=start_time,
-            end_time=end_time
-        )
-        
-        logger.info(f"Retrieved {len(all_calls)} total calls")
-        
-        # Filter by office if requested
-        filtered_calls = all_calls
+        # Load office users up front so calls can be filtered as they stream in
+        office_user_ids = None
         if office_only:
             logger.info(f"Filtering calls for office users...")
-            # Load office users
-            office_users = self._load_office_users()
+            with tracer.span('cache load'):
+                office_users = self._load_office_users()
             if office_users:
                 office_user_ids = {str(user.get('id')) for user in office_users}
-                filtered_calls = []
-                
-                for call in all_calls:
-                    # Check if any participant is from our office
-                    participants = call.get('participants', [])
-                    for participant in participants:
-                        user_id = str(participant.get('user_id', ''))
-                        if user_id in office_user_ids:
-                            filtered_calls.append(call)
-                            break
-                            
-                logger.info(f"Found {len(filtered_calls)} calls involving office users")
             else:
                 logger.warning("Could not load office users for filtering")
         
-        # Create metadata
-        metadata = {
+        counts.setdefault('all_calls_fetched', 0)
+        try:
+            for call in self.api.iter_calls(limit=limit, start_time=start_time, end_time=end_time):
+                counts['all_calls_fetched'] += 1
+                if office_user_ids is None or self._involves_users(call, office_user_ids):
+                    yield call
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching calls (keeping {counts['all_calls_fetched']} fetched): {e}")
+            counts['error'] = e
+        
+        logger.info(f"Retrieved {counts['all_calls_fetched']} total calls")
+    
+    def _build_metadata(self, total_calls: int, all_calls_fetched: int, limit: int = None,
+                        start_date: str = None, end_date: str = None, office_only: bool = False) -> Dict[str, Any]:
+        """Create the metadata block saved alongside the calls"""
+        return {
             "fetch_time": datetime.now().isoformat(),
-            "total_calls": len(filtered_calls),
-            "all_calls_fetched": len(all_calls),
+            "total_calls": total_calls,
+            "all_calls_fetched": all_calls_fetched,
             "filters_applied": {
                 "limit": limit,
                 "start_date": start_date,
@@ -117,20 +119,100 @@ class CallAnalyticsFetcher:
             "office_id": self.config.office_id,
             "office_name": "IU GlobalNOC Office"
         }
+    
+    def fetch_calls(self, limit: int = None, start_date: str = None, end_date: str = None, 
+                   office_only: bool = False) -> Dict[str, Any]:
+        """Fetch call data with optional filtering"""
+        logger.info("Starting call analytics fetch...")
+        
+        counts = {}
+        with tracer.span('API fan-out') as span:
+            filtered_calls = list(self._iter_filtered_calls(counts, limit, start_date, end_date, office_only))
+            span['calls'] = len(filtered_calls)
+        
+        if office_only:
+            logger.info(f"Found {len(filtered_calls)} calls involving office users")
+        
+        metadata = self._build_metadata(len(filtered_calls), counts['all_calls_fetched'],
+                                        limit, start_date, end_date, office_only)
         
         return {
             "metadata": metadata,
             "calls": filtered_calls
         }
     
+    def stream_calls(self, limit: int = None, start_date: str = None, end_date: str = None,
+                     office_only: bool = False, output_file: str = None) -> Tuple[Dict[str, Any], Dict[str, Any], str]:
+        """Fetch calls and write them to the output file as they arrive
+        
+        Memory use is independent of the number of calls: each call is written
+        and folded into the running analysis, then discarded. The file has the
+        same structure as save_calls() output (with "metadata" written last).
+        It is written to a temporary file that only replaces the output once
+        every call has been fetched, so a failed or interrupted run (including
+        a page that still fails after retries, which is raised) leaves the
+        previous file as it was.
+        Fetching, serialization and analysis are interleaved, so the trace has
+        one span for the whole stream with their split recorded on it.
+        
+        Returns (metadata, analysis, output_path).
+        """
+        logger.info("Starting streaming call analytics fetch...")
+        
+        output_path = self.data_dir / (output_file or "calls.json")
+        counts = {}
+        stats = CallStats()
+        
+        serialize_seconds = 0.0
+        analyze_seconds = 0.0
+        fd, tmp_path = tempfile.mkstemp(dir=output_path.parent, prefix=f'.{output_path.name}.', suffix='.tmp')
+        try:
+            # mkstemp creates the file as 0600; keep the old file's mode, or the usual one for a new file
+            os.chmod(tmp_path, _output_mode(output_path))
+            with tracer.span('API fan-out', mode='stream') as span, os.fdopen(fd, 'wb') as f:
+                f.write(b'{\n  "calls": [')
+                for call in self._iter_filtered_calls(counts, limit, start_date, end_date, office_only):
+                    started = time.perf_counter()
+                    f.write(b',\n    ' if stats.total_calls else b'\n    ')
+                    f.write(serializer.dumps(call))
+                    written = time.perf_counter()
+                    stats.add(call)
+                    serialize_seconds += written - started
+                    analyze_seconds += time.perf_counter() - written
+                if 'error' in counts:
+                    raise counts['error']
+                
+                metadata = self._build_metadata(stats.total_calls, counts['all_calls_fetched'],
+                                                limit, start_date, end_date, office_only)
+                f.write(b'\n  ],\n  "metadata": ')
+                f.write(serializer.dumps(metadata, indent=True).replace(b'\n', b'\n  '))
+                f.write(b'\n}\n')
+                span.update(calls=stats.total_calls, serialization_ms=round(serialize_seconds * 1000, 1),
+                            analysis_ms=round(analyze_seconds * 1000, 1))
+            
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            # Keep the previous calls file; drop the partial one
+            os.unlink(tmp_path)
+            raise
+        
+        logger.info(f"✅ Successfully streamed {stats.total_calls} calls to {output_path}")
+        return metadata, stats.to_analysis(metadata), str(output_path)
+    
+    @staticmethod
+    def _involves_users(call: Dict[str, Any], user_ids: set) -> bool:
+        """Check if any participant of a call is one of the given users"""
+        for participant in call.get('participants', []):
+            if str(participant.get('user_id', '')) in user_ids:
+                return True
+        return False
+    
     def _load_office_users(self) -> List[Dict[str, Any]]:
         """Load cached office users"""
         users_file = self.data_dir / "users.json"
         if users_file.exists():
             try:
-                with open(users_file, 'r') as f:
-                    data = json.load(f)
-                    return data.get('users', [])
+                return serializer.load(users_file).get('users', [])
             except Exception as e:
                 logger.error(f"Error loading users cache: {e}")
         return []
@@ -144,8 +226,8 @@ class CallAnalyticsFetcher:
         
         logger.info(f"Saving {call_data['metadata']['total_calls']} calls to {output_path}")
         
-        with open(output_path, 'w') as f:
-            json.dump(call_data, f, indent=2, default=str)
+        with tracer.span('serialization', calls=call_data['metadata']['total_calls']):
+            serializer.dump(call_data, output_path)
         
         logger.info(f"✅ Successfully saved calls to {output_path}")
         return str(output_path)
@@ -153,53 +235,77 @@ class CallAnalyticsFetcher:
     def analyze_calls(self, call_data: Dict[str, Any]) -> Dict[str, Any]:
         """Perform basic analysis on call data"""
         calls = call_data['calls']
-        metadata = call_data['metadata']
         
         if not calls:
             return {"error": "No calls to analyze"}
+        
+        with tracer.span('analysis', calls=len(calls)):
+            stats = CallStats()
+            for call in calls:
+                stats.add(call)
             
-        # Basic statistics
-        total_calls = len(calls)
+            return stats.to_analysis(call_data['metadata'])
+
+def _output_mode(path: Path) -> int:
+    """Permission bits for a rewritten output file: the existing file's, else 0666 less the umask"""
+    try:
+        return path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+class CallStats:
+    """Running call statistics, updated one call at a time"""
+    
+    def __init__(self):
+        self.total_calls = 0
+        self.inbound_calls = 0
+        self.outbound_calls = 0
+        self.calls_with_duration = 0
+        self.total_duration = 0
+        self.states: Dict[str, int] = {}
+    
+    def add(self, call: Dict[str, Any]) -> None:
+        self.total_calls += 1
         
         # Call directions
-        inbound_calls = sum(1 for call in calls if call.get('direction') == 'inbound')
-        outbound_calls = sum(1 for call in calls if call.get('direction') == 'outbound')
+        if call.get('direction') == 'inbound':
+            self.inbound_calls += 1
+        elif call.get('direction') == 'outbound':
+            self.outbound_calls += 1
         
         # Call durations (in seconds)
-        durations = []
-        for call in calls:
-            duration = call.get('duration_seconds', 0)
-            if duration and duration > 0:
-                durations.append(duration)
-        
-        avg_duration = sum(durations) / len(durations) if durations else 0
-        total_duration = sum(durations)
+        duration = call.get('duration_seconds', 0)
+        if duration and duration > 0:
+            self.calls_with_duration += 1
+            self.total_duration += duration
         
         # Call states
-        states = {}
-        for call in calls:
-            state = call.get('state', 'unknown')
-            states[state] = states.get(state, 0) + 1
+        state = call.get('state', 'unknown')
+        self.states[state] = self.states.get(state, 0) + 1
+    
+    def to_analysis(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the analysis structure used by analyze_calls()"""
+        avg_duration = self.total_duration / self.calls_with_duration if self.calls_with_duration else 0
         
-        analysis = {
+        return {
             "summary": {
-                "total_calls": total_calls,
-                "inbound_calls": inbound_calls,
-                "outbound_calls": outbound_calls,
-                "calls_with_duration": len(durations),
+                "total_calls": self.total_calls,
+                "inbound_calls": self.inbound_calls,
+                "outbound_calls": self.outbound_calls,
+                "calls_with_duration": self.calls_with_duration,
                 "average_duration_seconds": round(avg_duration, 2),
                 "average_duration_minutes": round(avg_duration / 60, 2),
-                "total_duration_seconds": total_duration,
-                "total_duration_hours": round(total_duration / 3600, 2)
+                "total_duration_seconds": self.total_duration,
+                "total_duration_hours": round(self.total_duration / 3600, 2)
             },
-            "call_states": states,
+            "call_states": self.states,
             "date_range": {
                 "filters": metadata['filters_applied'],
                 "fetch_time": metadata['fetch_time']
             }
         }
-        
-        return analysis
 
 def main():
     parser = argparse.ArgumentParser(description='Fetch and analyze Dialpad call data')
@@ -211,12 +317,17 @@ def main():
                        help='Only include calls involving office users')
     parser.add_argument('--output', help='Output file name (default: calls.json)')
     parser.add_argument('--analyze', action='store_true', help='Show analysis summary')
+    parser.add_argument('--stream', action='store_true',
+                       help='Write calls to the output file as they arrive (constant memory, for large date ranges)')
+    add_trace_arguments(parser)
     
     args = parser.parse_args()
+    start_tracing(args)
     
     try:
         # Create fetcher
-        config = Config()
+        with tracer.span('config load'):
+            config = Config()
         fetcher = CallAnalyticsFetcher(config)
         
         # Handle days parameter
@@ -227,19 +338,27 @@ def main():
             end_date = datetime.now().strftime('%Y-%m-%d')
             start_date = (datetime.now() - timedelta(days=args.days)).strftime('%Y-%m-%d')
         
-        # Fetch calls
-        call_data = fetcher.fetch_calls(
-            limit=args.limit,
-            start_date=start_date,
-            end_date=end_date,
-            office_only=args.office_only
-        )
-        
-        # Save to file
-        output_file = fetcher.save_calls(call_data, args.output)
+        # Fetch calls and save to file
+        if args.stream:
+            metadata, analysis, output_file = fetcher.stream_calls(
+                limit=args.limit,
+                start_date=start_date,
+                end_date=end_date,
+                office_only=args.office_only,
+                output_file=args.output
+            )
+        else:
+            call_data = fetcher.fetch_calls(
+                limit=args.limit,
+                start_date=start_date,
+                end_date=end_date,
+                office_only=args.office_only
+            )
+            output_file = fetcher.save_calls(call_data, args.output)
+            metadata = call_data['metadata']
+            analysis = fetcher.analyze_calls(call_data) if args.analyze and call_data['calls'] else None
         
         # Show summary
-        metadata = call_data['metadata']
         print(f"\n📞 CALL ANALYTICS SUMMARY")
         print("=" * 50)
         print(f"Fetch Time: {metadata['fetch_time']}")
@@ -261,8 +380,7 @@ def main():
         print(f"Cache File: {output_file}")
         
         # Show analysis if requested
-        if args.analyze and call_data['calls']:
-            analysis = fetcher.analyze_calls(call_data)
+        if args.analyze and metadata['total_calls']:
             summary = analysis['summary']
             
             print(f"\n📈 CALL ANALYSIS")
@@ -286,6 +404,8 @@ def main():
         logger.error(f"Error in main: {e}")
         print(f"❌ Error: {e}")
         sys.exit(1)
+    finally:
+        finish_tracing(args)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
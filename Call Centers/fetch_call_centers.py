@@ -11,7 +11,6 @@ Usage:
     python3 fetch_call_centers.py --all  # Show all call centers, not just office-filtered
 """
 
-import json
 import logging
 from datetime import datetime
 from pathlib import Path
@@ -26,6 +25,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(
 
 from config import Config
 from dialpad_service import DialpadAPI
+import serializer
 
 # Set up logging
 logging.basicConfig(
@@ -51,12 +51,7 @@ class CallCentersFetcher:
         logger.info(f"Retrieved {len(all_call_centers)} total call centers")
         
         # Get office information for context
-        offices = self.api.get_offices()
-        office_info = None
-        for office in offices:
-            if office.get('id') == self.config.office_id:
-                office_info = office
-                break
+        office_info = self.api.get_office(self.config.office_id) if self.config.office_id else None
         
         # Filter call centers if requested
         if filter_by_office and self.config.office_id:
@@ -105,8 +100,7 @@ class CallCentersFetcher:
         
         logger.info(f"Saving {len(data['call_centers'])} call centers to {filepath}")
         
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+        serializer.dump(data, filepath)
         
         logger.info(f"✅ Successfully saved call centers to {filepath}")
         
@@ -152,8 +146,7 @@ def load_cached_call_centers(filename: str = "call_centers.json") -> Dict[str, A
         else:
             raise FileNotFoundError(f"Call centers cache file {filename} not found in Data folder or current directory. Run fetch script first.")
     
-    with open(filepath, 'r') as f:
-        data = json.load(f)
+    data = serializer.load(filepath)
     
     logger.info(f"Loaded {len(data.get('call_centers', []))} call centers from cache at {filepath}")
     return data
@@ -0,0 +1,335 @@
+import time
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Iterable, AsyncIterator
+import aiohttp
+from config import Config
+from dialpad_service import Page
+from rate_limiter import RateLimiter
+from retry import RetryPolicy
+from circuit_breaker import CircuitBreakers
+from metrics import request_metrics
+import serializer
+
+logger = logging.getLogger(__name__)
+
+# What the get_* helpers log and turn into an empty result: network and HTTP errors, timeouts and malformed bodies
+REQUEST_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, *serializer.DECODE_ERRORS)
+
+class AsyncDialpadAPI:
+    """asyncio-native Dialpad API client mirroring DialpadAPI
+
+    All requests share a single aiohttp connection pool, so large fan-outs
+    (user status, devices, call centers) overlap on one event loop. Use it as
+    an async context manager:
+
+        async with AsyncDialpadAPI(config) as api:
+            users = await api.get_users()
+    """
+
+    def __init__(self, config: Config, max_connections: Optional[int] = None,
+                 rate_limiter: Optional[RateLimiter] = None, circuit_breakers: Optional[CircuitBreakers] = None):
+        self.config = config
+        self.max_connections = max(1, max_connections or config.max_workers)
+        self.rate_limiter = rate_limiter or RateLimiter.from_config(config)
+        self.retry_policy = RetryPolicy.from_config(config)
+        self.circuit_breakers = circuit_breakers or CircuitBreakers.from_config(config)
+        self.metrics = request_metrics
+        self.metrics.export_at_exit(config)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def __aenter__(self) -> 'AsyncDialpadAPI':
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        """Create the shared client session and connection pool"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections)
+            timeout = aiohttp.ClientTimeout(total=None, connect=self.config.connect_timeout,
+                                            sock_read=self.config.read_timeout)
+            self.session = aiohttp.ClientSession(headers=self.config.headers, connector=connector, timeout=timeout)
+
+    async def close(self) -> None:
+        """Close the client session and release pooled connections"""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def _get_json(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """GET an endpoint and decode the JSON body (raises on HTTP errors)
+
+        Concurrent calls for the same endpoint and parameters share one
+        request and receive the same decoded object (see DialpadAPI.get_json).
+        """
+        key = f"{endpoint}?{sorted((params or {}).items())}"
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._request_json(endpoint, params))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # A cancelled waiter must not cancel the request other callers are sharing
+        return await asyncio.shield(task)
+
+    async def _request_json(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Send one GET (with retries) and decode the JSON body
+
+        Requests wait for the shared rate limiter, 429 responses are retried
+        after their Retry-After delay, and timeouts, connection errors and 5xx
+        responses are retried with exponential backoff. While the endpoint
+        family's circuit breaker is open, requests fail immediately with a
+        ClientConnectionError.
+        """
+        await self.open()
+        url = self.config.get_api_url(endpoint)
+        key = self.rate_limiter.endpoint_key(url)
+        breaker = self.circuit_breakers.get(key) if self.circuit_breakers else None
+        throttled_attempts = 0
+        failed_attempts = 0
+        while True:
+            # Wait for the rate limiter before asking the breaker, so waiting can't strand a half-open probe
+            delay = self.rate_limiter.reserve(key)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if breaker is not None and not breaker.allow():
+                raise aiohttp.ClientConnectionError(f"Circuit for {key} is open, not requesting {url}")
+
+            recorded = False
+            started = time.monotonic()
+            try:
+                async with self.session.get(url, params=params) as response:
+                    self.rate_limiter.update(key, response.status, response.headers)
+                    if breaker is not None:
+                        if response.status >= 500:
+                            breaker.record_failure(f"HTTP {response.status}")
+                        else:
+                            breaker.record_success(time.monotonic() - started)
+                        recorded = True
+                    if response.status == 429 and throttled_attempts < self.config.rate_limit_max_retries:
+                        throttled_attempts += 1
+                        self.metrics.record_request(key, time.monotonic() - started, response.status)
+                        self.metrics.record_retry(key)
+                        logger.debug(f"Retrying {url} after 429 (attempt {throttled_attempts})")
+                        continue
+                    if response.status >= 400:
+                        self.metrics.record_request(key, time.monotonic() - started, response.status)
+                        response.raise_for_status()
+                    body = await response.read()
+                    self.metrics.record_request(key, time.monotonic() - started, response.status,
+                                                int(response.headers.get('Content-Length') or len(body)))
+                    return serializer.loads(body)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError, aiohttp.ClientResponseError) as e:
+                if not isinstance(e, aiohttp.ClientResponseError):
+                    self.metrics.record_request(key, time.monotonic() - started)
+                    if breaker is not None:
+                        breaker.record_failure(type(e).__name__)
+                        recorded = True
+                status = getattr(e, 'status', None)
+                if status is not None and not self.retry_policy.is_retryable_status(status):
+                    raise
+                if failed_attempts >= self.retry_policy.max_retries:
+                    raise
+                failed_attempts += 1
+                self.metrics.record_retry(key)
+                backoff = self.retry_policy.backoff(failed_attempts)
+                logger.debug(f"Retrying {url} in {backoff:.2f}s after {type(e).__name__} "
+                             f"(attempt {failed_attempts}/{self.retry_policy.max_retries})")
+                await asyncio.sleep(backoff)
+            finally:
+                # Cancelled (e.g. by get_users_by_id's timeout) before an outcome: give the probe back
+                if breaker is not None and not recorded:
+                    breaker.release()
+
+    async def iter_pages(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                         page_size: Optional[int] = None, cursor: Optional[str] = None,
+                         prefetch: Optional[bool] = None) -> AsyncIterator[Page]:
+        """Yield pages from a cursor-paginated list endpoint (see DialpadAPI.iter_pages)"""
+        if prefetch is None:
+            prefetch = self.config.pagination_prefetch
+
+        def fetch(page_cursor):
+            query = dict(params or {})
+            if page_size:
+                query['limit'] = page_size
+            if page_cursor:
+                query['cursor'] = page_cursor
+            logger.debug(f"Fetching {endpoint} (cursor: {page_cursor}, params: {query})")
+            return asyncio.ensure_future(self._get_json(endpoint, query))
+
+        # Cursors already requested, so a cursor loop in the API stops the iteration
+        seen_cursors = {cursor} if cursor else set()
+
+        task = fetch(cursor)
+        try:
+            while task is not None:
+                data = await task
+                items = data.get('items', data.get('results', []))
+                cursor = data.get('cursor') if items else None
+                if cursor in seen_cursors:
+                    logger.warning(f"Pagination loop detected on {endpoint} (cursor {cursor} repeated), stopping")
+                    cursor = None
+                elif cursor:
+                    seen_cursors.add(cursor)
+
+                # Start the next request before handing this page to the caller
+                task = fetch(cursor) if cursor and prefetch else None
+                yield Page(items, cursor)
+
+                if cursor and task is None:
+                    task = fetch(cursor)
+        finally:
+            if task is not None and not task.done():
+                task.cancel()
+
+    async def iter_items(self, endpoint: str, params: Optional[Dict[str, Any]] = None, limit: Optional[int] = None,
+                         page_size: Optional[int] = None, cursor: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield individual items from a cursor-paginated list endpoint"""
+        count = 0
+        async for page in self.iter_pages(endpoint, params, page_size=page_size, cursor=cursor):
+            for item in page.items:
+                yield item
+                count += 1
+                if limit and count >= limit:
+                    return
+
+    async def _get_paginated(self, endpoint: str, label: str, params: Optional[Dict[str, Any]] = None,
+                             limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Follow cursor pagination for a list endpoint and collect all items"""
+        all_items = []
+        cursor = None
+
+        try:
+            async for page in self.iter_pages(endpoint, params):
+                all_items.extend(page.items)
+                cursor = page.cursor
+
+                logger.debug(f"Fetched {len(page.items)} {label} (total: {len(all_items)})")
+
+                if limit and len(all_items) >= limit:
+                    all_items = all_items[:limit]
+                    break
+        except REQUEST_ERRORS as e:
+            # Pages are retried individually; keep whatever was fetched before the failure
+            logger.error(f"Error fetching {label} (cursor: {cursor}, keeping {len(all_items)} fetched): {e}")
+            return all_items
+
+        logger.info(f"Total {label} fetched: {len(all_items)}")
+        return all_items
+
+    async def get_company_info(self) -> Optional[Dict[str, Any]]:
+        """Get company information"""
+        try:
+            return await self._get_json('company/')
+        except REQUEST_ERRORS as e:
+            logger.error(f"Error fetching company info: {e}")
+            return None
+
+    async def get_users(self, email_filter: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get all users in the company, optionally filtered by email"""
+        try:
+            params = {'email': email_filter} if email_filter else None
+            return await self._get_paginated('users/', 'users', params=params)
+        except REQUEST_ERRORS as e:
+            logger.error(f"Error fetching users: {e}")
+            return []
+
+    async def get_user(self, user_id: str) -> Dict[str, Any]:
+        """Get a single user, including current duty status"""
+        try:
+            return await self._get_json(f'users/{user_id}/')
+        except REQUEST_ERRORS as e:
+            logger.debug(f"Error getting status for user {user_id}: {e}")
+            return {}
+
+    async def get_users_by_id(self, user_ids: Iterable[str],
+                              timeout: Optional[float] = None) -> List[Optional[Dict[str, Any]]]:
+        """Fetch many users concurrently, preserving the order of ``user_ids``
+
+        With a ``timeout``, requests still outstanding when it expires are
+        cancelled and those users are returned as None.
+        """
+        if timeout is None:
+            return await asyncio.gather(*(self.get_user(user_id) for user_id in user_ids))
+
+        tasks = [asyncio.ensure_future(self.get_user(user_id)) for user_id in user_ids]
+        if not tasks:
+            return []
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        # Cancel the shared requests behind the waiters too, so nothing outlives the session
+        for request in list(self._in_flight.values()):
+            request.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.warning(f"Cancelled {len(pending)} user requests still outstanding after {timeout:.1f}s")
+        return [task.result() if task in done else None for task in tasks]
+
+    async def get_user_devices(self, user_id: int) -> List[Dict[str, Any]]:
+        """Get devices for a specific user"""
+        try:
+            data = await self._get_json('userdevices/', {'user_id': user_id})
+            return data.get('results', [])
+        except REQUEST_ERRORS as e:
+            logger.error(f"Error fetching devices for user {user_id}: {e}")
+            return []
+
+    async def get_contacts(self, office_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get contacts from the company, optionally filtered by office"""
+        try:
+            params = {'office_id': office_id} if office_id else None
+            data = await self._get_json('contacts/', params)
+            return data.get('items', [])
+        except REQUEST_ERRORS as e:
+            logger.error(f"Error fetching contacts: {e}")
+            return []
+
+    async def get_offices(self) -> List[Dict[str, Any]]:
+        """Get offices from the company"""
+        try:
+            data = await self._get_json('offices/')
+            return data.get('items', [])
+        except REQUEST_ERRORS as e:
+            logger.error(f"Error fetching offices: {e}")
+            return []
+
+    async def get_office(self, office_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single office by ID"""
+        try:
+            return await self._get_json(f'offices/{office_id}/')
+        except REQUEST_ERRORS as e:
+            logger.error(f"Error fetching office {office_id}: {e}")
+            return None
+
+    async def get_call_centers(self) -> List[Dict[str, Any]]:
+        """Get call centers information with pagination support"""
+        try:
+            return await self._get_paginated('callcenters/', 'call centers')
+        except REQUEST_ERRORS as e:
+            logger.error(f"Error fetching call centers: {e}")
+            return []
+
+    async def get_calls(self, limit: int = None, start_time: str = None, end_time: str = None, **filters) -> List[Dict[str, Any]]:
+        """Get call history with pagination support and optional filtering
+
+        Args:
+            limit: Maximum number of calls to fetch (None for all)
+            start_time: Start time filter (ISO 8601 format)
+            end_time: End time filter (ISO 8601 format)
+            **filters: Additional query parameters for filtering
+        """
+        try:
+            params = {}
+            if start_time:
+                params['start_time'] = start_time
+            if end_time:
+                params['end_time'] = end_time
+            params.update(filters)
+            return await self._get_paginated('call/', 'calls', params=params, limit=limit)
+        except REQUEST_ERRORS as e:
+            logger.error(f"Error fetching calls: {e}")
+            return []
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+JSON Backend Benchmark
+
+Times saving and loading synthetic caches shaped like Data/users.json and
+Data/calls.json with every installed JSON backend (see serializer.py), plus
+decoding a list-endpoint page from bytes.
+
+Usage:
+    python3 benchmark_serializer.py
+    python3 benchmark_serializer.py --users 10000 --calls 100000 --repeat 5
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import serializer
+
+def make_users(count: int) -> Dict[str, Any]:
+    """Synthetic users.json contents"""
+    users = []
+    for i in range(count):
+        user_id = str(5000000000000000 + i)
+        users.append({
+            'id': user_id,
+            'display_name': f'User {i}',
+            'first_name': 'User',
+            'last_name': str(i),
+            'emails': [f'user{i}@example.com'],
+            'phone_numbers': [f'+1812555{i:04d}'],
+            'office_id': '6000000000000000',
+            'company_id': '7000000000000000',
+            'state': 'active',
+            'timezone': 'US/Eastern',
+            'is_online': i % 3 != 0,
+            'on_duty_status': random.choice(['available', 'unavailable', 'wrapup', 'busy']),
+            'on_duty_started': str(1727800000000 + i * 1000),
+            'do_not_disturb': False,
+            'license': 'agents',
+            'group_details': [{'group_id': str(8000000000000000 + i % 20), 'group_type': 'callcenter',
+                               'role': 'operator', 'do_not_disturb': False}],
+        })
+    return {
+        'metadata': {'fetch_timestamp': datetime.now().isoformat(), 'globalnoc_users_count': count,
+                     'api_version': 'v2'},
+        'users': users,
+    }
+
+def make_calls(count: int) -> Dict[str, Any]:
+    """Synthetic calls.json contents"""
+    start = datetime(2024, 9, 1)
+    calls = []
+    for i in range(count):
+        started = start + timedelta(seconds=i * 37)
+        calls.append({
+            'call_id': str(9000000000000000 + i),
+            'direction': 'inbound' if i % 2 else 'outbound',
+            'state': random.choice(['hangup', 'missed', 'voicemail']),
+            'date_started': str(int(started.timestamp() * 1000)),
+            'date_connected': str(int(started.timestamp() * 1000) + 4000),
+            'date_ended': str(int(started.timestamp() * 1000) + 184000),
+            'duration': random.uniform(0, 600000),
+            'total_duration': random.uniform(0, 600000),
+            'external_number': f'+1317555{i % 10000:04d}',
+            'internal_number': '+18125550000',
+            'contact': {'id': str(i % 5000), 'name': f'Contact {i % 5000}', 'type': 'local',
+                        'phone': f'+1317555{i % 10000:04d}'},
+            'target': {'id': str(5000000000000000 + i % 10000), 'name': f'User {i % 10000}',
+                       'type': 'user', 'office_id': '6000000000000000'},
+            'entry_point_call_id': None,
+            'was_recorded': False,
+            'participants': [{'user_id': str(5000000000000000 + i % 10000)}],
+        })
+    return {
+        'metadata': {'fetch_timestamp': datetime.now().isoformat(), 'total_calls': count},
+        'calls': calls,
+    }
+
+def best_time(func: Callable[[], Any], repeat: int) -> float:
+    """Fastest of ``repeat`` runs, in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def run(datasets: Dict[str, Any], repeat: int) -> List[Dict[str, Any]]:
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend_name in serializer.available_backends():
+            serializer.set_backend(backend_name)
+            for label, data in datasets.items():
+                path = Path(tmp) / f'{label}.json'
+                save = best_time(lambda: serializer.dump(data, path), repeat)
+                size = path.stat().st_size
+                load = best_time(lambda: serializer.load(path), repeat)
+                rows.append({'backend': backend_name, 'dataset': label, 'save': save, 'load': load, 'size': size})
+
+            # One 1000-call API page decoded straight from bytes
+            page = serializer.dumps({'items': datasets['calls']['calls'][:1000], 'cursor': 'abc'})
+            decode = best_time(lambda: serializer.loads(page), repeat * 10)
+            rows.append({'backend': backend_name, 'dataset': 'api page (1000 calls)', 'save': None,
+                         'load': decode, 'size': len(page)})
+    serializer.set_backend(None)
+    return rows
+
+def print_report(rows: List[Dict[str, Any]]) -> None:
+    baseline = {row['dataset']: row for row in rows if row['backend'] == 'json'}
+    print(f"{'Backend':<9} {'Dataset':<22} {'Size':>9} {'Save':>9} {'Load':>9} {'Speedup (save/load)':>21}")
+    print('-' * 83)
+    for row in rows:
+        base = baseline[row['dataset']]
+        save = f"{row['save'] * 1000:.0f}ms" if row['save'] is not None else '-'
+        save_speedup = f"{base['save'] / row['save']:.1f}x" if row['save'] else '-'
+        load_speedup = f"{base['load'] / row['load']:.1f}x"
+        print(f"{row['backend']:<9} {row['dataset']:<22} {row['size'] / 1024 / 1024:>7.1f}MB "
+              f"{save:>9} {row['load'] * 1000:>7.1f}ms {save_speedup + ' / ' + load_speedup:>21}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the installed JSON backends on cache-sized data')
+    parser.add_argument('--users', type=int, default=10000, help='Users in the synthetic users cache (default: 10000)')
+    parser.add_argument('--calls', type=int, default=100000, help='Calls in the synthetic calls cache (default: 100000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, fastest is reported (default: 3)')
+    args = parser.parse_args()
+
+    random.seed(0)
+    datasets = {
+        'users': make_users(args.users),
+        'calls': make_calls(args.calls),
+    }
+    print(f"{args.users} users, {args.calls} calls; backends installed: "
+          f"{', '.join(serializer.available_backends())}\n")
+    print_report(run(datasets, args.repeat))
+
+if __name__ == '__main__':
+    main()
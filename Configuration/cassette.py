@@ -0,0 +1,169 @@
+import time
+import atexit
+import base64
+import logging
+import threading
+from collections import defaultdict, deque
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+import serializer
+
+logger = logging.getLogger(__name__)
+
+# Headers describing the wire encoding; recorded bodies are stored decoded
+_DROPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length', 'connection', 'keep-alive'}
+
+class Cassette:
+    """HTTP interactions recorded to (or replayed from) a JSON file
+
+    Interactions are matched on method, path and query string (not the host,
+    so a cassette recorded against one base URL replays against any other).
+    When the same request was recorded several times the responses are
+    replayed in recorded order, and the last one is repeated once they run
+    out. Recording appends to an existing cassette, so several scripts can be
+    recorded into one file. Request headers (and so the bearer token) are
+    never written to the file.
+    """
+
+    def __init__(self, path: Path, mode: str = 'replay', latency_scale: float = 1.0):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Cassette mode must be 'record' or 'replay', not '{mode}'")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.interactions: List[Dict[str, Any]] = []
+        self._queues: Dict[str, deque] = defaultdict(deque)
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.played = 0
+        self.missing = 0
+
+        if mode == 'replay' or self.path.exists():
+            self.interactions = serializer.load(self.path)['interactions']
+        if mode == 'replay':
+            for interaction in self.interactions:
+                self._queues[self._key(interaction['method'], interaction['url'])].append(interaction)
+            logger.info(f"Replaying {len(self.interactions)} recorded responses from {self.path}")
+        else:
+            atexit.register(self.save)
+            logger.info(f"Recording API responses to {self.path} ({len(self.interactions)} already recorded)")
+
+    @staticmethod
+    def _key(method: str, url: str) -> str:
+        parts = urlsplit(url)
+        return f"{method.upper()} {parts.path}?{parts.query}"
+
+    def record(self, request: requests.PreparedRequest, response: requests.Response, elapsed: float) -> None:
+        body = response.content
+        try:
+            stored_body = {'body': body.decode('utf-8')}
+        except UnicodeDecodeError:
+            stored_body = {'body_base64': base64.b64encode(body).decode('ascii')}
+        interaction = {
+            'method': request.method,
+            'url': request.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {name: value for name, value in response.headers.items()
+                        if name.lower() not in _DROPPED_HEADERS},
+            'elapsed': elapsed,
+            **stored_body,
+        }
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def play(self, request: requests.PreparedRequest) -> Optional[Dict[str, Any]]:
+        """Next recorded interaction for a request, or None if it was never recorded"""
+        key = self._key(request.method, request.url)
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue:
+                self._last[key] = queue.popleft()
+            interaction = self._last.get(key)
+            if interaction is None:
+                self.missing += 1
+            else:
+                self.played += 1
+            return interaction
+
+    def save(self) -> None:
+        """Write recorded interactions (called automatically at exit in record mode)"""
+        with self._lock:
+            interactions = list(self.interactions)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            serializer.dump({'version': 1, 'interactions': interactions}, self.path)
+            logger.info(f"Saved {len(interactions)} recorded responses to {self.path}")
+        except OSError as e:
+            logger.error(f"Could not save cassette {self.path}: {e}")
+
+class CassetteAdapter(HTTPAdapter):
+    """Transport adapter that records through ``real_adapter`` or replays from a cassette
+
+    Like the shared pool adapter, close() is a no-op because every session in
+    the process mounts the same instance.
+    """
+
+    def __init__(self, cassette: Cassette, real_adapter: Optional[HTTPAdapter] = None):
+        super().__init__()
+        self.cassette = cassette
+        self.real_adapter = real_adapter
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self.cassette.mode == 'record':
+            started = time.perf_counter()
+            response = self.real_adapter.send(request, stream=stream, timeout=timeout, verify=verify,
+                                              cert=cert, proxies=proxies)
+            # Reads the whole body; streaming callers then iterate over the buffered copy
+            response.content
+            self.cassette.record(request, response, time.perf_counter() - started)
+            return response
+
+        interaction = self.cassette.play(request)
+        if interaction is None:
+            raise requests.exceptions.ConnectionError(f"No recorded response for {request.method} {request.url}",
+                                                      request=request)
+        if self.cassette.latency_scale > 0:
+            time.sleep(interaction['elapsed'] * self.cassette.latency_scale)
+        return self._build_response(request, interaction)
+
+    def _build_response(self, request: requests.PreparedRequest, interaction: Dict[str, Any]) -> requests.Response:
+        response = requests.Response()
+        response.status_code = interaction['status']
+        response.reason = interaction['reason']
+        response.headers = CaseInsensitiveDict(interaction['headers'])
+        if 'body_base64' in interaction:
+            response._content = base64.b64decode(interaction['body_base64'])
+        else:
+            response._content = interaction['body'].encode('utf-8')
+        response._content_consumed = True
+        response.headers['Content-Length'] = str(len(response._content))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=interaction['elapsed'])
+        response.connection = self
+        return response
+
+    def close(self) -> None:
+        pass
+
+_cassette_adapter: Optional[CassetteAdapter] = None
+_lock = threading.Lock()
+
+def get_cassette_adapter(config, real_adapter: HTTPAdapter) -> Optional[CassetteAdapter]:
+    """Process-wide cassette adapter if HTTP_CASSETTE is set, else None"""
+    global _cassette_adapter
+    if not config.http_cassette:
+        return None
+    with _lock:
+        if _cassette_adapter is None:
+            cassette = Cassette(config.http_cassette, config.http_cassette_mode, config.replay_latency_scale)
+            _cassette_adapter = CassetteAdapter(cassette, real_adapter)
+        return _cassette_adapter
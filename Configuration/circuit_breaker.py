@@ -0,0 +1,125 @@
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional
+import requests
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of sending a request while an endpoint's circuit is open"""
+
+class CircuitBreaker:
+    """Fail fast on an endpoint that keeps failing
+
+    closed: requests flow; ``failure_threshold`` consecutive failures (errors,
+        timeouts, 5xx, or responses slower than ``slow_call_seconds``) open it.
+    open: requests are rejected without touching the network until
+        ``reset_timeout`` has passed.
+    half-open: a single probe request is let through; success closes the
+        circuit, failure opens it again for another ``reset_timeout``. A
+        probe that ends without an outcome must be given back with
+        ``release()``; one not heard from within ``probe_timeout`` (default
+        ``reset_timeout``) is presumed lost and another is let through.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 slow_call_seconds: Optional[float] = None, probe_timeout: Optional[float] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self.probe_timeout = reset_timeout if probe_timeout is None else probe_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.probe_started = 0.0
+        self.rejected = 0
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now (claims the probe slot when half-open)"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+                logger.info(f"Circuit for {self.name} half-open, probing")
+            if self.state == self.CLOSED:
+                return True
+            if (self.state == self.HALF_OPEN and self.probe_in_flight
+                    and now - self.probe_started >= self.probe_timeout):
+                logger.warning(f"Circuit for {self.name} probe not heard from in {self.probe_timeout:g}s, probing again")
+                self.probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                self.probe_started = now
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self, elapsed: float = 0.0) -> None:
+        if self.slow_call_seconds and elapsed > self.slow_call_seconds:
+            self.record_failure(f"slow response ({elapsed:.1f}s)")
+            return
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+
+    def release(self) -> None:
+        """Give back an allowed request that ended without a success or failure to record"""
+        with self._lock:
+            self.probe_in_flight = False
+
+    def record_failure(self, reason: str = '') -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED
+                                                 and self.consecutive_failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.probe_in_flight = False
+                self.times_opened += 1
+                logger.warning(f"Circuit for {self.name} opened after {self.consecutive_failures} consecutive "
+                               f"failures ({reason}); failing fast for {self.reset_timeout:.0f}s")
+
+class CircuitBreakers:
+    """One CircuitBreaker per endpoint family, shared by every session of a client"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 slow_call_seconds: Optional[float] = None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> Optional['CircuitBreakers']:
+        if config.circuit_breaker_failures <= 0:
+            return None
+        return cls(config.circuit_breaker_failures, config.circuit_breaker_reset,
+                   config.circuit_breaker_slow_call or None)
+
+    def get(self, key: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(key, self.failure_threshold, self.reset_timeout, self.slow_call_seconds)
+                self._breakers[key] = breaker
+            return breaker
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: {'state': breaker.state, 'times_opened': breaker.times_opened,
+                               'rejected': breaker.rejected} for breaker in breakers}
@@ -1,6 +1,7 @@
 import os
 import logging
-from typing import Optional, Dict, Any
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -16,6 +17,86 @@ class Config:
         self.call_center_id = os.getenv('CALL_CENTER_ID')
         self.office_id = os.getenv('OFFICE_ID')
         self.request_timeout = int(os.getenv('REQUEST_TIMEOUT', '30'))
+        self.connect_timeout = float(os.getenv('CONNECT_TIMEOUT', '5'))
+        self.read_timeout = float(os.getenv('READ_TIMEOUT', str(self.request_timeout)))
+        self.max_workers = int(os.getenv('MAX_WORKERS', '10'))
+        
+        # Process-wide HTTP connection pool (keep-alive connections shared by all clients)
+        self.pool_connections = int(os.getenv('POOL_CONNECTIONS', '10'))
+        self.pool_maxsize = int(os.getenv('POOL_MAXSIZE', str(max(20, self.max_workers * 2))))
+        
+        # Conditional-request (ETag / Last-Modified) cache for slow-changing endpoints
+        self.conditional_cache = os.getenv('CONDITIONAL_CACHE', 'true').lower() == 'true'
+        self.conditional_cache_endpoints = [
+            endpoint.strip() for endpoint in os.getenv('CONDITIONAL_CACHE_ENDPOINTS', 'offices,company,callcenters').split(',')
+            if endpoint.strip()
+        ]
+        self.http_cache_dir = Path(os.getenv('HTTP_CACHE_DIR', str(Path(__file__).parent.parent / 'Data' / 'http_cache')))
+        
+        # Opt-in TTL response cache (seconds per route, e.g. users/{id}=30) sharing HTTP_CACHE_DIR
+        self.response_cache = os.getenv('RESPONSE_CACHE', 'false').lower() == 'true'
+        self.response_cache_ttls = self._parse_endpoint_settings(
+            os.getenv('RESPONSE_CACHE_TTLS', 'offices=3600,offices/{id}=3600,company=3600,callcenters=3600,users=900'),
+            float)
+        self.response_cache_max_mb = int(os.getenv('RESPONSE_CACHE_MAX_MB', '100'))
+        self.pagination_prefetch = os.getenv('PAGINATION_PREFETCH', 'true').lower() == 'true'
+        self.stream_json = os.getenv('STREAM_JSON', 'true').lower() == 'true'
+        
+        # Record/replay of API responses for offline, repeatable runs
+        self.http_cassette = os.getenv('HTTP_CASSETTE') or None
+        self.http_cassette_mode = os.getenv('HTTP_CASSETTE_MODE', 'replay').lower()
+        self.replay_latency_scale = float(os.getenv('REPLAY_LATENCY_SCALE', '1.0'))
+        
+        # Rate limiting (Dialpad allows 1200 requests/minute; 0 disables limiting)
+        self.rate_limit_per_minute = int(os.getenv('RATE_LIMIT_PER_MINUTE', '1200'))
+        self.rate_limit_burst = int(os.getenv('RATE_LIMIT_BURST', '20'))
+        self.rate_limit_max_retries = int(os.getenv('RATE_LIMIT_MAX_RETRIES', '5'))
+        self.endpoint_rate_limits = self._parse_endpoint_settings(os.getenv('ENDPOINT_RATE_LIMITS', ''))
+        
+        # Retries for timeouts, connection errors and 5xx responses on GET requests
+        self.retry_max_attempts = int(os.getenv('RETRY_MAX_ATTEMPTS', '3'))
+        self.retry_backoff_base = float(os.getenv('RETRY_BACKOFF_BASE', '0.5'))
+        self.retry_backoff_max = float(os.getenv('RETRY_BACKOFF_MAX', '10'))
+        
+        # Circuit breaker per endpoint family (0 failures disables it)
+        self.circuit_breaker_failures = int(os.getenv('CIRCUIT_BREAKER_FAILURES', '5'))
+        self.circuit_breaker_reset = float(os.getenv('CIRCUIT_BREAKER_RESET', '30'))
+        self.circuit_breaker_slow_call = float(os.getenv('CIRCUIT_BREAKER_SLOW_CALL', '10'))
+        
+        # Hedged users/{id}/ requests in status runs: duplicate a request slower than the
+        # observed percentile latency, for at most HEDGE_MAX_RATE of requests
+        self.hedge_requests = os.getenv('HEDGE_REQUESTS', 'false').lower() == 'true'
+        self.hedge_max_rate = float(os.getenv('HEDGE_MAX_RATE', '0.05'))
+        self.hedge_percentile = float(os.getenv('HEDGE_PERCENTILE', '0.95'))
+        self.hedge_min_samples = int(os.getenv('HEDGE_MIN_SAMPLES', '20'))
+        
+        # Adaptive per-user polling in watch mode (seconds between polls of one user)
+        self.adaptive_polling = os.getenv('ADAPTIVE_POLLING', 'false').lower() == 'true'
+        self.poll_min_interval = float(os.getenv('POLL_MIN_INTERVAL', '5'))
+        self.poll_on_shift_interval = float(os.getenv('POLL_ON_SHIFT_INTERVAL', '60'))
+        self.poll_off_shift_interval = float(os.getenv('POLL_OFF_SHIFT_INTERVAL', '300'))
+        
+        # Webhook receiver for status events in watch mode (--listen)
+        self.webhook_secret = os.getenv('WEBHOOK_SECRET') or None
+        self.webhook_reconcile_interval = float(os.getenv('WEBHOOK_RECONCILE_INTERVAL', '300'))
+        
+        # Opt-in append-only duty status history (one segment file per day), gzipped after
+        # STATUS_HISTORY_COMPACT_DAYS and deleted after STATUS_HISTORY_RETENTION_DAYS
+        self.status_history = os.getenv('STATUS_HISTORY', 'false').lower() == 'true'
+        self.status_history_dir = Path(os.getenv('STATUS_HISTORY_DIR', str(Path(__file__).parent.parent / 'Data' / 'status_history')))
+        self.status_history_max_gap = float(os.getenv('STATUS_HISTORY_MAX_GAP', '3600'))
+        self.status_history_retention_days = int(os.getenv('STATUS_HISTORY_RETENTION_DAYS', '30'))
+        self.status_history_compact_days = int(os.getenv('STATUS_HISTORY_COMPACT_DAYS', '2'))
+        
+        # Status snapshot shared by status runs within the TTL (0 disables it)
+        self.status_snapshot_ttl = float(os.getenv('STATUS_SNAPSHOT_TTL', '0'))
+        self.status_snapshot_file = Path(os.getenv('STATUS_SNAPSHOT_FILE', str(Path(__file__).parent.parent / 'Data' / 'status_snapshot.json')))
+        self.status_snapshot_lock_timeout = float(os.getenv('STATUS_SNAPSHOT_LOCK_TIMEOUT', '300'))
+        
+        # Per-endpoint request metrics written when the process exits (off unless a path is set)
+        self.metrics_report = os.getenv('METRICS_REPORT') or None
+        self.metrics_prometheus_file = os.getenv('METRICS_PROMETHEUS_FILE') or None
+        self.metrics_job = os.getenv('METRICS_JOB', 'dialpad')
         self.debug = os.getenv('DEBUG', 'false').lower() == 'true'
         
         # Validate required settings
@@ -29,15 +110,31 @@ class Config:
             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         )
     
+    @staticmethod
+    def _parse_endpoint_settings(value: str, value_type=int) -> Dict[str, Any]:
+        """Parse 'endpoint=value,endpoint=value' settings into a dict"""
+        limits = {}
+        for item in value.split(','):
+            if '=' in item:
+                endpoint, limit = item.split('=', 1)
+                limits[endpoint.strip().strip('/')] = value_type(limit)
+        return limits
+    
     @property
     def headers(self) -> Dict[str, str]:
         """Return headers for API requests"""
         return {
             'Authorization': f'Bearer {self.bearer_token}',
             'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
             'Content-Type': 'application/json'
         }
     
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """(connect, read) timeout tuple for requests"""
+        return (self.connect_timeout, self.read_timeout)
+    
     def get_api_url(self, endpoint: str) -> str:
         """Construct full API URL for an endpoint"""
         return f"{self.api_base_url.rstrip('/')}/{endpoint.lstrip('/')}"
\ No newline at end of file
@@ -0,0 +1,79 @@
+import logging
+import threading
+from typing import Dict, Any, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from cassette import get_cassette_adapter
+
+logger = logging.getLogger(__name__)
+
+class SharedPoolAdapter(HTTPAdapter):
+    """HTTPAdapter shared by every session in the process
+
+    Closing a session must not tear down connections other sessions are still
+    using, so close() is a no-op; use close_shared_pool() at shutdown instead.
+    """
+
+    def close(self) -> None:
+        pass
+
+    def close_pool(self) -> None:
+        super().close()
+
+_shared_adapter: Optional[SharedPoolAdapter] = None
+_lock = threading.Lock()
+
+def get_shared_adapter(config) -> SharedPoolAdapter:
+    """Return the process-wide adapter, creating it from ``config`` on first use"""
+    global _shared_adapter
+    with _lock:
+        if _shared_adapter is None:
+            _shared_adapter = SharedPoolAdapter(pool_connections=config.pool_connections,
+                                                pool_maxsize=config.pool_maxsize)
+            logger.debug(f"Created shared connection pool (pool_connections={config.pool_connections}, "
+                         f"pool_maxsize={config.pool_maxsize})")
+        return _shared_adapter
+
+def mount_shared_pool(session: requests.Session, config) -> requests.Session:
+    """Route all of a session's HTTP(S) traffic through the shared connection pool
+    
+    With HTTP_CASSETTE set, traffic goes through the record/replay adapter instead.
+    """
+    adapter = get_shared_adapter(config)
+    adapter = get_cassette_adapter(config, adapter) or adapter
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def close_shared_pool() -> None:
+    """Close every pooled connection (the pool is recreated on next use)"""
+    global _shared_adapter
+    with _lock:
+        if _shared_adapter is not None:
+            _shared_adapter.close_pool()
+            _shared_adapter = None
+
+def pool_stats() -> Dict[str, Any]:
+    """Connection reuse statistics per host for the shared pool"""
+    stats = {'hosts': {}, 'connections_opened': 0, 'requests': 0, 'reused': 0}
+    with _lock:
+        adapter = _shared_adapter
+    if adapter is None:
+        return stats
+
+    pools = adapter.poolmanager.pools
+    for key in list(pools.keys()):
+        pool = pools.get(key)
+        if pool is None:
+            continue
+        opened = pool.num_connections
+        requests_made = pool.num_requests
+        stats['hosts'][f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+            'connections_opened': opened,
+            'requests': requests_made,
+            'reused': max(0, requests_made - opened),
+        }
+        stats['connections_opened'] += opened
+        stats['requests'] += requests_made
+    stats['reused'] = max(0, stats['requests'] - stats['connections_opened'])
+    return stats
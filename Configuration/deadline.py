@@ -0,0 +1,55 @@
+import re
+import time
+from typing import Tuple, Union
+import requests
+
+Timeout = Union[float, Tuple[float, float], None]
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised instead of starting (or waiting for) a request once the run's deadline has passed"""
+
+class Deadline:
+    """A point in time by which the whole run has to finish
+
+    Sessions given a deadline clip each request's timeout to the time left,
+    and raise DeadlineExceeded rather than wait for a rate limit slot or a
+    retry backoff that would end after it. ``hit`` is set once anything has
+    been given up because of the deadline, which can be before it passes.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.hit = False
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def reached(self) -> bool:
+        """Whether the deadline has passed or already cut something short"""
+        return self.hit or self.expired()
+
+    def check(self, what: str = 'request') -> None:
+        if self.expired():
+            self.hit = True
+            raise DeadlineExceeded(f"Deadline of {self.seconds:g}s reached, not starting {what}")
+
+    def clip_timeout(self, timeout: Timeout) -> Timeout:
+        """Limit a requests-style timeout (seconds or (connect, read)) to the time left"""
+        remaining = max(0.001, self.remaining())
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(min(value, remaining) if value is not None else remaining for value in timeout)
+        return min(timeout, remaining)
+
+def parse_duration(value: str) -> float:
+    """Parse '20s', '1.5m', '500ms' or a bare number of seconds"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*', str(value).lower())
+    if not match:
+        raise ValueError(f"Invalid duration '{value}' (use e.g. 20s, 1.5m, 500ms)")
+    number, unit = float(match.group(1)), match.group(2) or 's'
+    return number * {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}[unit]
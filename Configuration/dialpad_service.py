@@ -1,81 +1,332 @@
 import requests
 import logging
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Iterator, NamedTuple, Set
 from datetime import datetime
 from config import Config
+from rate_limiter import RateLimiter, RateLimitedSession
+from retry import RetryPolicy
+from connection_pool import mount_shared_pool, pool_stats
+from response_cache import ResponseCache
+from single_flight import SingleFlight
+from json_stream import StreamingPage
+from circuit_breaker import CircuitBreakers
+from metrics import request_metrics
+import serializer
 
 logger = logging.getLogger(__name__)
 
+class Page(NamedTuple):
+    """One page of a cursor-paginated list endpoint"""
+    items: List[Dict[str, Any]]
+    cursor: Optional[str]  # Cursor for the next page (None on the last page)
+
 class DialpadAPI:
     """Dialpad API client for fetching employee status information"""
     
     def __init__(self, config: Config):
         self.config = config
-        self.session = requests.Session()
-        self.session.headers.update(config.headers)
+        self.rate_limiter = RateLimiter.from_config(config)
+        self.response_cache = ResponseCache.from_config(config)
+        self.single_flight = SingleFlight()
+        self.circuit_breakers = CircuitBreakers.from_config(config)
+        self.metrics = request_metrics
+        self.metrics.export_at_exit(config)
+        self.session = self.create_session()
+        # Endpoints seen sending their cursor after the items, which streaming can't prefetch for
+        self._cursor_after_items: Set[str] = set()
+    
+    def create_session(self, retry_policy: Optional[RetryPolicy] = None) -> requests.Session:
+        """Create an authenticated session that shares this client's rate limiter
+        
+        Worker threads should each use their own session from this method so
+        that concurrent requests still draw from the same rate limit. All
+        sessions share the process-wide connection pool, so keep-alive
+        connections are reused across sessions and DialpadAPI instances. GET
+        requests are retried according to ``retry_policy`` (from Config by default)
+        and slow-changing endpoints are revalidated with conditional requests.
+        Sessions share one circuit breaker per endpoint family and record
+        into the process-wide request metrics.
+        """
+        session = RateLimitedSession(self.rate_limiter, max_retries=self.config.rate_limit_max_retries,
+                                     retry_policy=retry_policy or RetryPolicy.from_config(self.config),
+                                     response_cache=self.response_cache,
+                                     circuit_breakers=self.circuit_breakers,
+                                     metrics=self.metrics)
+        session.headers.update(self.config.headers)
+        return mount_shared_pool(session, self.config)
+    
+    @staticmethod
+    def connection_stats() -> Dict[str, Any]:
+        """Connection reuse statistics for the shared connection pool"""
+        return pool_stats()
+    
+    def circuit_stats(self) -> Dict[str, Any]:
+        """State of each endpoint family's circuit breaker (empty if disabled)"""
+        return self.circuit_breakers.stats() if self.circuit_breakers else {}
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss statistics for the response cache (empty if caching is off)"""
+        return self.response_cache.stats() if self.response_cache else {}
+    
+    def metrics_report(self) -> Dict[str, Any]:
+        """Per-endpoint request count, latency percentiles, bytes, retries, 429s and cache hits"""
+        return self.metrics.report()
+    
+    def get_json(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                 session: Optional[requests.Session] = None, coalesce: bool = True) -> Any:
+        """GET an endpoint and decode the JSON body, coalescing duplicate in-flight calls
+        
+        Concurrent calls for the same URL (including query string) share one
+        request and receive the same decoded object, so callers must not
+        mutate it. ``coalesce=False`` always sends a request of its own (for
+        hedged duplicates). Raises requests.exceptions.RequestException on failure.
+        """
+        session = session or self.session
+        url = requests.Request('GET', self.config.get_api_url(endpoint), params=params).prepare().url
+        
+        def fetch():
+            logger.debug(f"Fetching {url}")
+            response = session.get(url, timeout=self.config.timeout)
+            response.raise_for_status()
+            return serializer.response_json(response)
+        
+        if not coalesce:
+            return fetch()
+        return self.single_flight.do(url, fetch)
     
     def get_company_info(self) -> Optional[Dict[str, Any]]:
         """Get company information"""
         try:
-            url = self.config.get_api_url('company/')
-            logger.debug(f"Fetching company info from: {url}")
-            
-            response = self.session.get(url, timeout=self.config.request_timeout)
-            response.raise_for_status()
-            
-            return response.json()
+            return self.get_json('company/')
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching company info: {e}")
             return None
     
+    def _open_page(self, session: requests.Session, url: str, params: Dict[str, Any]) -> requests.Response:
+        """Request a page with a streamed body (the caller must consume or close it)"""
+        logger.debug(f"Fetching {url} (params: {params})")
+        
+        response = session.get(url, params=params, timeout=self.config.timeout, stream=True)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError:
+            response.close()
+            raise
+        return response
+    
+    def _fetch_page(self, session: requests.Session, url: str, params: Dict[str, Any]) -> Page:
+        """Fetch and decode a single page of a list endpoint"""
+        if self.config.stream_json:
+            # Decode while downloading rather than holding the raw body and the parsed page at once
+            page = StreamingPage(self._open_page(session, url, params))
+            items = list(page)
+            return Page(items, page.cursor if items else None)
+        
+        logger.debug(f"Fetching {url} (params: {params})")
+        response = session.get(url, params=params, timeout=self.config.timeout)
+        response.raise_for_status()
+        
+        data = serializer.response_json(response)
+        items = data.get('items', data.get('results', []))
+        return Page(items, data.get('cursor') if items else None)
+    
+    def iter_pages(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                   page_size: Optional[int] = None, cursor: Optional[str] = None,
+                   prefetch: Optional[bool] = None) -> Iterator[Page]:
+        """Yield pages from a cursor-paginated list endpoint as they arrive
+        
+        Args:
+            endpoint: API endpoint, e.g. 'users/' or 'call/'
+            params: Query parameters sent with every page
+            page_size: Items per page requested from the API (API default if None)
+            cursor: Cursor to resume from (e.g. a previous Page.cursor)
+            prefetch: Request the next page in a background thread while the
+                caller processes the current one (PAGINATION_PREFETCH by default)
+        
+        Raises requests.exceptions.RequestException if a page still fails after retries.
+        """
+        url = self.config.get_api_url(endpoint)
+        if prefetch is None:
+            prefetch = self.config.pagination_prefetch
+        
+        def page_params(page_cursor):
+            return self._page_params(params, page_size, page_cursor)
+        
+        # Cursors already requested (one short string per page), so a cursor
+        # loop in the API stops the iteration instead of running forever
+        seen_cursors = {cursor} if cursor else set()
+        
+        def next_cursor(page):
+            return self._next_cursor(endpoint, page.cursor, seen_cursors)
+        
+        if not prefetch:
+            while True:
+                page = self._fetch_page(self.session, url, page_params(cursor))
+                yield page
+                cursor = next_cursor(page)
+                if not cursor:
+                    break
+            return
+        
+        # The prefetch worker gets its own session so the caller can keep using
+        # self.session while iterating
+        session = self.create_session()
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch')
+        future = executor.submit(self._fetch_page, session, url, page_params(cursor))
+        try:
+            while future is not None:
+                page = future.result()
+                cursor = next_cursor(page)
+                future = executor.submit(self._fetch_page, session, url, page_params(cursor)) if cursor else None
+                yield page
+        finally:
+            # Don't wait for a prefetch the caller no longer needs
+            executor.shutdown(wait=False, cancel_futures=True)
+            if future is None or future.done():
+                session.close()
+            else:
+                future.add_done_callback(lambda _: session.close())
+    
+    @staticmethod
+    def _page_params(params: Optional[Dict[str, Any]], page_size: Optional[int],
+                     cursor: Optional[str]) -> Dict[str, Any]:
+        query = dict(params or {})
+        if page_size:
+            query['limit'] = page_size
+        if cursor:
+            query['cursor'] = cursor
+        return query
+    
+    @staticmethod
+    def _next_cursor(endpoint: str, cursor: Optional[str], seen_cursors: set) -> Optional[str]:
+        """Return the cursor to request next, or None if it was already requested (a loop)"""
+        if cursor in seen_cursors:
+            logger.warning(f"Pagination loop detected on {endpoint} (cursor {cursor} repeated), stopping")
+            return None
+        if cursor:
+            seen_cursors.add(cursor)
+        return cursor
+    
+    def iter_items(self, endpoint: str, params: Optional[Dict[str, Any]] = None, limit: Optional[int] = None,
+                   page_size: Optional[int] = None, cursor: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield individual items from a cursor-paginated list endpoint
+        
+        Stops after ``limit`` items if given. Memory use is bounded by one page,
+        or by one item when STREAM_JSON is on (except for endpoints that send
+        their cursor last while prefetch is on, which are read a page at a
+        time so the next page can still be prefetched).
+        """
+        if self.config.stream_json and not (self.config.pagination_prefetch and endpoint in self._cursor_after_items):
+            yield from self._iter_streamed_items(endpoint, params, limit, page_size, cursor)
+            return
+        yield from self._iter_buffered_items(endpoint, params, limit, page_size, cursor)
+    
+    def _iter_buffered_items(self, endpoint: str, params: Optional[Dict[str, Any]], limit: Optional[int],
+                             page_size: Optional[int], cursor: Optional[str]) -> Iterator[Dict[str, Any]]:
+        """Yield items from whole pages (see iter_items)"""
+        count = 0
+        for page in self.iter_pages(endpoint, params, page_size=page_size, cursor=cursor):
+            for item in page.items:
+                yield item
+                count += 1
+                if limit and count >= limit:
+                    return
+    
+    def _iter_streamed_items(self, endpoint: str, params: Optional[Dict[str, Any]], limit: Optional[int],
+                             page_size: Optional[int], cursor: Optional[str]) -> Iterator[Dict[str, Any]]:
+        """Yield items as they are decoded from each page's body (see iter_items)
+        
+        With prefetch on, the next page is requested as soon as the current
+        page's cursor has been read, which is before its last item if the API
+        sends the cursor first. If it arrives after the items, little or
+        nothing could be prefetched, so the endpoint is read as whole pages
+        (which iter_pages prefetches) from then on.
+        """
+        url = self.config.get_api_url(endpoint)
+        seen_cursors = {cursor} if cursor else set()
+        executor = session = prefetched = response = None
+        if self.config.pagination_prefetch:
+            session = self.create_session()
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch')
+        
+        count = 0
+        try:
+            response = self._open_page(self.session, url, self._page_params(params, page_size, cursor))
+            while response is not None:
+                page = StreamingPage(response)
+                next_cursor = None
+                checked = False
+                for item in page:
+                    if executor and not checked and 'cursor' in page.fields:
+                        checked = True
+                        if page.count > 1:
+                            self._note_cursor_after_items(endpoint)
+                        next_cursor = self._next_cursor(endpoint, page.cursor, seen_cursors)
+                        if next_cursor:
+                            prefetched = executor.submit(self._open_page, session, url,
+                                                         self._page_params(params, page_size, next_cursor))
+                    yield item
+                    count += 1
+                    if limit and count >= limit:
+                        return
+                
+                if not checked:
+                    next_cursor = self._next_cursor(endpoint, page.cursor, seen_cursors) if page.count else None
+                    if executor and next_cursor:
+                        self._note_cursor_after_items(endpoint)
+                        yield from self._iter_buffered_items(endpoint, params, limit - count if limit else None,
+                                                             page_size, next_cursor)
+                        return
+                if prefetched is not None:
+                    response, prefetched = prefetched.result(), None
+                elif next_cursor:
+                    response = self._open_page(self.session, url, self._page_params(params, page_size, next_cursor))
+                else:
+                    response = None
+        finally:
+            if response is not None:
+                response.close()
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+                if prefetched is not None and not prefetched.cancelled():
+                    # Release the connection of a prefetched page nobody will read
+                    prefetched.add_done_callback(lambda f: f.exception() is None and f.result().close())
+                session.close()
+    
+    def _note_cursor_after_items(self, endpoint: str) -> None:
+        if endpoint not in self._cursor_after_items:
+            self._cursor_after_items.add(endpoint)
+            logger.info(f"{endpoint} sends its cursor after the items, so its pages can't be "
+                        f"prefetched while streaming; reading whole pages instead")
+    
     def get_users(self, email_filter: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get all users in the company, optionally filtered by email
         
         Note: The Dialpad API only supports email filtering, not office_id or call_center_id
         """
+        all_users = []
+        cursor = None
         try:
+            params = {'email': email_filter} if email_filter else None
             if email_filter:
-                url = self.config.get_api_url(f'users/?email={email_filter}')
-                logger.debug(f"Fetching users with email filter: {url}")
+                logger.debug(f"Fetching users with email filter: {email_filter}")
             else:
-                url = self.config.get_api_url('users/')
-                logger.debug(f"Fetching all users from: {url}")
+                logger.debug("Fetching all users")
             
-            # Get all users with pagination
-            all_users = []
-            cursor = None
-            
-            while True:
-                if cursor:
-                    paginated_url = f"{url}{'&' if '?' in url else '?'}cursor={cursor}"
-                else:
-                    paginated_url = url
+            for page in self.iter_pages('users/', params):
+                all_users.extend(page.items)
+                cursor = page.cursor
                 
-                response = self.session.get(paginated_url, timeout=self.config.request_timeout)
-                response.raise_for_status()
-                
-                data = response.json()
-                users = data.get('items', data.get('results', []))
-                all_users.extend(users)
-                
-                logger.debug(f"Fetched {len(users)} users (total: {len(all_users)})")
-                
-                # Check for next page
-                cursor = data.get('cursor')
-                if not cursor or not users:
-                    break
-                    
-                # Safety limit to prevent infinite loops
-                if len(all_users) > 1000:
-                    logger.warning(f"Reached safety limit of 1000 users")
-                    break
+                logger.debug(f"Fetched {len(page.items)} users (total: {len(all_users)})")
             
             logger.info(f"Total users fetched: {len(all_users)}")
             return all_users
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching users: {e}")
-            return []
+            # Pages are retried individually; keep whatever was fetched before the failure
+            logger.error(f"Error fetching users (cursor: {cursor}, keeping {len(all_users)} fetched): {e}")
+            return all_users
     
     def filter_users_by_office(self, users: List[Dict[str, Any]], office_id: str) -> List[Dict[str, Any]]:
         """Filter users by office_id (client-side filtering since API doesn't support it)"""
@@ -96,13 +347,7 @@ class DialpadAPI:
     def get_call_center_users(self, call_center_id: str) -> List[Dict[str, Any]]:
         """Get users specifically from a call center"""
         try:
-            url = self.config.get_api_url(f'callcenters/{call_center_id}/users/')
-            logger.debug(f"Fetching call center users from: {url}")
-            
-            response = self.session.get(url, timeout=self.config.request_timeout)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self.get_json(f'callcenters/{call_center_id}/users/')
             return data.get('results', [])
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching call center users: {e}")
@@ -112,13 +357,7 @@ class DialpadAPI:
     def get_user_devices(self, user_id: int) -> List[Dict[str, Any]]:
         """Get devices for a specific user"""
         try:
-            url = self.config.get_api_url(f'userdevices/?user_id={user_id}')
-            logger.debug(f"Fetching devices for user {user_id} from: {url}")
-            
-            response = self.session.get(url, timeout=self.config.request_timeout)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self.get_json('userdevices/', {'user_id': user_id})
             return data.get('results', [])
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching devices for user {user_id}: {e}")
@@ -127,17 +366,7 @@ class DialpadAPI:
     def get_contacts(self, office_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get contacts from the company, optionally filtered by office"""
         try:
-            if office_id:
-                url = self.config.get_api_url(f'contacts/?office_id={office_id}')
-                logger.debug(f"Fetching contacts from office {office_id}: {url}")
-            else:
-                url = self.config.get_api_url('contacts/')
-                logger.debug(f"Fetching contacts from: {url}")
-            
-            response = self.session.get(url, timeout=self.config.request_timeout)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self.get_json('contacts/', {'office_id': office_id} if office_id else None)
             return data.get('items', [])  # Contacts use 'items' not 'results'
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching contacts: {e}")
@@ -146,126 +375,88 @@ class DialpadAPI:
     def get_offices(self) -> List[Dict[str, Any]]:
         """Get offices from the company"""
         try:
-            url = self.config.get_api_url('offices/')
-            logger.debug(f"Fetching offices from: {url}")
-            
-            response = self.session.get(url, timeout=self.config.request_timeout)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self.get_json('offices/')
             return data.get('items', [])  # Offices use 'items' not 'results'
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching offices: {e}")
             return []
 
+    def get_office(self, office_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single office by ID"""
+        try:
+            return self.get_json(f'offices/{office_id}/')
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching office {office_id}: {e}")
+            return None
+
     def get_call_centers(self) -> List[Dict[str, Any]]:
         """Get call centers information with pagination support"""
+        all_call_centers = []
+        cursor = None
         try:
-            all_call_centers = []
-            cursor = None
-            
-            while True:
-                url = self.config.get_api_url('callcenters/')
-                params = {}
-                if cursor:
-                    params['cursor'] = cursor
-                
-                logger.debug(f"Fetching call centers from: {url} (cursor: {cursor})")
-                
-                response = self.session.get(url, params=params, timeout=self.config.request_timeout)
-                response.raise_for_status()
+            for page in self.iter_pages('callcenters/'):
+                all_call_centers.extend(page.items)
+                cursor = page.cursor
                 
-                data = response.json()
-                call_centers = data.get('items', [])
-                all_call_centers.extend(call_centers)
-                
-                logger.debug(f"Fetched {len(call_centers)} call centers (total: {len(all_call_centers)})")
-                
-                # Check for next page
-                cursor = data.get('cursor')
-                if not cursor or not call_centers:
-                    break
-                    
-                # Safety limit to prevent infinite loops
-                if len(all_call_centers) > 1000:
-                    logger.warning(f"Reached safety limit of 1000 call centers")
-                    break
+                logger.debug(f"Fetched {len(page.items)} call centers (total: {len(all_call_centers)})")
             
             logger.info(f"Total call centers fetched: {len(all_call_centers)}")
             return all_call_centers
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching call centers: {e}")
-            return []
+            logger.error(f"Error fetching call centers (cursor: {cursor}, keeping {len(all_call_centers)} fetched): {e}")
+            return all_call_centers
+
+    def _call_params(self, start_time: str = None, end_time: str = None, **filters) -> Dict[str, Any]:
+        """Build query parameters for the call history endpoint"""
+        params = {}
+        if start_time:
+            params['start_time'] = start_time
+        if end_time:
+            params['end_time'] = end_time
+        
+        # Add any additional filters
+        params.update(filters)
+        return params
+
+    def iter_calls(self, limit: int = None, start_time: str = None, end_time: str = None,
+                   page_size: int = None, cursor: str = None, **filters) -> Iterator[Dict[str, Any]]:
+        """Stream call history one call at a time (see get_calls for arguments)
+        
+        Raises requests.exceptions.RequestException if a page still fails after retries.
+        """
+        params = self._call_params(start_time, end_time, **filters)
+        return self.iter_items('call/', params, limit=limit, page_size=page_size, cursor=cursor)
 
     def get_calls(self, limit: int = None, start_time: str = None, end_time: str = None, **filters) -> List[Dict[str, Any]]:
         """Get call history with pagination support and optional filtering
         
+        All calls are held in memory; use iter_calls() to stream large ranges.
+        
         Args:
             limit: Maximum number of calls to fetch (None for all)
             start_time: Start time filter (ISO 8601 format)
             end_time: End time filter (ISO 8601 format)
             **filters: Additional query parameters for filtering
         """
+        all_calls = []
         try:
-            all_calls = []
-            cursor = None
-            fetched_count = 0
-            
-            while True:
-                url = self.config.get_api_url('call/')
-                params = {}
-                
-                if cursor:
-                    params['cursor'] = cursor
-                if start_time:
-                    params['start_time'] = start_time
-                if end_time:
-                    params['end_time'] = end_time
-                
-                # Add any additional filters
-                params.update(filters)
-                
-                logger.debug(f"Fetching calls from: {url} (cursor: {cursor}, params: {params})")
-                
-                response = self.session.get(url, params=params, timeout=self.config.request_timeout)
-                response.raise_for_status()
-                
-                data = response.json()
-                calls = data.get('items', [])
-                all_calls.extend(calls)
-                fetched_count += len(calls)
-                
-                logger.debug(f"Fetched {len(calls)} calls (total: {len(all_calls)})")
-                
-                # Check if we've reached the limit
-                if limit and fetched_count >= limit:
-                    all_calls = all_calls[:limit]  # Trim to exact limit
-                    break
-                
-                # Check for next page
-                cursor = data.get('cursor')
-                if not cursor or not calls:
-                    break
-                    
-                # Safety limit to prevent runaway fetching
-                if len(all_calls) > 10000:
-                    logger.warning(f"Reached safety limit of 10000 calls")
-                    break
+            for call in self.iter_calls(limit=limit, start_time=start_time, end_time=end_time, **filters):
+                all_calls.append(call)
             
             logger.info(f"Total calls fetched: {len(all_calls)}")
             return all_calls
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching calls: {e}")
-            return []
+            logger.error(f"Error fetching calls (keeping {len(all_calls)} fetched): {e}")
+            return all_calls
 
 class EmployeeStatusService:
     """Service for gathering and formatting employee status information"""
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, api: Optional[DialpadAPI] = None):
         self.config = config
-        self.api = DialpadAPI(config)
+        self.api = api or DialpadAPI(config)
     
     def get_employee_status(self) -> Dict[str, Any]:
         """Get comprehensive employee status information"""
@@ -0,0 +1,96 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Optional
+from metrics import RequestMetrics
+
+logger = logging.getLogger(__name__)
+
+class Hedger:
+    """Send a backup request when the first one is slower than usual
+
+    Once ``min_samples`` latencies have been recorded for ``endpoint``, a call
+    that hasn't finished within the observed ``percentile`` latency gets a
+    duplicate request, and whichever succeeds first is returned (the loser is
+    left to finish in the background and its result discarded). At most
+    ``max_rate`` of calls are hedged, so duplicates can't take a meaningful
+    share of the rate limit; they also wait for the same rate limiter as
+    every other request.
+    """
+
+    RECOMPUTE_EVERY = 50
+
+    def __init__(self, metrics: RequestMetrics, endpoint: str, max_rate: float = 0.05,
+                 percentile: float = 0.95, min_samples: int = 20, max_workers: int = 10):
+        self.metrics = metrics
+        self.endpoint = endpoint
+        self.max_rate = max_rate
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._delay: Optional[float] = None
+        self._delay_samples = 0
+        self._lock = threading.Lock()
+        # Primaries and backups both run here while the caller waits, hence twice the workers
+        self._executor = ThreadPoolExecutor(max_workers=max(2, 2 * max_workers), thread_name_prefix='hedge')
+
+    @classmethod
+    def from_config(cls, config, metrics: RequestMetrics, endpoint: str,
+                    max_workers: Optional[int] = None) -> 'Hedger':
+        return cls(metrics, endpoint, config.hedge_max_rate, config.hedge_percentile,
+                   config.hedge_min_samples, max_workers or config.max_workers)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging (None until enough latencies are known)"""
+        samples = self.metrics.sample_count(self.endpoint)
+        with self._lock:
+            if samples < self.min_samples:
+                return None
+            if self._delay is None or samples - self._delay_samples >= self.RECOMPUTE_EVERY:
+                self._delay = self.metrics.latency_percentile(self.endpoint, self.percentile)
+                self._delay_samples = samples
+            return self._delay
+
+    def _take_hedge(self) -> bool:
+        with self._lock:
+            if self.hedged + 1 > self.max_rate * self.calls:
+                return False
+            self.hedged += 1
+            return True
+
+    def call(self, func: Callable[[], Any], backup: Optional[Callable[[], Any]] = None) -> Any:
+        """Run ``func``, racing it against ``backup`` (default: ``func``) if it is slow"""
+        with self._lock:
+            self.calls += 1
+        delay = self.hedge_delay()
+        if delay is None or self.max_rate <= 0:
+            return func()
+
+        primary = self._executor.submit(func)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_hedge():
+            return primary.result()
+
+        logger.debug(f"Hedging {self.endpoint} request after {delay * 1000:.0f}ms")
+        hedge = self._executor.submit(backup or func)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return future.result()
+        # Both failed; report the original request's error
+        return primary.result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'calls': self.calls, 'hedged': self.hedged, 'hedge_wins': self.hedge_wins,
+                    'hedge_delay_ms': round(self._delay * 1000, 1) if self._delay is not None else None}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
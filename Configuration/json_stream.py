@@ -0,0 +1,165 @@
+import re
+import json
+import codecs
+from typing import Dict, Any, Iterable, Iterator, Optional
+import requests
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+class JSONPageDecoder:
+    """Incrementally decode a list-endpoint page like {"items": [...], "cursor": "..."}
+
+    Bytes are fed in as they arrive and each element of the items array is
+    returned as soon as it is complete, so only the element being decoded is
+    buffered rather than the whole body. Every other top-level field (cursor,
+    counts, ...) ends up in ``fields``.
+    """
+
+    def __init__(self, items_keys: Iterable[str] = ('items', 'results')):
+        self.items_keys = set(items_keys)
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._state = 'start'
+        self._key: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> list:
+        """Consume a chunk of the body and return the items completed by it"""
+        self._buffer = self._buffer[self._pos:] + self._text_decoder.decode(chunk)
+        self._pos = 0
+        return self._parse(final=False)
+
+    def close(self) -> list:
+        """Signal the end of the body (raises ValueError if it was truncated or invalid)"""
+        self._buffer = self._buffer[self._pos:] + self._text_decoder.decode(b'', final=True)
+        self._pos = 0
+        items = self._parse(final=True)
+        if not self.done:
+            raise ValueError(f"Incomplete JSON page (stopped in state '{self._state}')")
+        return items
+
+    def _skip_whitespace(self) -> bool:
+        """Advance past whitespace; False if the buffer ran out"""
+        self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+        return self._pos < len(self._buffer)
+
+    def _decode_value(self, final: bool):
+        """Decode the JSON value at the current position, or return (None, False) if it is still incomplete
+
+        A value is only accepted once at least one character follows it, so a
+        number split across chunks ('12' + '3') is never read short.
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return None, False
+        if end >= len(self._buffer) and not final:
+            return None, False
+        self._pos = end
+        return value, True
+
+    def _expect(self, char: str) -> None:
+        if self._buffer[self._pos] != char:
+            raise ValueError(f"Expected '{char}' in JSON page, got '{self._buffer[self._pos]}'")
+        self._pos += 1
+
+    def _parse(self, final: bool) -> list:
+        items = []
+        while not self.done and self._skip_whitespace():
+            char = self._buffer[self._pos]
+            if self._state == 'start':
+                self._expect('{')
+                self._state = 'key'
+            elif self._state == 'key':
+                if char == '}':
+                    self._pos += 1
+                    self.done = True
+                    break
+                key, complete = self._decode_value(final)
+                if not complete:
+                    break
+                self._key = key
+                self._state = 'colon'
+            elif self._state == 'colon':
+                self._expect(':')
+                self._state = 'value'
+            elif self._state == 'value':
+                if self._key in self.items_keys and char == '[':
+                    self._pos += 1
+                    self._state = 'first_item'
+                    continue
+                value, complete = self._decode_value(final)
+                if not complete:
+                    break
+                self.fields[self._key] = value
+                self._state = 'next_key'
+            elif self._state == 'next_key':
+                if char == '}':
+                    self._pos += 1
+                    self.done = True
+                    break
+                self._expect(',')
+                self._state = 'key'
+            elif self._state in ('first_item', 'item'):
+                if self._state == 'first_item' and char == ']':
+                    self._pos += 1
+                    self._state = 'next_key'
+                    continue
+                item, complete = self._decode_value(final)
+                if not complete:
+                    break
+                items.append(item)
+                self._state = 'next_item'
+            elif self._state == 'next_item':
+                if char == ']':
+                    self._pos += 1
+                    self._state = 'next_key'
+                    continue
+                self._expect(',')
+                self._state = 'item'
+        return items
+
+class StreamingPage:
+    """Iterate over the items of a streamed (``stream=True``) list response
+
+    The body is read with ``iter_content`` (which also undoes gzip transfer
+    encoding) and decoded incrementally. ``fields`` fills in as top-level keys
+    are read, so ``cursor`` may be known before the last item is reached if
+    the API sends it first. The response is closed once the body is consumed.
+    """
+
+    def __init__(self, response: requests.Response, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.response = response
+        self.chunk_size = chunk_size
+        self.decoder = JSONPageDecoder()
+        self.count = 0
+
+    @property
+    def fields(self) -> Dict[str, Any]:
+        return self.decoder.fields
+
+    @property
+    def cursor(self) -> Optional[str]:
+        return self.decoder.fields.get('cursor')
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        try:
+            for chunk in self.response.iter_content(chunk_size=self.chunk_size):
+                for item in self.decoder.feed(chunk):
+                    self.count += 1
+                    yield item
+            for item in self.decoder.close():
+                self.count += 1
+                yield item
+        except ValueError as e:
+            raise requests.exceptions.InvalidJSONError(f"Invalid JSON page from {self.response.url}: {e}",
+                                                       response=self.response) from e
+        finally:
+            self.response.close()
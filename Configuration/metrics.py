@@ -0,0 +1,258 @@
+import os
+import math
+import time
+import atexit
+import logging
+import tempfile
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+import serializer
+
+logger = logging.getLogger(__name__)
+
+# Histogram buckets (seconds) for the Prometheus export
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Latency percentiles are taken over this many of each endpoint's most recent requests
+LATENCY_WINDOW = 1000
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class EndpointMetrics:
+    """Counters for one endpoint family
+
+    Latencies are kept as histogram bucket counts (with their sum and max)
+    for the whole run, plus the most recent LATENCY_WINDOW values for
+    percentiles, so memory stays flat however long the process runs.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.statuses = Counter()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        # Count per LATENCY_BUCKETS bucket (not cumulative), the last one for anything slower
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.bytes = 0
+        self.retries = 0
+        self.throttled = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.revalidated = 0
+
+    def add_latency(self, elapsed: float) -> None:
+        self.latencies.append(elapsed)
+        self.latency_buckets[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+        self.latency_sum += elapsed
+        self.latency_max = max(self.latency_max, elapsed)
+
+    def report(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'status_codes': {str(status): count for status, count in sorted(self.statuses.items())},
+            'retries': self.retries,
+            'throttled_429': self.throttled,
+            'response_bytes': self.bytes,
+            'latency_ms': {
+                'p50': round(percentile(latencies, 0.50) * 1000, 1),
+                'p95': round(percentile(latencies, 0.95) * 1000, 1),
+                'p99': round(percentile(latencies, 0.99) * 1000, 1),
+                'max': round(self.latency_max * 1000, 1),
+                'mean': round(self.latency_sum / self.requests * 1000, 1) if self.requests else 0.0,
+            },
+            'cache': {
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'revalidated': self.revalidated,
+                'hit_ratio': round(self.cache_hits / lookups, 3) if lookups else 0.0,
+            },
+        }
+
+class RequestMetrics:
+    """Per-endpoint request instrumentation shared by every API client in the process
+
+    Each HTTP attempt is recorded with its latency, status and size; retries,
+    429s and response cache outcomes are counted separately. The collected
+    numbers can be written as a JSON run report or a Prometheus textfile.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._endpoints: Dict[str, EndpointMetrics] = defaultdict(EndpointMetrics)
+        self._lock = threading.Lock()
+        self._exports_registered = False
+
+    def record_request(self, endpoint: str, elapsed: float, status: Optional[int] = None,
+                       response_bytes: int = 0) -> None:
+        """Record one attempt (``status`` None for a connection error or timeout)"""
+        with self._lock:
+            metrics = self._endpoints[endpoint]
+            metrics.requests += 1
+            metrics.add_latency(elapsed)
+            metrics.bytes += response_bytes
+            if status is None:
+                metrics.errors += 1
+                metrics.statuses['error'] += 1
+            else:
+                metrics.statuses[status] += 1
+                if status == 429:
+                    metrics.throttled += 1
+                elif status >= 500:
+                    metrics.errors += 1
+
+    def record_retry(self, endpoint: str) -> None:
+        with self._lock:
+            self._endpoints[endpoint].retries += 1
+
+    def record_cache(self, endpoint: str, hit: bool, revalidated: bool = False) -> None:
+        with self._lock:
+            metrics = self._endpoints[endpoint]
+            if hit:
+                metrics.cache_hits += 1
+            else:
+                metrics.cache_misses += 1
+            if revalidated:
+                metrics.revalidated += 1
+
+    def sample_count(self, endpoint: str) -> int:
+        with self._lock:
+            metrics = self._endpoints.get(endpoint)
+            return metrics.requests if metrics else 0
+
+    def latency_percentile(self, endpoint: str, fraction: float) -> float:
+        """Latency percentile (seconds) over one endpoint family's most recent requests"""
+        with self._lock:
+            metrics = self._endpoints.get(endpoint)
+            latencies = list(metrics.latencies) if metrics else []
+        return percentile(sorted(latencies), fraction)
+
+    def report(self) -> Dict[str, Any]:
+        """JSON-serializable run report with per-endpoint and total figures"""
+        with self._lock:
+            endpoints = {name: metrics.report() for name, metrics in sorted(self._endpoints.items())}
+            latencies = sorted(latency for metrics in self._endpoints.values() for latency in metrics.latencies)
+        totals = {key: sum(endpoint[key] for endpoint in endpoints.values())
+                  for key in ('requests', 'errors', 'retries', 'throttled_429', 'response_bytes')}
+        hits = sum(endpoint['cache']['hits'] for endpoint in endpoints.values())
+        lookups = hits + sum(endpoint['cache']['misses'] for endpoint in endpoints.values())
+        totals['cache_hit_ratio'] = round(hits / lookups, 3) if lookups else 0.0
+        totals['latency_ms'] = {'p50': round(percentile(latencies, 0.50) * 1000, 1),
+                                'p95': round(percentile(latencies, 0.95) * 1000, 1),
+                                'p99': round(percentile(latencies, 0.99) * 1000, 1)}
+        return {
+            'started': datetime.fromtimestamp(self.started).isoformat(),
+            'duration_seconds': round(time.time() - self.started, 3),
+            'totals': totals,
+            'endpoints': endpoints,
+        }
+
+    def prometheus(self, job: str = 'dialpad') -> str:
+        """Render the metrics in Prometheus text exposition format"""
+        with self._lock:
+            snapshot = {name: (metrics.report(), (list(metrics.latency_buckets), metrics.latency_sum,
+                                                  sorted(metrics.latencies)))
+                        for name, metrics in sorted(self._endpoints.items())}
+        lines = [
+            '# HELP dialpad_api_requests_total HTTP requests sent to the Dialpad API (including retries).',
+            '# TYPE dialpad_api_requests_total counter',
+        ]
+        for name, (report, _) in snapshot.items():
+            for status, count in report['status_codes'].items():
+                lines.append(f'dialpad_api_requests_total{{job="{job}",endpoint="{name}",status="{status}"}} {count}')
+
+        lines += ['# HELP dialpad_api_request_duration_seconds Dialpad API request latency.',
+                  '# TYPE dialpad_api_request_duration_seconds histogram']
+        for name, (_, (buckets, latency_sum, _)) in snapshot.items():
+            labels = f'job="{job}",endpoint="{name}"'
+            count = 0
+            for bucket, bucket_count in zip(LATENCY_BUCKETS, buckets):
+                count += bucket_count
+                lines.append(f'dialpad_api_request_duration_seconds_bucket{{{labels},le="{bucket}"}} {count}')
+            count += buckets[-1]
+            lines.append(f'dialpad_api_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'dialpad_api_request_duration_seconds_sum{{{labels}}} {latency_sum:.6f}')
+            lines.append(f'dialpad_api_request_duration_seconds_count{{{labels}}} {count}')
+
+        lines += [f'# HELP dialpad_api_request_latency_seconds Dialpad API latency percentiles over the last '
+                  f'{LATENCY_WINDOW} requests.',
+                  '# TYPE dialpad_api_request_latency_seconds gauge']
+        for name, (_, (_, _, latencies)) in snapshot.items():
+            for quantile in (0.5, 0.95, 0.99):
+                lines.append(f'dialpad_api_request_latency_seconds{{job="{job}",endpoint="{name}",'
+                             f'quantile="{quantile}"}} {percentile(latencies, quantile):.6f}')
+
+        counters = [
+            ('dialpad_api_response_bytes_total', 'Response bytes received from the Dialpad API.',
+             lambda report: report['response_bytes']),
+            ('dialpad_api_retries_total', 'Dialpad API requests retried after an error or 429.',
+             lambda report: report['retries']),
+            ('dialpad_api_throttled_total', 'Dialpad API responses with status 429.',
+             lambda report: report['throttled_429']),
+            ('dialpad_api_cache_hits_total', 'Responses served from the response cache.',
+             lambda report: report['cache']['hits']),
+            ('dialpad_api_cache_misses_total', 'Cacheable requests that needed a full response.',
+             lambda report: report['cache']['misses']),
+        ]
+        for metric, help_text, value in counters:
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+            for name, (report, _) in snapshot.items():
+                lines.append(f'{metric}{{job="{job}",endpoint="{name}"}} {value(report)}')
+
+        lines += ['# HELP dialpad_run_timestamp_seconds When the last run finished.',
+                  '# TYPE dialpad_run_timestamp_seconds gauge',
+                  f'dialpad_run_timestamp_seconds{{job="{job}"}} {time.time():.3f}',
+                  '# HELP dialpad_run_duration_seconds Wall time of the last run.',
+                  '# TYPE dialpad_run_duration_seconds gauge',
+                  f'dialpad_run_duration_seconds{{job="{job}"}} {time.time() - self.started:.3f}']
+        return '\n'.join(lines) + '\n'
+
+    def write_report(self, path: Path) -> None:
+        _atomic_write(Path(path), serializer.dumps(self.report(), indent=True))
+        logger.info(f"Wrote API metrics report to {path}")
+
+    def write_prometheus(self, path: Path, job: str = 'dialpad') -> None:
+        # The node exporter textfile collector must never see a half-written file
+        _atomic_write(Path(path), self.prometheus(job).encode('utf-8'))
+        logger.info(f"Wrote Prometheus metrics to {path}")
+
+    def export_at_exit(self, config) -> None:
+        """Write the configured report files when the process exits (registered once)"""
+        if not (config.metrics_report or config.metrics_prometheus_file):
+            return
+        with self._lock:
+            if self._exports_registered:
+                return
+            self._exports_registered = True
+
+        def export():
+            try:
+                if config.metrics_report:
+                    self.write_report(config.metrics_report)
+                if config.metrics_prometheus_file:
+                    self.write_prometheus(config.metrics_prometheus_file, config.metrics_job)
+            except OSError as e:
+                logger.error(f"Could not write API metrics: {e}")
+        atexit.register(export)
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+# Shared by every DialpadAPI / AsyncDialpadAPI in the process, so one run produces one report
+request_metrics = RequestMetrics()
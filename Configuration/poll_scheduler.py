@@ -0,0 +1,183 @@
+import re
+import time
+import random
+import logging
+from collections import deque
+from datetime import datetime, time as dt_time
+from typing import Dict, Any, Optional, Iterable, Set, NamedTuple, FrozenSet
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+logger = logging.getLogger(__name__)
+
+# Duty statuses of agents who are taking or wrapping up calls
+ACTIVE_STATUSES = {'available', 'busy', 'wrapup', 'on_call', 'ringing'}
+
+_DAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+_TIME = r'(\d{1,2})(?::?(\d{2}))?\s*(am|pm)?'
+_RANGE = re.compile(rf'{_TIME}\s*(?:-|–|to)\s*{_TIME}')
+_DAY_RANGE = re.compile(r'\b(mon|tue|wed|thu|fri|sat|sun)[a-z]*\s*(?:-|–|to)\s*(mon|tue|wed|thu|fri|sat|sun)[a-z]*\b')
+_DAY = re.compile(r'\b(mon|tue|wed|thu|fri|sat|sun)[a-z]*\b')
+
+class Shift(NamedTuple):
+    """Working hours parsed from the `shift` column"""
+    start: dt_time
+    end: dt_time
+    days: FrozenSet[int]  # Weekday numbers (Monday is 0); all days if none were given
+
+    def contains(self, moment: datetime) -> bool:
+        now = moment.time()
+        if self.start <= self.end:
+            return moment.weekday() in self.days and self.start <= now < self.end
+        # Overnight shift: the part after midnight belongs to the previous day's shift
+        if now >= self.start:
+            return moment.weekday() in self.days
+        return now < self.end and (moment.weekday() - 1) % 7 in self.days
+
+def _parse_time(hour: str, minute: Optional[str], meridiem: Optional[str]) -> Optional[dt_time]:
+    hour, minute = int(hour), int(minute or 0)
+    if minute > 59:
+        return None
+    if meridiem == 'pm' and hour < 12:
+        hour += 12
+    elif meridiem == 'am' and hour == 12:
+        hour = 0
+    if hour == 24 and minute == 0:
+        return dt_time(23, 59, 59)
+    return dt_time(hour, minute) if hour < 24 else None
+
+def parse_shift(text: str) -> Optional[Shift]:
+    """Parse shift hours such as '08:00-17:00', '8am-5pm', 'Mon-Fri 0700-1530' or '22:00-06:00'
+
+    Returns None when no time range can be found.
+    """
+    text = (text or '').strip().lower()
+    match = _RANGE.search(text)
+    if not match:
+        return None
+    start = _parse_time(*match.group(1, 2, 3))
+    end = _parse_time(*match.group(4, 5, 6))
+    if start is None or end is None or start == end:
+        return None
+
+    days: Set[int] = set()
+    if 'weekday' in text:
+        days.update(range(5))
+    if 'weekend' in text:
+        days.update((5, 6))
+    remaining = text
+    for day_range in _DAY_RANGE.finditer(text):
+        first, last = _DAYS.index(day_range.group(1)), _DAYS.index(day_range.group(2))
+        days.update(day % 7 for day in range(first, first + (last - first) % 7 + 1))
+        remaining = remaining.replace(day_range.group(0), ' ')
+    days.update(_DAYS.index(day.group(1)) for day in _DAY.finditer(remaining))
+    return Shift(start, end, frozenset(days or range(7)))
+
+class _UserSchedule:
+    __slots__ = ('next_poll', 'status', 'changes', 'interval')
+
+    def __init__(self):
+        self.next_poll = 0.0
+        self.status: Optional[tuple] = None
+        self.changes: deque = deque()
+        self.interval = 0.0
+
+class PollScheduler:
+    """Decides which users are due for a status poll
+
+    A user's poll interval starts at ``on_shift_interval`` and shrinks with the
+    number of duty status changes seen in the last ``change_window`` seconds,
+    down to ``min_interval`` right after a change. Agents in an active status
+    (available, busy, wrapup) are polled at least twice as often as idle
+    ones. Users outside the shift hours in their `shift` column (in their own
+    timezone) who aren't available are polled every ``off_shift_interval``.
+    Users without parseable shift hours are treated as on shift.
+    """
+
+    def __init__(self, min_interval: float = 5.0, on_shift_interval: float = 60.0,
+                 off_shift_interval: float = 300.0, change_window: float = 3600.0, jitter: float = 0.1):
+        self.min_interval = min_interval
+        self.on_shift_interval = max(min_interval, on_shift_interval)
+        self.off_shift_interval = max(self.on_shift_interval, off_shift_interval)
+        self.change_window = change_window
+        self.jitter = jitter
+        self._users: Dict[str, _UserSchedule] = {}
+        self._shifts: Dict[str, Optional[Shift]] = {}
+        self._timezones: Dict[str, Any] = {}
+
+    @classmethod
+    def from_config(cls, config) -> 'PollScheduler':
+        return cls(config.poll_min_interval, config.poll_on_shift_interval, config.poll_off_shift_interval)
+
+    def due(self, user_ids: Iterable[str], now: Optional[float] = None) -> Set[str]:
+        """User IDs whose next poll time has come (users never polled are always due)"""
+        now = time.monotonic() if now is None else now
+        return {user_id for user_id in user_ids
+                if user_id not in self._users or self._users[user_id].next_poll <= now}
+
+    def record(self, user_id: str, status: Dict[str, Any], profile: Optional[Dict[str, Any]] = None,
+               now: Optional[float] = None) -> float:
+        """Record a poll result and schedule the user's next poll; returns the interval used"""
+        now = time.monotonic() if now is None else now
+        schedule = self._users.get(user_id)
+        if schedule is None:
+            schedule = self._users[user_id] = _UserSchedule()
+
+        duty_status = status.get('on_duty_status', 'unknown')
+        current = (duty_status, status.get('duty_status_reason', ''), bool(status.get('do_not_disturb')))
+        changed = schedule.status is not None and status and current != schedule.status
+        if status:
+            schedule.status = current
+        if changed:
+            schedule.changes.append(now)
+        while schedule.changes and schedule.changes[0] < now - self.change_window:
+            schedule.changes.popleft()
+
+        if changed:
+            interval = self.min_interval
+        elif duty_status != 'available' and not self._on_shift(profile or {}):
+            interval = self.off_shift_interval
+        else:
+            interval = self.on_shift_interval / (1 + len(schedule.changes))
+            if duty_status in ACTIVE_STATUSES:
+                interval /= 2
+        interval = min(self.off_shift_interval, max(self.min_interval, interval))
+        schedule.interval = interval
+        schedule.next_poll = now + interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        return interval
+
+    def _on_shift(self, profile: Dict[str, Any]) -> bool:
+        text = profile.get('shift', '') or ''
+        if text not in self._shifts:
+            self._shifts[text] = parse_shift(text)
+            if text and self._shifts[text] is None:
+                logger.debug(f"Could not parse shift '{text}', treating as always on shift")
+        shift = self._shifts[text]
+        if shift is None:
+            return True
+        return shift.contains(datetime.now(self._timezone(profile.get('timezone', ''))))
+
+    def _timezone(self, name: str):
+        if name not in self._timezones:
+            zone = None
+            if name and ZoneInfo is not None:
+                try:
+                    zone = ZoneInfo(name)
+                except (ZoneInfoNotFoundError, ValueError):
+                    logger.debug(f"Unknown timezone '{name}', using local time for shift hours")
+            self._timezones[name] = zone
+        return self._timezones[name]
+
+    def stats(self) -> Dict[str, Any]:
+        intervals = [schedule.interval for schedule in self._users.values()]
+        if not intervals:
+            return {'users': 0}
+        return {
+            'users': len(intervals),
+            'polls_per_minute': round(sum(60 / interval for interval in intervals), 1),
+            'at_min_interval': sum(1 for interval in intervals if interval <= self.min_interval),
+            'off_shift': sum(1 for interval in intervals if interval >= self.off_shift_interval),
+        }
@@ -0,0 +1,332 @@
+import time
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Mapping
+from urllib.parse import urlparse
+import requests
+from retry import RetryPolicy
+from response_cache import ResponseCache
+from circuit_breaker import CircuitBreakers, CircuitOpenError
+from metrics import RequestMetrics
+from deadline import Deadline, DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of blocking
+
+    Tokens may go negative: each reservation returns how long the caller has
+    to wait for its token, so concurrent callers queue up fairly.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.configured_rate = rate_per_minute / 60.0
+        self.rate = self.configured_rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def reserve(self, now: float) -> float:
+        """Take one token and return the delay (seconds) before it may be used"""
+        if self.configured_rate <= 0:
+            return 0.0
+        self._refill(now)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def set_factor(self, factor: float, now: float) -> None:
+        """Scale the refill rate relative to the configured rate"""
+        self._refill(now)
+        self.rate = self.configured_rate * factor
+
+class RateLimiter:
+    """Thread-safe, adaptive rate limiter with one token bucket per endpoint family
+
+    The endpoint family is the first path segment below the API base URL
+    (``users``, ``call``, ``callcenters``...). A 429 pauses the whole client for
+    ``Retry-After`` seconds and halves every bucket's rate; successful
+    responses slowly restore the configured rate.
+    """
+
+    MIN_FACTOR = 0.1
+    RECOVERY_STEP = 0.02
+    DEFAULT_RETRY_AFTER = 1.0
+
+    def __init__(self, rate_per_minute: int, burst: int, endpoint_limits: Optional[Mapping[str, int]] = None,
+                 base_url: str = ''):
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self.endpoint_limits = dict(endpoint_limits or {})
+        self.base_path = urlparse(base_url).path.rstrip('/')
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._factor = 1.0
+        self.throttled_count = 0
+
+    @classmethod
+    def from_config(cls, config) -> 'RateLimiter':
+        return cls(config.rate_limit_per_minute, config.rate_limit_burst,
+                   config.endpoint_rate_limits, config.api_base_url)
+
+    def endpoint_key(self, url: str) -> str:
+        """Return the endpoint family for a full request URL"""
+        path = urlparse(url).path
+        if self.base_path and path.startswith(self.base_path):
+            path = path[len(self.base_path):]
+        segments = [segment for segment in path.split('/') if segment]
+        return segments[0] if segments else ''
+
+    def _bucket(self, key: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.endpoint_limits.get(key, self.rate_per_minute), self.burst)
+            bucket.set_factor(self._factor, now)
+            self._buckets[key] = bucket
+        return bucket
+
+    def reserve(self, key: str) -> float:
+        """Reserve a request slot for an endpoint and return the seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            pause = max(0.0, self._paused_until - now)
+            return max(pause, self._bucket(key, now).reserve(now))
+
+    def _set_factor(self, factor: float, now: float) -> None:
+        self._factor = factor
+        for bucket in self._buckets.values():
+            bucket.set_factor(factor, now)
+
+    def update(self, key: str, status_code: int, headers: Mapping[str, str]) -> Optional[float]:
+        """Adapt to a response; returns the Retry-After delay for 429 responses"""
+        with self._lock:
+            now = time.monotonic()
+            if status_code == 429:
+                retry_after = parse_retry_after(headers.get('Retry-After'))
+                if retry_after is None:
+                    retry_after = self.DEFAULT_RETRY_AFTER
+                self._paused_until = max(self._paused_until, now + retry_after)
+                self._set_factor(max(self.MIN_FACTOR, self._factor / 2), now)
+                self.throttled_count += 1
+                logger.warning(f"Rate limited on '{key}', pausing {retry_after:.1f}s "
+                               f"(rate now {self._factor:.0%} of configured)")
+                return retry_after
+
+            remaining = _header_number(headers, 'X-RateLimit-Remaining', 'RateLimit-Remaining')
+            reset = _header_number(headers, 'X-RateLimit-Reset', 'RateLimit-Reset')
+            if remaining is not None and remaining <= 0 and reset is not None:
+                # Reset may be an epoch timestamp or a number of seconds
+                delay = reset - time.time() if reset > 1e9 else reset
+                if delay > 0:
+                    self._paused_until = max(self._paused_until, now + delay)
+                    logger.debug(f"Rate limit quota exhausted, pausing {delay:.1f}s")
+
+            if self._factor < 1.0 and status_code < 400:
+                self._set_factor(min(1.0, self._factor + self.RECOVERY_STEP), now)
+            return None
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given as seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _header_number(headers: Mapping[str, str], *names: str) -> Optional[float]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
+
+class RateLimitedSession(requests.Session):
+    """requests.Session that waits for the shared rate limiter and retries failures
+
+    429 responses are retried after their Retry-After delay. Idempotent
+    requests are also retried on connection errors, timeouts and transient
+    5xx responses according to ``retry_policy``. With a ``response_cache``,
+    fresh cached GETs are served without a request, and other cacheable GETs
+    are sent as conditional requests with a 304 answered from the cache.
+    With ``circuit_breakers``, requests to an endpoint family whose circuit is
+    open raise CircuitOpenError immediately. With ``metrics``, every attempt,
+    retry and cache outcome is recorded per endpoint family. Setting
+    ``deadline`` clips every timeout to the time left and raises
+    DeadlineExceeded instead of sleeping past it.
+    """
+
+    def __init__(self, rate_limiter: RateLimiter, max_retries: int = 5, retry_policy: Optional[RetryPolicy] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 circuit_breakers: Optional[CircuitBreakers] = None,
+                 metrics: Optional[RequestMetrics] = None):
+        super().__init__()
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=0)
+        self.response_cache = response_cache
+        self.circuit_breakers = circuit_breakers
+        self.metrics = metrics
+        self.deadline: Optional[Deadline] = None
+
+    def request(self, method, url, *args, **kwargs):
+        key = self.rate_limiter.endpoint_key(url)
+        cache = self.response_cache
+        if cache is None or method.upper() != 'GET':
+            return self._send(key, method, url, *args, **kwargs)
+
+        full_url = requests.Request(method, url, params=kwargs.get('params')).prepare().url
+        ttl = cache.ttl_for(full_url)
+        conditional = cache.is_conditional(key)
+        if ttl is None and not conditional:
+            return self._send(key, method, url, *args, **kwargs)
+
+        entry = cache.get(full_url)
+        if entry is not None and cache.is_fresh(entry, ttl):
+            cache.record(hit=True)
+            if self.metrics is not None:
+                self.metrics.record_cache(key, hit=True)
+            logger.debug(f"Serving {full_url} from response cache")
+            return cache.build_response(entry)
+
+        if entry is not None and conditional:
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), **cache.conditional_headers(entry)}
+
+        response = self._send(key, method, url, *args, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            logger.debug(f"Not modified, serving cached body for {full_url}")
+            cache.refresh(full_url, entry)
+            if self.metrics is not None:
+                self.metrics.record_cache(key, hit=True, revalidated=True)
+            response.close()
+            return cache.build_response(entry, response)
+
+        cache.record(hit=False)
+        if self.metrics is not None:
+            self.metrics.record_cache(key, hit=False)
+        if response.status_code == 200:
+            cache.store(full_url, response, require_validator=ttl is None)
+        return response
+
+    def _send(self, key, method, url, *args, **kwargs):
+        retryable = self.retry_policy.is_retryable_method(method)
+        breaker = self.circuit_breakers.get(key) if self.circuit_breakers else None
+        throttled_attempts = 0
+        failed_attempts = 0
+        while True:
+            try:
+                response = self._attempt(key, breaker, method, url, *args, **kwargs)
+            except DeadlineExceeded:
+                raise
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if not retryable or failed_attempts >= self.retry_policy.max_retries:
+                    raise
+                failed_attempts += 1
+                self._record_retry(key)
+                backoff = self.retry_policy.backoff(failed_attempts)
+                logger.debug(f"Retrying {url} in {backoff:.2f}s after {type(e).__name__} "
+                             f"(attempt {failed_attempts}/{self.retry_policy.max_retries})")
+                self._sleep(backoff, url)
+                continue
+
+            if response.status_code == 429 and throttled_attempts < self.max_retries:
+                throttled_attempts += 1
+                self._record_retry(key)
+                response.close()
+                logger.debug(f"Retrying {url} after 429 (attempt {throttled_attempts}/{self.max_retries})")
+                continue
+
+            if (retryable and self.retry_policy.is_retryable_status(response.status_code)
+                    and failed_attempts < self.retry_policy.max_retries):
+                failed_attempts += 1
+                self._record_retry(key)
+                response.close()
+                backoff = self.retry_policy.backoff(failed_attempts)
+                logger.debug(f"Retrying {url} in {backoff:.2f}s after HTTP {response.status_code} "
+                             f"(attempt {failed_attempts}/{self.retry_policy.max_retries})")
+                self._sleep(backoff, url)
+                continue
+
+            return response
+
+    def _attempt(self, key, breaker, method, url, *args, **kwargs):
+        """Send one attempt and record its outcome on the circuit breaker
+
+        The rate limit wait and deadline check come before the breaker is
+        asked, so they can't strand a half-open probe; an attempt that ends
+        without an outcome (a timeout cut short by the deadline, or an
+        interrupt) releases the probe instead.
+        """
+        delay = self.rate_limiter.reserve(key)
+        if delay > 0:
+            self._sleep(delay, url)
+        if self.deadline is not None:
+            self.deadline.check(url)
+            kwargs['timeout'] = self.deadline.clip_timeout(kwargs.get('timeout'))
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError(f"Circuit for {key} is open, not requesting {url}")
+
+        recorded = False
+        started = time.monotonic()
+        try:
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except requests.exceptions.RequestException as e:
+                if self.metrics is not None:
+                    self.metrics.record_request(key, time.monotonic() - started)
+                # A timeout cut short by the deadline says nothing about the endpoint's health
+                if breaker is not None and not (self.deadline is not None and self.deadline.expired()):
+                    breaker.record_failure(type(e).__name__)
+                    recorded = True
+                raise
+
+            if self.metrics is not None:
+                self.metrics.record_request(key, time.monotonic() - started, response.status_code,
+                                            _response_bytes(response))
+            self.rate_limiter.update(key, response.status_code, response.headers)
+            if breaker is not None:
+                # Only server-side failures count; 429 and 4xx mean the endpoint is responding
+                if response.status_code >= 500:
+                    breaker.record_failure(f"HTTP {response.status_code}")
+                else:
+                    breaker.record_success(time.monotonic() - started)
+                recorded = True
+            return response
+        finally:
+            if breaker is not None and not recorded:
+                breaker.release()
+
+    def _sleep(self, seconds: float, url: str) -> None:
+        if self.deadline is not None and seconds >= self.deadline.remaining():
+            self.deadline.hit = True
+            raise DeadlineExceeded(f"Deadline of {self.deadline.seconds:g}s would pass before requesting {url}")
+        time.sleep(seconds)
+
+    def _record_retry(self, key: str) -> None:
+        if self.metrics is not None:
+            self.metrics.record_retry(key)
+
+def _response_bytes(response: requests.Response) -> int:
+    """Body size on the wire, without reading a streamed body"""
+    length = response.headers.get('Content-Length')
+    if length is not None and length.isdigit():
+        return int(length)
+    if response._content_consumed and response._content:
+        return len(response._content)
+    return 0
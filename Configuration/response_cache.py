@@ -0,0 +1,219 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Any, Optional, Iterable, Mapping
+from urllib.parse import urlparse
+import requests
+import serializer
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """On-disk cache of GET responses keyed by full URL (including query string)
+
+    Two policies can apply to an endpoint:
+
+    * conditional: the entry keeps its ETag / Last-Modified validators, the
+      session revalidates with a conditional request and a 304 is served from
+      the stored body.
+    * TTL: an entry younger than the endpoint's TTL is served without touching
+      the network at all.
+
+    Conditional endpoints are matched on the endpoint family (``offices``
+    covers ``offices/`` and ``offices/{id}/``); TTLs are matched on the route
+    with numeric IDs replaced by ``{id}`` (``users`` is the user list,
+    ``users/{id}`` a single user). Keys also include ``credentials`` (hashed),
+    so a different API token never reads another token's entries. The cache
+    directory is capped at ``max_bytes`` by evicting least recently used
+    entries.
+    """
+
+    def __init__(self, cache_dir: Path, conditional_endpoints: Iterable[str] = (),
+                 ttls: Optional[Mapping[str, float]] = None, max_bytes: int = 100 * 1024 * 1024,
+                 base_url: str = '', credentials: Optional[str] = None):
+        self.cache_dir = Path(cache_dir)
+        self.conditional_endpoints = {endpoint.strip('/') for endpoint in conditional_endpoints}
+        self.ttls = {route.strip('/'): ttl for route, ttl in (ttls or {}).items()}
+        self.max_bytes = max_bytes
+        self.base_path = urlparse(base_url).path.rstrip('/')
+        self.scope = hashlib.sha256((credentials or '').encode('utf-8')).hexdigest()[:16]
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_config(cls, config) -> Optional['ResponseCache']:
+        conditional = config.conditional_cache_endpoints if config.conditional_cache else []
+        ttls = config.response_cache_ttls if config.response_cache else {}
+        if not conditional and not ttls:
+            return None
+        return cls(config.http_cache_dir, conditional, ttls,
+                   config.response_cache_max_mb * 1024 * 1024, config.api_base_url, config.bearer_token)
+
+    def route(self, url: str) -> str:
+        """Route template for a URL, e.g. 'users/{id}' for .../users/123/"""
+        path = urlparse(url).path
+        if self.base_path and path.startswith(self.base_path):
+            path = path[len(self.base_path):]
+        segments = [segment for segment in path.split('/') if segment]
+        return '/'.join('{id}' if re.fullmatch(r'\d+', segment) else segment for segment in segments)
+
+    def ttl_for(self, url: str) -> Optional[float]:
+        return self.ttls.get(self.route(url))
+
+    def is_conditional(self, endpoint_key: str) -> bool:
+        return endpoint_key in self.conditional_endpoints
+
+    def _path(self, url: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha1(f'{self.scope} {url}'.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the stored entry for a URL, or None"""
+        path = self._path(url)
+        try:
+            entry = serializer.load(path)
+            # Access time drives LRU eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, *serializer.DECODE_ERRORS) as e:
+            logger.debug(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+        return entry if entry.get('url') == url and entry.get('scope') == self.scope else None
+
+    @staticmethod
+    def is_fresh(entry: Dict[str, Any], ttl: Optional[float]) -> bool:
+        return bool(ttl) and time.time() - entry.get('stored_at', 0) < ttl
+
+    def conditional_headers(self, entry: Dict[str, Any]) -> Dict[str, str]:
+        """Validator headers for revalidating a stored entry"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def store(self, url: str, response: requests.Response, require_validator: bool = True) -> None:
+        """Store a 200 response (only if it carries a validator, unless told otherwise)"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if require_validator and not etag and not last_modified:
+            return
+
+        entry = {
+            'url': url,
+            'scope': self.scope,
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_type': response.headers.get('Content-Type', 'application/json'),
+            'stored_at': time.time(),
+            'body': response.content.decode(response.encoding or 'utf-8'),
+        }
+        self._write(self._path(url), entry)
+
+    def refresh(self, url: str, entry: Dict[str, Any]) -> None:
+        """Restart an entry's TTL after the server confirmed it is unchanged"""
+        entry['stored_at'] = time.time()
+        self._write(self._path(url), entry)
+
+    def _write(self, path: Path, entry: Dict[str, Any]) -> None:
+        """Atomically write an entry so concurrent readers never see partial files"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(serializer.dumps(entry))
+            size = os.path.getsize(tmp_path)
+            try:
+                # An overwritten entry no longer counts towards the cache size
+                size -= path.stat().st_size
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug(f"Could not write cache entry {path}: {e}")
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        for path in self.cache_dir.glob('*.json'):
+            try:
+                yield path, path.stat()
+            except OSError:
+                continue
+
+    def _scan_size(self) -> int:
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache is under 90% of its cap"""
+        entries = sorted(self._entries(), key=lambda item: item[1].st_mtime)
+        size = sum(stat.st_size for _, stat in entries)
+        target = self.max_bytes * 0.9
+        for path, stat in entries:
+            if size <= target:
+                break
+            try:
+                path.unlink()
+                size -= stat.st_size
+                self.evictions += 1
+            except OSError:
+                continue
+        self._size = size
+        logger.debug(f"Evicted response cache entries, size now {size / 1024 / 1024:.1f} MB")
+
+    def build_response(self, entry: Dict[str, Any], not_modified: Optional[requests.Response] = None) -> requests.Response:
+        """Build a 200 response from a cached entry (for a fresh hit or a 304)"""
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response._content = entry['body'].encode('utf-8')
+        # Lets iter_content() replay the body for streaming callers
+        response._content_consumed = True
+        response.encoding = 'utf-8'
+        response.url = entry['url']
+        response.elapsed = timedelta(0)
+        if not_modified is not None:
+            with self._lock:
+                self.revalidated += 1
+            response.request = not_modified.request
+            response.elapsed = not_modified.elapsed
+            response.headers.update(not_modified.headers)
+        response.headers['Content-Type'] = entry['content_type']
+        response.headers['Content-Length'] = str(len(response._content))
+        response.from_cache = True
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidated': self.revalidated,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+        }
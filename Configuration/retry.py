@@ -0,0 +1,34 @@
+import random
+from typing import Optional
+
+class RetryPolicy:
+    """Capped exponential backoff with full jitter for idempotent requests
+
+    Only safe methods are retried, and only on connection errors, timeouts and
+    transient 5xx responses. 429s are handled separately by the rate limiter.
+    """
+
+    RETRY_STATUSES = frozenset({500, 502, 503, 504})
+    IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+    def __init__(self, max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 10.0):
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    @classmethod
+    def from_config(cls, config, max_retries: Optional[int] = None) -> 'RetryPolicy':
+        if max_retries is None:
+            max_retries = config.retry_max_attempts
+        return cls(max_retries, config.retry_backoff_base, config.retry_backoff_max)
+
+    def is_retryable_method(self, method: str) -> bool:
+        return method.upper() in self.IDEMPOTENT_METHODS
+
+    def is_retryable_status(self, status_code: int) -> bool:
+        return status_code in self.RETRY_STATUSES
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number ``attempt`` (1-based), using full jitter"""
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
@@ -0,0 +1,106 @@
+import gc
+import json
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, NamedTuple, Optional, Union
+import requests
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+logger = logging.getLogger(__name__)
+
+# Exceptions raised on malformed input by any backend
+DECODE_ERRORS = (ValueError, msgspec.DecodeError) if msgspec is not None else (ValueError,)
+
+class JSONBackend(NamedTuple):
+    """A JSON implementation: loads(bytes | str) and dumps(obj, indent) -> bytes"""
+    name: str
+    loads: Callable[[Union[bytes, str]], Any]
+    dumps: Callable[[Any, bool], bytes]
+
+def _stdlib_dumps(obj: Any, indent: bool = False) -> bytes:
+    return json.dumps(obj, indent=2 if indent else None, default=str).encode('utf-8')
+
+def _orjson_dumps(obj: Any, indent: bool = False) -> bytes:
+    # Pass datetimes to default=str so output matches the stdlib backend
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(obj, default=str, option=option)
+
+def _msgspec_dumps(obj: Any, indent: bool = False) -> bytes:
+    data = _msgspec_encoder.encode(obj)
+    return msgspec.json.format(data, indent=2) if indent else data
+
+def available_backends() -> Dict[str, JSONBackend]:
+    """Installed backends, fastest first"""
+    backends = {}
+    if orjson is not None:
+        backends['orjson'] = JSONBackend('orjson', orjson.loads, _orjson_dumps)
+    if msgspec is not None:
+        backends['msgspec'] = JSONBackend('msgspec', msgspec.json.decode, _msgspec_dumps)
+    backends['json'] = JSONBackend('json', json.loads, _stdlib_dumps)
+    return backends
+
+_msgspec_encoder = msgspec.json.Encoder(enc_hook=str) if msgspec is not None else None
+backend = next(iter(available_backends().values()))
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode JSON from bytes (preferred, avoids a text copy) or str"""
+    return backend.loads(data)
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Encode to UTF-8 JSON bytes; unknown types are written with str()"""
+    return backend.dumps(obj, indent)
+
+def load(path: Union[str, Path]) -> Any:
+    """Read and decode a JSON file"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    # Decoding a large cache allocates millions of containers; pausing the
+    # cyclic GC avoids repeated collections over objects that cannot be cycles yet
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return loads(data)
+    finally:
+        if enabled:
+            gc.enable()
+
+def dump(obj: Any, path: Union[str, Path], indent: bool = True) -> None:
+    """Encode and write a JSON file (2-space indented by default)"""
+    with open(path, 'wb') as f:
+        f.write(dumps(obj, indent))
+
+def response_json(response: requests.Response) -> Any:
+    """Decode a response body straight from its bytes
+
+    Raises requests.exceptions.InvalidJSONError (a RequestException) on a
+    malformed body, like response.json().
+    """
+    try:
+        return loads(response.content)
+    except DECODE_ERRORS as e:
+        raise requests.exceptions.InvalidJSONError(f"Invalid JSON from {response.url}: {e}",
+                                                   response=response) from e
+
+def set_backend(name: Optional[str]) -> JSONBackend:
+    """Switch to a named backend ('orjson', 'msgspec', 'json'; None for the fastest installed)"""
+    global backend
+    backends = available_backends()
+    if name is None:
+        backend = next(iter(backends.values()))
+    elif name in backends:
+        backend = backends[name]
+    else:
+        raise ValueError(f"JSON backend '{name}' is not installed (available: {', '.join(backends)})")
+    logger.debug(f"Using {backend.name} for JSON")
+    return backend
@@ -0,0 +1,129 @@
+import os
+import time
+import logging
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterator, Optional, Tuple
+import serializer
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+def _try_lock(f) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def _unlock(f) -> None:
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+@contextmanager
+def file_lock(path: Path, timeout: float) -> Iterator[bool]:
+    """Hold an exclusive lock on ``path`` across processes; yields False if it wasn't acquired in time
+
+    The lock is released by the OS if the holder dies, so a crashed run can't
+    leave it stuck.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a+') as f:
+        give_up = time.monotonic() + timeout
+        locked = _try_lock(f)
+        while not locked and time.monotonic() < give_up:
+            time.sleep(0.05)
+            locked = _try_lock(f)
+        try:
+            yield locked
+        finally:
+            if locked:
+                _unlock(f)
+
+class StatusSnapshotCache:
+    """Status of every user from one fetch, shared by runs within ``ttl`` seconds
+
+    A run finding a snapshot younger than the TTL (for the same API, office
+    and users cache) uses it without calling the API. Otherwise it takes the
+    snapshot lock, checks again in case another run fetched while it waited,
+    and only then fetches and writes a new snapshot. Runs started together
+    therefore share one fetch instead of each polling every user.
+    """
+
+    def __init__(self, path: Path, ttl: float, lock_timeout: float = 300):
+        self.path = Path(path)
+        self.lock_path = self.path.with_suffix('.lock')
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+
+    @classmethod
+    def from_config(cls, config) -> Optional['StatusSnapshotCache']:
+        if config.status_snapshot_ttl <= 0:
+            return None
+        return cls(config.status_snapshot_file, config.status_snapshot_ttl, config.status_snapshot_lock_timeout)
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """The snapshot for ``key`` if it is younger than the TTL"""
+        try:
+            snapshot = serializer.load(self.path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"Ignoring unreadable status snapshot: {e}")
+            return None
+        if snapshot.get('key') != key or time.time() - snapshot.get('fetched_at', 0) >= self.ttl:
+            return None
+        return snapshot
+
+    def store(self, key: str, statuses: Dict[str, Dict[str, Any]], fetched_at: float) -> None:
+        # Written to a temporary file and renamed, so readers that don't take the lock never see half a snapshot
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f'.{self.path.name}.', suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(serializer.dumps({'key': key, 'fetched_at': fetched_at, 'statuses': statuses}))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write status snapshot: {e}")
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Tuple[Dict[str, Dict[str, Any]], bool]],
+                     refresh: bool = False, lock_timeout: Optional[float] = None
+                     ) -> Tuple[Dict[str, Dict[str, Any]], Optional[float]]:
+        """Statuses by user ID from a fresh snapshot, or from ``fetch`` (which also says if they may be shared)
+
+        Returns the statuses and the snapshot's age in seconds, or None for
+        the age when they were fetched by this run. ``refresh`` skips the
+        first check, so the run fetches unless another one just did.
+        """
+        requested = time.time()
+        snapshot = None if refresh else self.load(key)
+        if snapshot is None:
+            timeout = self.lock_timeout if lock_timeout is None else lock_timeout
+            with file_lock(self.lock_path, timeout) as locked:
+                if not locked:
+                    logger.warning(f"Status snapshot still locked after {timeout:g}s, fetching without it")
+                snapshot = self.load(key)
+                # With refresh, only a fetch that started after this run asked counts
+                if snapshot is not None and refresh and snapshot['fetched_at'] < requested:
+                    snapshot = None
+                if snapshot is None:
+                    fetched_at = time.time()
+                    statuses, shareable = fetch()
+                    if shareable:
+                        self.store(key, statuses, fetched_at)
+                    return statuses, None
+        age = time.time() - snapshot['fetched_at']
+        logger.info(f"Using status snapshot from {age:.1f}s ago (STATUS_SNAPSHOT_TTL {self.ttl:g}s)")
+        return snapshot['statuses'], age
@@ -0,0 +1,243 @@
+import hmac
+import time
+import base64
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Optional, Tuple
+import serializer
+
+logger = logging.getLogger(__name__)
+
+# Status fields taken from an event; anything else in the last polled status is kept
+STATUS_FIELDS = ('on_duty_status', 'duty_status_reason', 'duty_status_started', 'do_not_disturb',
+                 'is_online', 'state', 'availability_status')
+
+class InvalidEvent(ValueError):
+    """The request body isn't a usable event"""
+
+class InvalidSignature(InvalidEvent):
+    """The event wasn't signed with the configured webhook secret"""
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+
+def decode_event_body(body: bytes, secret: Optional[str] = None) -> Dict[str, Any]:
+    """Decode a webhook body: plain JSON, or an HS256 JWT when the webhook has a secret
+
+    Dialpad sends events as a JWT signed with the webhook's secret when one
+    is set, so with ``secret`` given only correctly signed JWTs are accepted.
+    """
+    text = body.decode('utf-8', errors='replace').strip()
+    if not secret:
+        try:
+            payload = serializer.loads(text)
+        except serializer.DECODE_ERRORS as e:
+            raise InvalidEvent(f"Body is not JSON: {e}")
+    else:
+        try:
+            header, claims, signature = text.split('.')
+            if serializer.loads(_b64decode(header)).get('alg') != 'HS256':
+                raise InvalidSignature("Only HS256 signed events are supported")
+            expected = hmac.new(secret.encode('utf-8'), f'{header}.{claims}'.encode('ascii'), hashlib.sha256).digest()
+            if not hmac.compare_digest(expected, _b64decode(signature)):
+                raise InvalidSignature("Event signature does not match WEBHOOK_SECRET")
+            payload = serializer.loads(_b64decode(claims))
+        except InvalidSignature:
+            raise
+        except (UnicodeError, AttributeError, *serializer.DECODE_ERRORS) as e:
+            raise InvalidSignature(f"Body is not a signed JWT: {e}")
+    if not isinstance(payload, dict):
+        raise InvalidEvent("Event is not a JSON object")
+    return payload
+
+def encode_event_body(event: Dict[str, Any], secret: Optional[str] = None) -> bytes:
+    """Encode an event the way Dialpad sends it (used by the fake event sender)"""
+    if not secret:
+        return serializer.dumps(event)
+    encode = lambda data: base64.urlsafe_b64encode(data).rstrip(b'=')
+    signing_input = encode(serializer.dumps({'alg': 'HS256', 'typ': 'JWT'})) + b'.' + encode(serializer.dumps(event))
+    signature = hmac.new(secret.encode('utf-8'), signing_input, hashlib.sha256).digest()
+    return signing_input + b'.' + encode(signature)
+
+def parse_event(event: Dict[str, Any]) -> Tuple[Optional[str], Dict[str, Any], Optional[float]]:
+    """Extract (user ID, status fields, event time) from an agent status or user event
+
+    Agent status events name the user in ``target`` (type 'user'); user
+    events carry the user object itself, either at the top level or under
+    ``user``. The event time is in epoch seconds, or None if the event has none.
+    """
+    source = event.get('user') if isinstance(event.get('user'), dict) else event
+    target = event.get('target') if isinstance(event.get('target'), dict) else None
+    if target is not None and target.get('type', 'user') != 'user':
+        return None, {}, None
+    user_id = (target or {}).get('id') or event.get('user_id') or source.get('id')
+
+    fields = {field: source[field] for field in STATUS_FIELDS if field in source}
+    if 'on_duty_status' not in fields and isinstance(source.get('on_duty'), bool) and not source['on_duty']:
+        fields['on_duty_status'] = 'unavailable'
+    started = source.get('on_duty_started')
+    if 'duty_status_started' not in fields and isinstance(started, (int, float)):
+        # Dialpad timestamps are epoch milliseconds
+        fields['duty_status_started'] = datetime.fromtimestamp(started / 1000, timezone.utc).isoformat().replace('+00:00', 'Z')
+
+    event_time = event.get('event_timestamp', event.get('date'))
+    if isinstance(event_time, (int, float)):
+        event_time = event_time / 1000 if event_time > 1e11 else float(event_time)
+    else:
+        event_time = None
+    return (str(user_id) if user_id else None), fields, event_time
+
+class StatusTable:
+    """Current status per user ID, updated by webhook events and by polls
+
+    Events patch the fields they carry into the user's last polled status.
+    Events older than one already applied for the same user are ignored, as
+    are poll results for a user who got an event after the poll started, so
+    a slow poll can't overwrite a newer event. ``wait_for_change`` lets the
+    display wake up as soon as an event arrives.
+    """
+
+    def __init__(self):
+        self._statuses: Dict[str, Dict[str, Any]] = {}
+        self._event_times: Dict[str, float] = {}
+        self._event_received: Dict[str, float] = {}
+        self._changed = threading.Condition()
+        self.version = 0
+        self.events = 0
+        self.ignored = 0
+        self.last_event: Optional[float] = None
+
+    def apply_event(self, event: Dict[str, Any]) -> Optional[str]:
+        """Apply one event; returns the user ID it updated, or None if it was ignored"""
+        user_id, fields, event_time = parse_event(event)
+        with self._changed:
+            if not user_id or not fields or (event_time is not None and
+                                             event_time < self._event_times.get(user_id, float('-inf'))):
+                self.ignored += 1
+                return None
+            if event_time is not None:
+                self._event_times[user_id] = event_time
+            self._statuses[user_id] = {**self._statuses.get(user_id, {}), **fields}
+            self._event_received[user_id] = self.last_event = time.monotonic()
+            self.events += 1
+            self.version += 1
+            self._changed.notify_all()
+        return user_id
+
+    def update_from_poll(self, user_id: str, status: Dict[str, Any], requested_at: float) -> bool:
+        """Store a polled status (``requested_at`` from time.monotonic() before the request)"""
+        with self._changed:
+            if self._event_received.get(user_id, float('-inf')) > requested_at:
+                return False
+            self._statuses[user_id] = status
+            return True
+
+    def get(self, user_id: str) -> Dict[str, Any]:
+        with self._changed:
+            return self._statuses.get(user_id, {})
+
+    def from_event(self, user_id: str) -> bool:
+        """Whether the user's status has been updated by an event since it was last polled"""
+        with self._changed:
+            return user_id in self._event_received
+
+    def mark_polled(self, requested_at: float) -> None:
+        """Forget which users were updated by events before a poll that started at ``requested_at``"""
+        with self._changed:
+            for user_id in [user_id for user_id, received in self._event_received.items() if received <= requested_at]:
+                del self._event_received[user_id]
+
+    def wait_for_change(self, version: int, timeout: float) -> int:
+        """Block until the table is newer than ``version`` or ``timeout`` passes; returns the current version"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout=max(0.0, timeout))
+            return self.version
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: 'WebhookReceiver'
+
+    # Events are a few hundred bytes; anything much larger isn't one
+    MAX_BODY_BYTES = 1024 * 1024
+
+    def log_message(self, format, *args):
+        logger.debug(f"Webhook {self.address_string()}: {format % args}")
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            return self._reply(400, {'error': 'Invalid Content-Length'})
+        if length > self.MAX_BODY_BYTES:
+            # The body is left unread, so the connection can't be reused
+            self.close_connection = True
+            return self._reply(413, {'error': f'Body larger than {self.MAX_BODY_BYTES} bytes'})
+        body = self.rfile.read(length)
+        try:
+            event = decode_event_body(body, self.server.secret)
+        except InvalidSignature as e:
+            logger.warning(f"Rejected webhook event from {self.address_string()}: {e}")
+            return self._reply(401, {'error': str(e)})
+        except InvalidEvent as e:
+            return self._reply(400, {'error': str(e)})
+        user_id = self.server.table.apply_event(event)
+        self._reply(200, {'applied': user_id is not None})
+
+    def do_GET(self):
+        table = self.server.table
+        self._reply(200, {'status': 'ok', 'events': table.events, 'ignored': table.ignored})
+
+    def _reply(self, status: int, body: Dict[str, Any]) -> None:
+        data = serializer.dumps(body)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class WebhookReceiver(ThreadingHTTPServer):
+    """Local HTTP endpoint that applies Dialpad agent status and user events to a StatusTable
+
+    Every POST (on any path) is treated as one event; GET returns event
+    counts as a health check. Runs on a daemon thread until shutdown().
+    """
+
+    daemon_threads = True
+
+    def __init__(self, table: StatusTable, host: str = '127.0.0.1', port: int = 8765, secret: Optional[str] = None):
+        super().__init__((host, port), _WebhookHandler)
+        self.table = table
+        self.secret = secret
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def start(self) -> 'WebhookReceiver':
+        self._thread = threading.Thread(target=self.serve_forever, name='webhook-receiver', daemon=True)
+        self._thread.start()
+        logger.info(f"Listening for Dialpad status events on {self.url}")
+        return self
+
+    def shutdown(self) -> None:
+        super().shutdown()
+        self.server_close()
+
+    def handle_error(self, request, client_address) -> None:
+        # A client dropping the connection isn't worth a traceback on the wallboard
+        logger.debug(f"Webhook connection from {client_address[0]} failed", exc_info=True)
+
+def parse_listen_address(value: str) -> Tuple[str, int]:
+    """Parse '[HOST:]PORT' for --listen"""
+    host, _, port = value.rpartition(':')
+    if not port.isdigit():
+        raise ValueError(f"Invalid listen address '{value}' (use PORT or HOST:PORT)")
+    return host or '127.0.0.1', int(port)
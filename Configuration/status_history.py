@@ -0,0 +1,340 @@
+import os
+import gzip
+import time
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable, Iterator, NamedTuple, Tuple
+import serializer
+
+logger = logging.getLogger(__name__)
+
+# (on_duty_status, duty_status_reason, do_not_disturb)
+State = Tuple[str, str, bool]
+
+class StatusInterval(NamedTuple):
+    """A stretch of time (epoch seconds, end exclusive) a user spent in one duty status"""
+    start: float
+    end: float
+    status: str
+    reason: str
+    do_not_disturb: bool
+
+class _Segment:
+    """One day's records, indexed by user"""
+
+    def __init__(self):
+        self.changes: Dict[str, List[Tuple[float, State]]] = {}
+        self.observations: List[float] = []
+
+def _state(status: Dict[str, Any]) -> State:
+    return (status.get('on_duty_status', 'unknown'), status.get('duty_status_reason', '') or '',
+            bool(status.get('do_not_disturb')))
+
+def _day_start(day: date) -> float:
+    return datetime.combine(day, datetime.min.time()).timestamp()
+
+class StatusHistory:
+    """Append-only duty status log with per-user time queries
+
+    Each local day is one segment file in ``directory`` (``YYYY-MM-DD.jsonl``).
+    A segment starts with a snapshot of every user's last known status, then
+    gets one line per status change and a checkpoint line whenever changes
+    are written (and at least every CHECKPOINT_EVERY seconds), so a day can
+    be queried from its own segment alone. Checkpoints say when statuses
+    were observed: a status is assumed to hold between two observations at
+    most ``max_gap`` seconds apart, and time across longer gaps (nothing
+    running) counts as unknown.
+
+    Segments older than ``compact_after_days`` are rewritten gzipped, without
+    repeated statuses and with checkpoints thinned to COMPACT_SPACING;
+    segments older than ``retention_days`` are deleted.
+    """
+
+    CHECKPOINT_EVERY = 60
+    COMPACT_SPACING = 300
+
+    def __init__(self, directory: Path, max_gap: float = 3600, retention_days: int = 30, compact_after_days: int = 2):
+        self.directory = Path(directory)
+        self.max_gap = max_gap
+        self.retention_days = retention_days
+        self.compact_after_days = compact_after_days
+        self._last: Optional[Dict[str, State]] = None
+        self._last_observed: Optional[float] = None
+        self._segment_day: Optional[date] = None
+        self._written_size: Optional[int] = None
+        self._segments: Dict[Path, Tuple[float, _Segment]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> 'StatusHistory':
+        return cls(config.status_history_dir, config.status_history_max_gap,
+                   config.status_history_retention_days, config.status_history_compact_days)
+
+    # Writing
+
+    def record(self, statuses: Dict[str, Dict[str, Any]], when: Optional[float] = None) -> int:
+        """Append the users whose status changed since it was last recorded; returns how many changed"""
+        when = round(time.time() if when is None else when, 1)
+        day = datetime.fromtimestamp(when).date()
+        with self._lock:
+            path = self._segment_path(day)
+            size = path.stat().st_size if path.exists() else None
+            if self._last is None or (size is not None and size != self._written_size):
+                # First write, or another process appended since our last write
+                self._last, self._last_observed = self._replay_latest()
+            lines = []
+            if size is None:
+                # New segment: start it with everyone's last known status so the day can be read on its own
+                snapshot = {user_id: list(state) for user_id, state in self._last.items()}
+                lines.append({'t': when, 'prev': self._last_observed, 'snapshot': snapshot})
+            changed = 0
+            for user_id, status in statuses.items():
+                state = _state(status)
+                if self._last.get(user_id) != state:
+                    self._last[user_id] = state
+                    lines.append({'t': when, 'u': user_id, 's': state[0], 'r': state[1], 'd': state[2]})
+                    changed += 1
+            if lines or self._last_observed is None or when - self._last_observed >= self.CHECKPOINT_EVERY:
+                lines.append({'t': when, 'seen': len(statuses)})
+                self._last_observed = when
+
+            new_day = day != self._segment_day
+            self._segment_day = day
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # One write per batch, so concurrent writers append whole batches
+                with open(path, 'ab') as f:
+                    f.write(b''.join(serializer.dumps(line) + b'\n' for line in lines))
+                    self._written_size = f.tell()
+            except OSError as e:
+                logger.warning(f"Could not append to status history: {e}")
+                return 0
+        if new_day:
+            self.compact(day)
+        return changed
+
+    def _segment_path(self, day: date, compressed: bool = False) -> Path:
+        return self.directory / f"{day.isoformat()}.jsonl{'.gz' if compressed else ''}"
+
+    def _segment_files(self) -> Dict[date, List[Path]]:
+        """Segment files per day, compressed part first (a day can have both if written after compaction)"""
+        files: Dict[date, List[Path]] = {}
+        if self.directory.exists():
+            for path in sorted(self.directory.glob('*.jsonl*'), key=lambda path: path.suffix != '.gz'):
+                try:
+                    day = date.fromisoformat(path.name.split('.', 1)[0])
+                except ValueError:
+                    continue
+                files.setdefault(day, []).append(path)
+        return files
+
+    def _replay_latest(self) -> Tuple[Dict[str, State], Optional[float]]:
+        """Last recorded state per user and last observation time, from the newest segment"""
+        files = self._segment_files()
+        if not files:
+            return {}, None
+        last: Dict[str, State] = {}
+        observed = None
+        for line in self._read_segment(files[max(files)]):
+            if 'snapshot' in line:
+                last.update({user_id: tuple(state) for user_id, state in line['snapshot'].items()})
+            elif 'u' in line:
+                last[line['u']] = (line['s'], line['r'], line['d'])
+            observed = line['t']
+        return last, observed
+
+    # Reading
+
+    @staticmethod
+    def _read_lines(path: Path) -> Iterator[Dict[str, Any]]:
+        opener = gzip.open if path.suffix == '.gz' else open
+        with opener(path, 'rb') as f:
+            for raw in f:
+                try:
+                    yield serializer.loads(raw)
+                except serializer.DECODE_ERRORS:
+                    # A line cut short by a crash mid-append
+                    continue
+
+    def _read_segment(self, paths: List[Path]) -> Iterator[Dict[str, Any]]:
+        for path in paths:
+            yield from self._read_lines(path)
+
+    def _segment(self, day: date) -> Optional[_Segment]:
+        paths = self._segment_files().get(day)
+        if not paths:
+            return None
+        key = tuple(paths)
+        mtime = max(path.stat().st_mtime for path in paths)
+        cached = self._segments.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        segment = _Segment()
+        for line in self._read_segment(paths):
+            if 'snapshot' in line:
+                if line.get('prev') is not None:
+                    segment.observations.append(line['prev'])
+                    for user_id, state in line['snapshot'].items():
+                        segment.changes.setdefault(user_id, []).append((line['prev'], tuple(state)))
+                for user_id, state in line['snapshot'].items():
+                    segment.changes.setdefault(user_id, []).append((line['t'], tuple(state)))
+                segment.observations.append(line['t'])
+            elif 'u' in line:
+                segment.changes.setdefault(line['u'], []).append((line['t'], (line['s'], line['r'], line['d'])))
+            else:
+                segment.observations.append(line['t'])
+        segment.observations.sort()
+        for changes in segment.changes.values():
+            changes.sort(key=lambda change: change[0])
+        self._segments[key] = (mtime, segment)
+        return segment
+
+    def _covered(self, observations: List[float]) -> List[Tuple[float, float]]:
+        """Merge observations no more than max_gap apart into covered periods"""
+        periods: List[Tuple[float, float]] = []
+        for previous, current in zip(observations, observations[1:]):
+            if current - previous > self.max_gap or current == previous:
+                continue
+            if periods and periods[-1][1] == previous:
+                periods[-1] = (periods[-1][0], current)
+            else:
+                periods.append((previous, current))
+        return periods
+
+    def _days(self, start: float, end: float) -> Iterable[date]:
+        day = datetime.fromtimestamp(start).date()
+        # The next day's segment covers the time from the last observation before midnight
+        last = datetime.fromtimestamp(max(start, end - 0.001)).date() + timedelta(days=1)
+        while day <= last:
+            yield day
+            day += timedelta(days=1)
+
+    def all_intervals(self, start: float, end: float,
+                      user_ids: Optional[Iterable[str]] = None) -> Dict[str, List[StatusInterval]]:
+        """Status intervals per user between two epoch times, clipped to the range"""
+        wanted = set(user_ids) if user_ids is not None else None
+        result: Dict[str, List[StatusInterval]] = {}
+        with self._lock:
+            segments = [segment for segment in (self._segment(day) for day in self._days(start, end)) if segment]
+        for segment in segments:
+            periods = self._covered(segment.observations)
+            for user_id, changes in segment.changes.items():
+                if wanted is not None and user_id not in wanted:
+                    continue
+                intervals = result.setdefault(user_id, [])
+                index = 0
+                for period_start, period_end in periods:
+                    # State in effect at the start of the period
+                    while index + 1 < len(changes) and changes[index + 1][0] <= period_start:
+                        index += 1
+                    position = index
+                    cursor = period_start
+                    while cursor < period_end:
+                        if changes[position][0] > cursor:
+                            # User first seen inside this period
+                            cursor = changes[position][0]
+                            continue
+                        next_change = changes[position + 1][0] if position + 1 < len(changes) else float('inf')
+                        stop = min(period_end, next_change)
+                        state = changes[position][1]
+                        low, high = max(cursor, start), min(stop, end)
+                        if low < high:
+                            if intervals and intervals[-1].end == low and tuple(intervals[-1][2:]) == tuple(state):
+                                intervals[-1] = intervals[-1]._replace(end=high)
+                            else:
+                                intervals.append(StatusInterval(low, high, *state))
+                        cursor = stop
+                        if stop == next_change:
+                            position += 1
+        return {user_id: intervals for user_id, intervals in result.items() if intervals}
+
+    def intervals(self, user_id: str, start: float, end: float) -> List[StatusInterval]:
+        return self.all_intervals(start, end, [user_id]).get(user_id, [])
+
+    def statuses_at(self, when: float, user_ids: Optional[Iterable[str]] = None,
+                    lookback_days: int = 1) -> Dict[str, StatusInterval]:
+        """The status interval containing ``when`` for each user recorded at that time
+
+        Intervals are searched (and clipped to) ``lookback_days`` either side.
+        """
+        span = lookback_days * 86400
+        return {user_id: interval
+                for user_id, intervals in self.all_intervals(when - span, when + span, user_ids).items()
+                for interval in intervals if interval.start <= when < interval.end}
+
+    def status_at(self, user_id: str, when: float, lookback_days: int = 1) -> Optional[StatusInterval]:
+        """The status interval containing ``when``, or None if nothing was recording then"""
+        return self.statuses_at(when, [user_id], lookback_days).get(user_id)
+
+    def time_in_status(self, day: date, status: str = 'available',
+                       user_ids: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Seconds each user spent in ``status`` on one local day"""
+        start = _day_start(day)
+        end = _day_start(day + timedelta(days=1))
+        return {user_id: sum(interval.end - interval.start for interval in intervals if interval.status == status)
+                for user_id, intervals in self.all_intervals(start, end, user_ids).items()}
+
+    def available_time(self, day: date, user_ids: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Seconds each user was available on one local day"""
+        return self.time_in_status(day, 'available', user_ids)
+
+    # Retention
+
+    def compact(self, today: Optional[date] = None) -> Dict[str, int]:
+        """Gzip old segments and delete expired ones; returns counts of each"""
+        today = today or date.today()
+        stats = {'compacted': 0, 'deleted': 0}
+        for day, paths in sorted(self._segment_files().items()):
+            try:
+                if (today - day).days > self.retention_days:
+                    for path in paths:
+                        path.unlink()
+                    stats['deleted'] += 1
+                elif (today - day).days > self.compact_after_days and paths[-1].suffix == '.jsonl':
+                    self._compact_segment(paths, self._segment_path(day, compressed=True))
+                    stats['compacted'] += 1
+            except OSError as e:
+                logger.warning(f"Could not compact status history segment {day}: {e}")
+        if any(stats.values()):
+            logger.info(f"Status history: compacted {stats['compacted']} segments, deleted {stats['deleted']}")
+        return stats
+
+    def _compact_segment(self, paths: List[Path], target: Path) -> None:
+        lines = sorted(self._read_segment(paths), key=lambda line: line['t'])
+        observations = sorted(line['t'] for line in lines if 'u' not in line)
+        # Thin observations greedily, keeping one whenever dropping it would leave a gap over COMPACT_SPACING
+        spacing = min(self.COMPACT_SPACING, self.max_gap)
+        keep = set()
+        last_kept = None
+        for index, observed in enumerate(observations):
+            following = observations[index + 1] if index + 1 < len(observations) else None
+            if last_kept is None or following is None or following - last_kept > spacing:
+                keep.add(observed)
+                last_kept = observed
+
+        kept_lines = []
+        last: Dict[str, State] = {}
+        for line in lines:
+            if 'snapshot' in line:
+                last.update({user_id: tuple(state) for user_id, state in line['snapshot'].items()})
+                kept_lines.append(line)
+            elif 'u' in line:
+                state = (line['s'], line['r'], line['d'])
+                if last.get(line['u']) != state:
+                    last[line['u']] = state
+                    kept_lines.append(line)
+            elif line['t'] in keep:
+                keep.discard(line['t'])
+                kept_lines.append(line)
+
+        tmp_path = target.with_name(f'.{target.name}.tmp')
+        with gzip.open(tmp_path, 'wb') as f:
+            f.write(b''.join(serializer.dumps(line) + b'\n' for line in kept_lines))
+        os.replace(tmp_path, target)
+        for path in paths:
+            if path != target:
+                path.unlink()
+        self._segments.pop(tuple(paths), None)
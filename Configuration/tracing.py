@@ -0,0 +1,151 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Deque, Iterator
+import serializer
+
+logger = logging.getLogger(__name__)
+
+class Tracer:
+    """Lightweight stage timing for the command-line scripts
+
+    Wrap each pipeline stage in ``tracer.span('name')``; spans may nest and
+    may be opened from worker threads. Nothing is recorded until enable() is
+    called, so the spans cost one attribute check in normal runs. Finished
+    traces are written either as a JSON list of spans with a per-stage
+    summary, or in Chrome trace event format (open in chrome://tracing or
+    https://ui.perfetto.dev). Only the latest ``max_spans`` spans are kept,
+    so tracing a long --watch run uses bounded memory.
+    """
+
+    FORMATS = ('json', 'chrome')
+    MAX_SPANS = 100_000
+
+    def __init__(self, max_spans: int = MAX_SPANS):
+        self.enabled = False
+        self.spans: Deque[Dict[str, Any]] = deque(maxlen=max_spans)
+        self.dropped = 0
+        self._origin = time.perf_counter()
+        self._started = time.time()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        """Start recording (the trace's time origin is reset to now)"""
+        self.enabled = True
+        self.spans.clear()
+        self.dropped = 0
+        self._origin = time.perf_counter()
+        self._started = time.time()
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[Dict[str, Any]]:
+        """Time the enclosed block; extra keyword arguments are stored with the span
+
+        The yielded dict can be updated inside the block to attach results
+        (counts, sizes) to the span.
+        """
+        if not self.enabled:
+            yield args
+            return
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        parent = stack[-1] if stack else None
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            end = time.perf_counter()
+            stack.pop()
+            with self._lock:
+                if len(self.spans) == self.spans.maxlen:
+                    self.dropped += 1
+                self.spans.append({
+                    'name': name,
+                    'parent': parent,
+                    'start_ms': round((start - self._origin) * 1000, 3),
+                    'duration_ms': round((end - start) * 1000, 3),
+                    'thread': threading.current_thread().name,
+                    'thread_id': threading.get_ident(),
+                    'args': args,
+                })
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Total time per stage, slowest first, with its share of the traced wall time"""
+        with self._lock:
+            spans = list(self.spans)
+        if not spans:
+            return []
+        wall = max(span['start_ms'] + span['duration_ms'] for span in spans) - min(span['start_ms'] for span in spans)
+        stages: Dict[str, Dict[str, Any]] = {}
+        for span in spans:
+            stage = stages.setdefault(span['name'], {'stage': span['name'], 'parent': span['parent'],
+                                                      'count': 0, 'total_ms': 0.0})
+            stage['count'] += 1
+            stage['total_ms'] += span['duration_ms']
+        for stage in stages.values():
+            stage['total_ms'] = round(stage['total_ms'], 3)
+            stage['percent_of_wall'] = round(stage['total_ms'] / wall * 100, 1) if wall else 0.0
+        return sorted(stages.values(), key=lambda stage: stage['total_ms'], reverse=True)
+
+    def log_summary(self) -> None:
+        for stage in self.summary():
+            nested = f" (in {stage['parent']})" if stage['parent'] else ''
+            logger.info(f"Stage {stage['stage']}{nested}: {stage['total_ms']:.1f}ms "
+                        f"({stage['percent_of_wall']:.1f}% of wall time, {stage['count']}x)")
+
+    def export(self, path: Path, fmt: str = 'chrome') -> None:
+        """Write the recorded spans to ``path`` as 'json' or 'chrome' trace events"""
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Trace format must be one of {', '.join(self.FORMATS)}, not '{fmt}'")
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span['start_ms'])
+        if fmt == 'chrome':
+            pid = os.getpid()
+            events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                      for tid, name in {span['thread_id']: span['thread'] for span in spans}.items()]
+            events += [{'name': span['name'], 'cat': 'stage', 'ph': 'X', 'pid': pid, 'tid': span['thread_id'],
+                        'ts': round(span['start_ms'] * 1000), 'dur': round(span['duration_ms'] * 1000),
+                        'args': span['args']} for span in spans]
+            data = {'traceEvents': events, 'displayTimeUnit': 'ms',
+                    'otherData': {'started': datetime.fromtimestamp(self._started).isoformat()}}
+        else:
+            data = {'started': datetime.fromtimestamp(self._started).isoformat(),
+                    'summary': self.summary(), 'spans': spans}
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        serializer.dump(data, path, indent=fmt == 'json')
+        dropped = f", oldest {self.dropped} dropped" if self.dropped else ''
+        logger.info(f"Wrote {len(spans)} trace spans to {path} ({fmt} format{dropped})")
+
+# Process-wide tracer used by the scripts
+tracer = Tracer()
+
+def add_trace_arguments(parser) -> None:
+    """Add the --trace / --trace-format options shared by the scripts"""
+    parser.add_argument('--trace', metavar='FILE',
+                        help='Record stage timings and write them to FILE when the run finishes')
+    parser.add_argument('--trace-format', choices=Tracer.FORMATS, default='chrome',
+                        help='Trace file format: chrome (chrome://tracing, Perfetto) or json (default: chrome)')
+
+def start_tracing(args) -> None:
+    if args.trace:
+        tracer.enable()
+
+def finish_tracing(args) -> None:
+    """Log the per-stage summary and write the trace file, if tracing was requested"""
+    if not args.trace:
+        return
+    tracer.log_summary()
+    try:
+        tracer.export(args.trace, args.trace_format)
+    except OSError as e:
+        logger.error(f"Could not write trace file {args.trace}: {e}")
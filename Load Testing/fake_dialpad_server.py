@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+"""
+Fake Dialpad API Server
+
+A self-contained local stand-in for the parts of the Dialpad v2 API used by
+this repository, for load and scaling tests without touching production.
+Data is synthetic and generated on demand from the record index and a seed,
+so a million calls cost no memory and every run with the same options serves
+the same data. User duty statuses change over time (--status-period).
+
+Endpoints (under /api/v2/): company/, users/, users/{id}/, offices/,
+offices/{id}/, callcenters/, callcenters/{id}/users/, call/, contacts/,
+userdevices/. List endpoints use cursor pagination with ?limit= and ?cursor=.
+company/, offices/ and callcenters/ send ETag / Last-Modified and answer
+conditional requests with 304 Not Modified.
+
+Usage:
+    python3 fake_dialpad_server.py
+    python3 fake_dialpad_server.py --users 10000 --calls 1000000
+    python3 fake_dialpad_server.py --latency lognormal:80,0.5 --endpoint-latency call=uniform:200,600
+    python3 fake_dialpad_server.py --error-rate 0.02 --rate-limit 1200 --throttle-rate 0.01
+
+Then point the scripts at it:
+    DIALPAD_API_BASE_URL=http://127.0.0.1:8080/api/v2 DIALPAD_BEARER_TOKEN=fake \\
+        OFFICE_ID=<printed office id> python3 "User Status/fast_employee_status.py"
+"""
+
+import re
+import gzip
+import json
+import math
+import time
+import base64
+import hashlib
+import random
+import signal
+import argparse
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+COMPANY_ID = 4000000000000000
+OFFICE_BASE_ID = 6000000000000000
+USER_BASE_ID = 5000000000000000
+CALL_CENTER_BASE_ID = 7000000000000000
+CALL_BASE_ID = 9000000000000000
+CONTACT_BASE_ID = 3000000000000000
+
+FIRST_NAMES = ['Alex', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn', 'Drew',
+               'Sam', 'Cameron', 'Parker', 'Reese', 'Skyler', 'Rowan', 'Emerson', 'Hayden', 'Logan', 'Blake']
+LAST_NAMES = ['Smith', 'Johnson', 'Lee', 'Garcia', 'Miller', 'Davis', 'Lopez', 'Wilson', 'Anderson', 'Thomas',
+              'Moore', 'Martin', 'Jackson', 'White', 'Harris', 'Clark', 'Lewis', 'Young', 'Walker', 'Hall']
+DUTY_STATUSES = [('available', '', 0.55), ('unavailable', '', 0.2), ('unavailable', 'Lunch', 0.08),
+                 ('unavailable', 'Meeting', 0.07), ('wrapup', '', 0.06), ('busy', '', 0.04)]
+
+class LatencyModel:
+    """Response delay distribution parsed from 'fixed:MS', 'uniform:LO,HI', 'normal:MEAN,SD' or 'lognormal:MEDIAN,SIGMA'"""
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        kind, _, args = spec.partition(':')
+        self.kind = kind.strip().lower()
+        self.args = [float(arg) for arg in args.split(',') if arg.strip()]
+        expected = {'none': 0, 'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}
+        if self.kind not in expected or len(self.args) != expected[self.kind]:
+            raise ValueError(f"Invalid latency spec '{spec}'")
+
+    def sample(self, rng: random.Random) -> float:
+        """Delay in seconds"""
+        if self.kind == 'none':
+            return 0.0
+        if self.kind == 'fixed':
+            ms = self.args[0]
+        elif self.kind == 'uniform':
+            ms = rng.uniform(*self.args)
+        elif self.kind == 'normal':
+            ms = rng.gauss(*self.args)
+        else:
+            ms = self.args[0] * math.exp(rng.gauss(0, self.args[1]))
+        return max(0.0, ms) / 1000.0
+
+class FaultInjector:
+    """Random 5xx errors and 429s, plus an optional server-side rate limit"""
+
+    def __init__(self, error_rate: float = 0.0, throttle_rate: float = 0.0, rate_limit: int = 0, burst: int = 20):
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rate_limit = rate_limit
+        self.rate = rate_limit / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def rate_limit_headers(self) -> Tuple[Optional[float], Dict[str, str]]:
+        """Take a token; returns (retry_after or None, X-RateLimit headers)"""
+        if not self.rate_limit:
+            return None, {}
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            retry_after = None
+            if self.tokens >= 1:
+                self.tokens -= 1
+            else:
+                retry_after = (1 - self.tokens) / self.rate
+            headers = {'X-RateLimit-Limit': str(self.rate_limit),
+                       'X-RateLimit-Remaining': str(int(self.tokens)),
+                       'X-RateLimit-Reset': str(int(time.time() + (self.capacity - self.tokens) / self.rate))}
+        return retry_after, headers
+
+    def injected_error(self, rng: random.Random) -> Optional[int]:
+        if self.throttle_rate and rng.random() < self.throttle_rate:
+            return 429
+        if self.error_rate and rng.random() < self.error_rate:
+            return rng.choice([500, 502, 503, 504])
+        return None
+
+class SyntheticDataset:
+    """Deterministic fake company: users, offices, call centers, contacts, devices and calls"""
+
+    def __init__(self, users: int, calls: int, offices: int, call_centers: int, contacts: int,
+                 days: float, status_period: float, seed: int):
+        self.user_count = users
+        self.call_count = calls
+        self.office_count = max(1, offices)
+        self.call_center_count = max(1, call_centers)
+        self.contact_count = contacts
+        self.status_period = status_period
+        self.seed = seed
+        self.calls_end = time.time()
+        self.calls_start = self.calls_end - days * 86400
+
+    def _rng(self, *parts) -> random.Random:
+        # String seeds are hashed deterministically (unlike hash(), which varies per process)
+        return random.Random(':'.join(map(str, (self.seed,) + parts)))
+
+    # Offices and company
+
+    def office_id(self, index: int) -> str:
+        return str(OFFICE_BASE_ID + index)
+
+    def company(self) -> Dict[str, Any]:
+        return {'id': str(COMPANY_ID), 'name': 'Fake Company', 'domain': 'example.com',
+                'office_count': self.office_count}
+
+    def office(self, index: int) -> Dict[str, Any]:
+        return {'id': self.office_id(index), 'name': f'Office {index + 1}', 'company_id': str(COMPANY_ID),
+                'state': 'active', 'timezone': 'US/Eastern', 'country': 'us',
+                'phone_numbers': [f'+1812555{index:04d}']}
+
+    # Users
+
+    def user_index(self, user_id: str) -> Optional[int]:
+        index = int(user_id) - USER_BASE_ID if user_id.isdigit() else -1
+        return index if 0 <= index < self.user_count else None
+
+    def user(self, index: int) -> Dict[str, Any]:
+        rng = self._rng('user', index)
+        first, last = FIRST_NAMES[index % len(FIRST_NAMES)], LAST_NAMES[(index // len(FIRST_NAMES)) % len(LAST_NAMES)]
+        user = {
+            'id': str(USER_BASE_ID + index),
+            'display_name': f'{first} {last} {index}',
+            'first_name': first,
+            'last_name': f'{last} {index}',
+            'emails': [f'{first.lower()}.{last.lower()}{index}@example.com'],
+            'phone_numbers': [f'+1317{index:07d}'[:12]],
+            'office_id': self.office_id(index % self.office_count),
+            'company_id': str(COMPANY_ID),
+            'state': 'active' if rng.random() > 0.02 else 'suspended',
+            'timezone': 'US/Eastern',
+            'license': 'agents',
+            'is_admin': index % 50 == 0,
+            'job_title': rng.choice(['Network Engineer', 'NOC Analyst', 'Support Specialist', 'Team Lead']),
+            'group_details': [{'group_id': str(CALL_CENTER_BASE_ID + index % self.call_center_count),
+                               'group_type': 'callcenter', 'role': 'operator'}],
+        }
+        user.update(self.user_status(index))
+        return user
+
+    def user_status(self, index: int, now: Optional[float] = None) -> Dict[str, Any]:
+        """Duty status fields, changing every status_period seconds (offset per user)"""
+        now = time.time() if now is None else now
+        phase = self._rng('phase', index).random() * self.status_period
+        bucket = math.floor((now + phase) / self.status_period) if self.status_period else 0
+        started = bucket * self.status_period - phase if self.status_period else self.calls_start
+        rng = self._rng('status', index, bucket)
+        status, reason, _ = rng.choices(DUTY_STATUSES, weights=[weight for _, _, weight in DUTY_STATUSES])[0]
+        return {
+            'on_duty_status': status,
+            'duty_status_reason': reason,
+            'duty_status_started': datetime.fromtimestamp(started, timezone.utc).isoformat().replace('+00:00', 'Z'),
+            'is_online': status != 'unavailable' or rng.random() < 0.5,
+            'do_not_disturb': rng.random() < 0.05,
+        }
+
+    def find_user_by_email(self, email: str) -> List[int]:
+        match = re.search(r'(\d+)@example\.com$', email)
+        index = int(match.group(1)) if match else -1
+        if 0 <= index < self.user_count and email in self.user(index)['emails']:
+            return [index]
+        return []
+
+    # Call centers, contacts and devices
+
+    def call_center(self, index: int) -> Dict[str, Any]:
+        return {'id': str(CALL_CENTER_BASE_ID + index), 'name': f'Call Center {index + 1}',
+                'office_id': self.office_id(index % self.office_count), 'state': 'active',
+                'phone_numbers': [f'+1800555{index:04d}']}
+
+    def call_center_members(self, index: int) -> List[int]:
+        return list(range(index, self.user_count, self.call_center_count))
+
+    def contact(self, index: int) -> Dict[str, Any]:
+        first, last = FIRST_NAMES[(index * 7) % len(FIRST_NAMES)], LAST_NAMES[(index * 3) % len(LAST_NAMES)]
+        return {'id': str(CONTACT_BASE_ID + index), 'display_name': f'{first} {last}', 'first_name': first,
+                'last_name': last, 'type': 'shared', 'office_id': self.office_id(index % self.office_count),
+                'emails': [f'contact{index}@partner.example.org'], 'phones': [f'+1614{index:07d}'[:12]]}
+
+    def devices(self, user_index: int) -> List[Dict[str, Any]]:
+        rng = self._rng('devices', user_index)
+        return [{'id': f'{USER_BASE_ID + user_index}-{n}', 'user_id': str(USER_BASE_ID + user_index),
+                 'type': rng.choice(['desktop', 'mobile', 'web', 'deskphone']),
+                 'date_registered': int(self.calls_start * 1000)}
+                for n in range(1 + rng.randrange(3))]
+
+    # Calls
+
+    def call_time(self, index: int) -> float:
+        return self.calls_start + (self.calls_end - self.calls_start) * index / max(1, self.call_count)
+
+    def call_index_range(self, start_time: Optional[float], end_time: Optional[float]) -> Tuple[int, int]:
+        """Indexes of calls whose start time is within [start_time, end_time]"""
+        span = (self.calls_end - self.calls_start) or 1
+        first, last = 0, self.call_count
+        if start_time is not None:
+            first = max(0, math.ceil((start_time - self.calls_start) / span * self.call_count))
+        if end_time is not None:
+            last = min(self.call_count, math.floor((end_time - self.calls_start) / span * self.call_count) + 1)
+        return first, max(first, last)
+
+    def call(self, index: int) -> Dict[str, Any]:
+        rng = self._rng('call', index)
+        started = int(self.call_time(index) * 1000)
+        user_index = rng.randrange(self.user_count) if self.user_count else 0
+        state = rng.choices(['hangup', 'missed', 'voicemail', 'abandoned'], weights=[0.8, 0.1, 0.07, 0.03])[0]
+        duration = int(rng.expovariate(1 / 240)) if state == 'hangup' else 0
+        external = f'+1{rng.randrange(2000000000, 9999999999)}'
+        return {
+            'call_id': str(CALL_BASE_ID + index),
+            'direction': rng.choice(['inbound', 'outbound']),
+            'state': state,
+            'date_started': str(started),
+            'date_connected': str(started + 5000) if duration else None,
+            'date_ended': str(started + 5000 + duration * 1000),
+            'duration': duration * 1000,
+            'duration_seconds': duration,
+            'external_number': external,
+            'internal_number': f'+1812555{user_index % 10000:04d}',
+            'target': {'id': str(USER_BASE_ID + user_index), 'type': 'user',
+                       'name': f'User {user_index}', 'office_id': self.office_id(user_index % self.office_count)},
+            'contact': {'id': str(CONTACT_BASE_ID + index % max(1, self.contact_count)), 'type': 'shared',
+                        'phone': external},
+            'participants': [{'user_id': str(USER_BASE_ID + user_index)}],
+            'was_recorded': rng.random() < 0.3,
+        }
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds from an ISO 8601 string or epoch milliseconds"""
+    if not value:
+        return None
+    if value.isdigit():
+        return int(value) / 1000.0
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(f'offset:{offset}'.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    padded = cursor + '=' * (-len(cursor) % 4)
+    return int(base64.urlsafe_b64decode(padded).decode().split(':', 1)[1])
+
+class FakeDialpadHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; with Nagle on, keep-alive clients stall on delayed ACKs
+    disable_nagle_algorithm = True
+    server: 'FakeDialpadServer'
+
+    ROUTES = [
+        (re.compile(r'company/?'), 'company'),
+        (re.compile(r'users/?'), 'users'),
+        (re.compile(r'users/(\d+)/?'), 'user'),
+        (re.compile(r'offices/?'), 'offices'),
+        (re.compile(r'offices/(\d+)/?'), 'office'),
+        (re.compile(r'callcenters/?'), 'call_centers'),
+        (re.compile(r'callcenters/(\d+)/users/?'), 'call_center_users'),
+        (re.compile(r'call/?'), 'calls'),
+        (re.compile(r'contacts/?'), 'contacts'),
+        (re.compile(r'userdevices/?'), 'user_devices'),
+    ]
+    # Routes whose data never changes during a run; they carry ETag / Last-Modified
+    # validators and answer conditional requests with 304 Not Modified
+    CACHEABLE_ROUTES = {'company', 'offices', 'office', 'call_centers'}
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        path = re.sub(r'^.*?/v2/', '', parsed.path).lstrip('/')
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        server = self.server
+        rng = random.Random()
+
+        for pattern, name in self.ROUTES:
+            match = pattern.fullmatch(path)
+            if match:
+                break
+        else:
+            name, match = 'not_found', None
+        family = path.split('/', 1)[0] or 'root'
+        server.count(family)
+
+        delay = server.latency_for(family).sample(rng)
+        if delay:
+            time.sleep(delay)
+
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            return self._send_json(401, {'error': {'code': 401, 'message': 'Missing bearer token'}})
+
+        retry_after, rate_headers = server.faults.rate_limit_headers()
+        status = 429 if retry_after is not None else server.faults.injected_error(rng)
+        if status == 429:
+            server.count('injected_429')
+            headers = {**rate_headers, 'Retry-After': str(max(1, math.ceil(retry_after or 1)))}
+            return self._send_json(429, {'error': {'code': 429, 'message': 'Rate limit exceeded'}}, headers)
+        if status:
+            server.count(f'injected_{status}')
+            return self._send_json(status, {'error': {'code': status, 'message': 'Injected failure'}}, rate_headers)
+
+        if match is None:
+            return self._send_json(404, {'error': {'code': 404, 'message': f'Unknown endpoint {path}'}}, rate_headers)
+        try:
+            status, body = getattr(self, f'_handle_{name}')(query, *match.groups())
+        except (ValueError, IndexError) as e:
+            status, body = 400, {'error': {'code': 400, 'message': str(e)}}
+        if status == 200 and name in self.CACHEABLE_ROUTES:
+            validators = self._validators(body)
+            if self._not_modified(validators):
+                server.count('not_modified')
+                return self._send_not_modified({**rate_headers, **validators})
+            rate_headers = {**rate_headers, **validators}
+        self._send_json(status, body, rate_headers)
+
+    def _validators(self, body: Dict[str, Any]) -> Dict[str, str]:
+        digest = hashlib.sha1(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        return {'ETag': f'"{digest}"', 'Last-Modified': formatdate(self.server.started, usegmt=True)}
+
+    def _not_modified(self, validators: Dict[str, str]) -> bool:
+        """Whether the request's validators still match (If-None-Match wins over If-Modified-Since)"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or validators['ETag'] in tags or f"W/{validators['ETag']}" in tags
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return parsedate_to_datetime(if_modified_since).timestamp() >= int(self.server.started)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _send_not_modified(self, headers: Dict[str, str]) -> None:
+        self.send_response(304)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode('utf-8')
+        gzipped = len(data) > 1024 and 'gzip' in self.headers.get('Accept-Encoding', '')
+        if gzipped:
+            data = gzip.compress(data, compresslevel=5)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _page(self, query: Dict[str, str], total: int, make_item, key: str = 'items') -> Tuple[int, Dict[str, Any]]:
+        """One page of ``total`` items, built by make_item(position)"""
+        limit = min(int(query.get('limit', self.server.page_size)), self.server.max_page_size)
+        offset = decode_cursor(query.get('cursor'))
+        end = min(total, offset + max(1, limit))
+        # Cursor first, as in Dialpad's responses, so streaming clients can prefetch early
+        body = {'cursor': encode_cursor(end)} if end < total and not self.server.cursor_last else {}
+        body[key] = [make_item(position) for position in range(offset, end)]
+        if end < total and self.server.cursor_last:
+            body['cursor'] = encode_cursor(end)
+        return 200, body
+
+    def _handle_company(self, query):
+        return 200, self.server.data.company()
+
+    def _handle_users(self, query):
+        data = self.server.data
+        if query.get('email'):
+            matches = data.find_user_by_email(query['email'])
+            return self._page(query, len(matches), lambda position: data.user(matches[position]))
+        return self._page(query, data.user_count, data.user)
+
+    def _handle_user(self, query, user_id):
+        index = self.server.data.user_index(user_id)
+        if index is None:
+            return 404, {'error': {'code': 404, 'message': f'User {user_id} not found'}}
+        return 200, self.server.data.user(index)
+
+    def _handle_offices(self, query):
+        return self._page(query, self.server.data.office_count, self.server.data.office)
+
+    def _handle_office(self, query, office_id):
+        index = int(office_id) - OFFICE_BASE_ID
+        if not 0 <= index < self.server.data.office_count:
+            return 404, {'error': {'code': 404, 'message': f'Office {office_id} not found'}}
+        return 200, self.server.data.office(index)
+
+    def _handle_call_centers(self, query):
+        return self._page(query, self.server.data.call_center_count, self.server.data.call_center)
+
+    def _handle_call_center_users(self, query, call_center_id):
+        data = self.server.data
+        index = int(call_center_id) - CALL_CENTER_BASE_ID
+        if not 0 <= index < data.call_center_count:
+            return 404, {'error': {'code': 404, 'message': f'Call center {call_center_id} not found'}}
+        members = data.call_center_members(index)
+        # DialpadAPI.get_call_center_users reads 'results' for this endpoint
+        return self._page(query, len(members), lambda position: data.user(members[position]), key='results')
+
+    def _handle_calls(self, query):
+        data = self.server.data
+        first, last = data.call_index_range(parse_time(query.get('start_time')), parse_time(query.get('end_time')))
+        return self._page(query, last - first, lambda position: data.call(first + position))
+
+    def _handle_contacts(self, query):
+        data = self.server.data
+        if query.get('office_id'):
+            office_index = int(query['office_id']) - OFFICE_BASE_ID
+            indexes = range(office_index, data.contact_count, data.office_count) if office_index >= 0 else range(0)
+            return self._page(query, len(indexes), lambda position: data.contact(indexes[position]))
+        return self._page(query, data.contact_count, data.contact)
+
+    def _handle_user_devices(self, query):
+        index = self.server.data.user_index(query.get('user_id', ''))
+        devices = self.server.data.devices(index) if index is not None else []
+        # DialpadAPI.get_user_devices reads 'results' for this endpoint
+        return self._page(query, len(devices), lambda position: devices[position], key='results')
+
+class FakeDialpadServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, data: SyntheticDataset, latency: LatencyModel,
+                 endpoint_latency: Dict[str, LatencyModel], faults: FaultInjector,
+                 page_size: int = 100, max_page_size: int = 1000, verbose: bool = False,
+                 cursor_last: bool = False):
+        super().__init__(address, FakeDialpadHandler)
+        self.data = data
+        self.latency = latency
+        self.endpoint_latency = endpoint_latency
+        self.faults = faults
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self.verbose = verbose
+        self.cursor_last = cursor_last
+        self.started = time.time()
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+
+    def latency_for(self, family: str) -> LatencyModel:
+        return self.endpoint_latency.get(family, self.latency)
+
+    def count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+def parse_endpoint_latency(values: List[str]) -> Dict[str, LatencyModel]:
+    latencies = {}
+    for value in values:
+        family, _, spec = value.partition('=')
+        latencies[family.strip().strip('/')] = LatencyModel(spec)
+    return latencies
+
+def _stop(signum, frame):
+    raise KeyboardInterrupt
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a fake Dialpad API for load and scaling tests')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on (default: 8080)')
+    parser.add_argument('--users', type=int, default=1000, help='Number of users (default: 1000)')
+    parser.add_argument('--calls', type=int, default=100000, help='Number of calls (default: 100000)')
+    parser.add_argument('--days', type=float, default=90, help='Calls are spread over the last N days (default: 90)')
+    parser.add_argument('--offices', type=int, default=3, help='Number of offices; users are spread across them (default: 3)')
+    parser.add_argument('--call-centers', type=int, default=10, help='Number of call centers (default: 10)')
+    parser.add_argument('--contacts', type=int, default=500, help='Number of shared contacts (default: 500)')
+    parser.add_argument('--status-period', type=float, default=300,
+                        help='Seconds between duty status changes per user, 0 for fixed statuses (default: 300)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for the synthetic data (default: 1)')
+    parser.add_argument('--page-size', type=int, default=100, help='Default page size for list endpoints (default: 100)')
+    parser.add_argument('--latency', default='lognormal:50,0.4',
+                        help="Response delay: none, fixed:MS, uniform:LO,HI, normal:MEAN,SD or lognormal:MEDIAN,SIGMA "
+                             "(default: lognormal:50,0.4)")
+    parser.add_argument('--endpoint-latency', action='append', default=[], metavar='FAMILY=SPEC',
+                        help='Per-endpoint delay override, e.g. call=uniform:200,600 (repeatable)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests failing with a 5xx (default: 0)')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of requests answered with a 429 (default: 0)')
+    parser.add_argument('--rate-limit', type=int, default=0,
+                        help='Server-side rate limit in requests/minute, 0 for none (default: 0; Dialpad uses 1200)')
+    parser.add_argument('--rate-limit-burst', type=int, default=20, help='Burst allowed by the rate limit (default: 20)')
+    parser.add_argument('--cursor-last', action='store_true',
+                        help='Put the pagination cursor after the items instead of before them')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    data = SyntheticDataset(args.users, args.calls, args.offices, args.call_centers, args.contacts,
+                            args.days, args.status_period, args.seed)
+    faults = FaultInjector(args.error_rate, args.throttle_rate, args.rate_limit, args.rate_limit_burst)
+    server = FakeDialpadServer((args.host, args.port), data, LatencyModel(args.latency),
+                               parse_endpoint_latency(args.endpoint_latency), faults, args.page_size,
+                               verbose=args.verbose, cursor_last=args.cursor_last)
+
+    base_url = f'http://{args.host}:{server.server_address[1]}/api/v2'
+    print(f"🧪 Fake Dialpad API on {base_url}")
+    print(f"   {args.users} users, {args.calls} calls over {args.days:g} days, {data.office_count} offices, "
+          f"{data.call_center_count} call centers, {args.contacts} contacts")
+    print(f"   Latency: {args.latency}; errors: {args.error_rate:.1%}; 429s: {args.throttle_rate:.1%}; "
+          f"rate limit: {args.rate_limit or 'none'}")
+    print(f"\n   DIALPAD_API_BASE_URL={base_url} DIALPAD_BEARER_TOKEN=fake OFFICE_ID={data.office_id(0)}\n")
+    # Background jobs ignore SIGINT, so also stop (and print stats) on SIGTERM
+    signal.signal(signal.SIGTERM, _stop)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("\n📊 Requests served:")
+        for key, count in sorted(server.stats.items()):
+            print(f"   {key}: {count}")
+
+if __name__ == '__main__':
+    main()
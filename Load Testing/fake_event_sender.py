@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Fake Dialpad Event Sender
+
+Posts synthetic agent status events to the status checker's webhook receiver
+(fast_employee_status.py --watch --listen), so event-driven updates can be
+tested offline. Events are shaped like Dialpad agent status events and are
+signed as HS256 JWTs when a webhook secret is given.
+
+User IDs come from the users cache (Data/users.json) by default, or follow
+the fake API server's numbering with --users N.
+
+Usage:
+    python3 fake_event_sender.py
+    python3 fake_event_sender.py --url http://127.0.0.1:8765/ --rate 5 --count 100
+    python3 fake_event_sender.py --users 1000 --secret my-webhook-secret
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Configuration'))
+
+import serializer
+from status_events import encode_event_body
+
+# Same base ID and statuses as fake_dialpad_server.py
+USER_BASE_ID = 5000000000000000
+DUTY_STATUSES = [('available', '', 0.55), ('unavailable', '', 0.2), ('unavailable', 'Lunch', 0.08),
+                 ('unavailable', 'Meeting', 0.07), ('wrapup', '', 0.06), ('busy', '', 0.04)]
+
+def load_users(cache: str, count: int):
+    """(user ID, email) pairs from the users cache, or fake server IDs when ``count`` is set"""
+    if count:
+        return [(str(USER_BASE_ID + index), '') for index in range(count)]
+    data = serializer.load(cache)
+    return [(str(user['id']), (user.get('emails') or [''])[0]) for user in data['users'] if user.get('id')]
+
+def make_event(rng: random.Random, user_id: str, email: str) -> dict:
+    status, reason, _ = rng.choices(DUTY_STATUSES, weights=[weight for _, _, weight in DUTY_STATUSES])[0]
+    now_ms = int(time.time() * 1000)
+    return {
+        'event_timestamp': now_ms,
+        'target': {'id': user_id, 'type': 'user', 'email': email},
+        'on_duty': status != 'unavailable',
+        'on_duty_status': status,
+        'duty_status_reason': reason,
+        'on_duty_started': now_ms,
+        'do_not_disturb': rng.random() < 0.05,
+    }
+
+def main():
+    default_cache = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Data', 'users.json')
+    parser = argparse.ArgumentParser(description='Send fake Dialpad agent status events to a local webhook receiver')
+    parser.add_argument('--url', default='http://127.0.0.1:8765/', help='Receiver URL (default: http://127.0.0.1:8765/)')
+    parser.add_argument('--cache', default=default_cache, help='Users cache to take user IDs from (default: Data/users.json)')
+    parser.add_argument('--users', type=int, default=0,
+                        help='Use the fake API server\'s first N user IDs instead of the users cache')
+    parser.add_argument('--rate', type=float, default=2.0, help='Events per second (default: 2)')
+    parser.add_argument('--count', type=int, default=0, help='Stop after this many events, 0 to run until Ctrl+C (default: 0)')
+    parser.add_argument('--secret', default=os.getenv('WEBHOOK_SECRET'),
+                        help='Sign events as HS256 JWTs with this secret (default: WEBHOOK_SECRET)')
+    parser.add_argument('--seed', type=int, help='Random seed, for a repeatable event sequence')
+    parser.add_argument('--quiet', action='store_true', help='Only print the final count')
+    args = parser.parse_args()
+
+    try:
+        users = load_users(args.cache, args.users)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Could not load users from {args.cache}: {e} (run fetch_users.py or pass --users N)")
+        return 1
+    if not users:
+        print("❌ No users to send events for")
+        return 1
+
+    rng = random.Random(args.seed)
+    session = requests.Session()
+    sent = failed = 0
+    interval = 1 / args.rate if args.rate > 0 else 0
+    next_send = time.monotonic()
+    print(f"📨 Sending agent status events for {len(users)} users to {args.url} at {args.rate:g}/s"
+          f"{' (signed)' if args.secret else ''}")
+    try:
+        while not args.count or sent + failed < args.count:
+            user_id, email = rng.choice(users)
+            event = make_event(rng, user_id, email)
+            started = time.monotonic()
+            try:
+                response = session.post(args.url, data=encode_event_body(event, args.secret), timeout=5,
+                                        headers={'Content-Type': 'application/jwt' if args.secret else 'application/json'})
+                result = f"{response.status_code} in {(time.monotonic() - started) * 1000:.0f}ms"
+                if response.ok:
+                    sent += 1
+                else:
+                    failed += 1
+            except requests.exceptions.RequestException as e:
+                result = f"error: {e}"
+                failed += 1
+            if not args.quiet:
+                reason = f" ({event['duty_status_reason']})" if event['duty_status_reason'] else ''
+                print(f"{datetime.now():%H:%M:%S.%f}"[:-3] + f" {user_id}: {event['on_duty_status']}{reason} [{result}]")
+
+            next_send += interval
+            time.sleep(max(0.0, next_send - time.monotonic()))
+    except KeyboardInterrupt:
+        pass
+    print(f"\n📊 {sent} events accepted, {failed} failed")
+    return 0 if not failed else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Duty Status History
+
+Answers questions about past duty statuses from the history that
+fast_employee_status.py runs append to Data/status_history/ when
+STATUS_HISTORY=true, without calling the API.
+
+Usage:
+    python3 duty_history.py                                  # Time per status for everyone today
+    python3 duty_history.py --day 2026-10-14 --user alex.smith0@example.com
+    python3 duty_history.py --user "Alex Smith" --at "2026-10-14 12:30"
+    python3 duty_history.py --format json
+    python3 duty_history.py --compact
+"""
+
+import json
+import logging
+from datetime import date, datetime, timedelta
+import argparse
+import sys
+import os
+from typing import Dict, List, Any
+from tabulate import tabulate
+from colorama import init, Fore, Style
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Configuration'))
+
+from config import Config
+from status_history import StatusHistory
+from fetch_users import load_cached_users
+
+# Initialize colorama for cross-platform colored output
+init()
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def format_duration(seconds: float) -> str:
+    minutes = int(round(seconds / 60))
+    return f"{minutes // 60}h {minutes % 60:02d}m"
+
+def load_user_names(cache_file: str) -> Dict[str, Dict[str, str]]:
+    """User ID -> name and email from the users cache (empty if there is no cache)"""
+    try:
+        users = load_cached_users(cache_file)['users']
+    except Exception as e:
+        logger.warning(f"Could not load {cache_file} for user names: {e}")
+        return {}
+    return {str(user['id']): {'name': user.get('display_name', 'Unknown'), 'email': (user.get('emails') or [''])[0]}
+            for user in users if user.get('id')}
+
+def match_users(names: Dict[str, Dict[str, str]], query: str) -> List[str]:
+    """User IDs matching an ID, an email, or part of a display name"""
+    query = query.strip().lower()
+    if query in names:
+        return [query]
+    exact = [user_id for user_id, user in names.items() if user['email'].lower() == query]
+    if exact:
+        return exact
+    return [user_id for user_id, user in names.items() if query in user['name'].lower()] or [query]
+
+def day_report(history: StatusHistory, day: date, user_ids, names: Dict[str, Dict[str, str]]) -> List[Dict[str, Any]]:
+    """Time per duty status for each user on one day, most available first"""
+    start = datetime.combine(day, datetime.min.time()).timestamp()
+    end = datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp()
+    rows = []
+    for user_id, intervals in history.all_intervals(start, end, user_ids).items():
+        totals: Dict[str, float] = {}
+        for interval in intervals:
+            totals[interval.status] = totals.get(interval.status, 0.0) + interval.end - interval.start
+        user = names.get(user_id, {})
+        rows.append({
+            'user_id': user_id,
+            'name': user.get('name', user_id),
+            'email': user.get('email', ''),
+            'available_seconds': round(totals.get('available', 0.0)),
+            'unavailable_seconds': round(totals.get('unavailable', 0.0)),
+            'other_seconds': round(sum(seconds for status, seconds in totals.items()
+                                       if status not in ('available', 'unavailable'))),
+            'recorded_seconds': round(sum(totals.values())),
+            'intervals': len(intervals),
+        })
+    return sorted(rows, key=lambda row: (-row['available_seconds'], row['name']))
+
+def main():
+    """Main function for duty status history queries"""
+    parser = argparse.ArgumentParser(description="Query the duty status history recorded by status checks")
+    parser.add_argument('--day', type=date.fromisoformat, default=date.today(),
+                        help='Day to report on, YYYY-MM-DD (default: today)')
+    parser.add_argument('--user', help='Only this user (ID, email, or part of the name)')
+    parser.add_argument('--at', type=datetime.fromisoformat, metavar='"YYYY-MM-DD HH:MM"',
+                        help='Show the status interval each selected user was in at this local time')
+    parser.add_argument('--format', choices=['table', 'json'], default='table', help='Output format (default: table)')
+    parser.add_argument('--cache', default='users.json', help='Cached users file for names (default: users.json)')
+    parser.add_argument('--compact', action='store_true',
+                        help='Compress and expire old segments now (also done automatically each day)')
+    args = parser.parse_args()
+
+    config = Config()
+    history = StatusHistory.from_config(config)
+
+    if args.compact:
+        stats = history.compact()
+        print(f"{Fore.GREEN}✅ Compacted {stats['compacted']} segments, deleted {stats['deleted']}{Style.RESET_ALL}")
+        return 0
+
+    names = load_user_names(args.cache)
+    user_ids = match_users(names, args.user) if args.user else None
+
+    if args.at:
+        when = args.at.timestamp()
+        intervals = history.statuses_at(when, user_ids)
+        results = []
+        for user_id in user_ids or sorted(names, key=lambda user_id: names[user_id]['name']):
+            interval = intervals.get(user_id)
+            results.append({
+                'user_id': user_id,
+                'name': names.get(user_id, {}).get('name', user_id),
+                'status': interval.status if interval else None,
+                'reason': interval.reason if interval else None,
+                'from': datetime.fromtimestamp(interval.start).isoformat(timespec='seconds') if interval else None,
+                'until': datetime.fromtimestamp(interval.end).isoformat(timespec='seconds') if interval else None,
+            })
+        if args.format == 'json':
+            print(json.dumps(results, indent=2))
+        else:
+            print(tabulate([[row['name'], row['status'] or 'not recorded', row['reason'] or '',
+                             row['from'] or '', row['until'] or ''] for row in results],
+                           headers=['Name', 'Status', 'Reason', 'From', 'Until'], tablefmt='simple'))
+        return 0
+
+    rows = day_report(history, args.day, user_ids, names)
+    if args.format == 'json':
+        print(json.dumps({'day': args.day.isoformat(), 'users': rows}, indent=2))
+        return 0
+    if not rows:
+        print(f"{Fore.YELLOW}No status history recorded for {args.day}{Style.RESET_ALL}")
+        if not config.status_history:
+            print("Status history is off; set STATUS_HISTORY=true for status checks to record it")
+        return 0
+    print(f"{Fore.CYAN}Duty status history for {args.day}{Style.RESET_ALL}\n")
+    print(tabulate([[row['name'], format_duration(row['available_seconds']), format_duration(row['unavailable_seconds']),
+                     format_duration(row['other_seconds']), format_duration(row['recorded_seconds']), row['intervals']]
+                    for row in rows],
+                   headers=['Name', 'Available', 'Unavailable', 'Other', 'Recorded', 'Intervals'], tablefmt='simple'))
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
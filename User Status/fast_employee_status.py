@@ -11,16 +11,36 @@ Usage:
     python3 fast_employee_status.py --format detailed --sort-by-status
     python3 fast_employee_status.py --format detailed --sort-by-status --online-only
     python3 fast_employee_status.py --cache custom_users.json
+    python3 fast_employee_status.py --workers 20
+    python3 fast_employee_status.py --async
+    python3 fast_employee_status.py --hedge
+    python3 fast_employee_status.py --deadline 20s
+    python3 fast_employee_status.py --format detailed --group-by-team --watch 30
+    python3 fast_employee_status.py --format detailed --watch 5 --adaptive
+    python3 fast_employee_status.py --format detailed --watch 30 --listen 8765
+    python3 fast_employee_status.py --trace Data/status_trace.json
+    STATUS_SNAPSHOT_TTL=30 python3 fast_employee_status.py --format json
+    python3 fast_employee_status.py --refresh
 """
 
+import asyncio
+import io
 import json
 import logging
+import re
+import shutil
+import time
+from collections import deque
+from contextlib import redirect_stdout
 from datetime import datetime, timedelta
 from pathlib import Path
 import argparse
 import sys
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Dict, List, Any, Optional
+import requests
 from tabulate import tabulate
 from colorama import init, Fore, Style
 
@@ -30,7 +50,17 @@ sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(
 
 from config import Config
 from dialpad_service import DialpadAPI
+from retry import RetryPolicy
+from hedging import Hedger
+from deadline import Deadline, parse_duration
+from poll_scheduler import PollScheduler
+from status_events import StatusTable, WebhookReceiver, parse_listen_address
+from status_history import StatusHistory
+from snapshot_cache import StatusSnapshotCache
+import serializer
+from async_dialpad_service import AsyncDialpadAPI
 from fetch_users import load_cached_users
+from tracing import tracer, add_trace_arguments, start_tracing, finish_tracing
 
 # Initialize colorama for cross-platform colored output
 init()
@@ -45,11 +75,45 @@ logger = logging.getLogger(__name__)
 class FastEmployeeStatusChecker:
     """Fast employee status checker using cached user data"""
     
-    def __init__(self, config: Config, cache_file: str = "users.json"):
+    # Watch mode rewrites Data/last_status.json at most this often (seconds)
+    LAST_STATUS_SAVE_INTERVAL = 60
+    
+    def __init__(self, config: Config, cache_file: str = "users.json", max_workers: Optional[int] = None,
+                 use_async: bool = False, hedge: Optional[bool] = None, deadline: Optional[Deadline] = None,
+                 scheduler: Optional[PollScheduler] = None):
         self.config = config
         self.api = DialpadAPI(config)
         self.cache_file = cache_file
-        self.simplified_users = self.load_simplified_users()
+        self.max_workers = max(1, max_workers or config.max_workers)
+        self.use_async = use_async
+        self.deadline = deadline
+        # user_id -> when the last known status used in place of a live one was fetched
+        self.stale_statuses: Dict[str, str] = {}
+        self.hedger = None
+        if config.hedge_requests if hedge is None else hedge:
+            self.hedger = Hedger.from_config(config, self.api.metrics, 'users', self.max_workers)
+        # With a scheduler, each check only polls the users that are due
+        self.scheduler = scheduler
+        self.current_statuses: Dict[str, Dict[str, Any]] = {}
+        self.last_polled = 0
+        # With a status table, webhook events keep statuses current between polls
+        self.status_table: Optional[StatusTable] = None
+        self.history = StatusHistory.from_config(config) if config.status_history else None
+        # Full checks share a recent fetch with other runs through the snapshot cache, when set
+        self.snapshot_cache: Optional[StatusSnapshotCache] = None
+        self.refresh_snapshot = False
+        self.snapshot_age: Optional[float] = None
+        self._thread_local = threading.local()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        # The asyncio client and its loop stay open between checks, like the worker pool
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_api: Optional[AsyncDialpadAPI] = None
+        self._cache_mtime: Optional[float] = None
+        self._last_known: Optional[Dict[str, Dict[str, Any]]] = None
+        self._last_known_saved: Optional[float] = None
+        self._last_known_dirty = False
+        with tracer.span('simplified users CSV load'):
+            self.simplified_users = self.load_simplified_users()
         self.__init_cache_path__(cache_file)
     
     def load_simplified_users(self) -> Dict[str, Dict[str, Any]]:
@@ -110,10 +174,15 @@ class FastEmployeeStatusChecker:
         self.cached_data = None
         
     def load_user_cache(self) -> bool:
-        """Load cached user data"""
+        """Load cached user data (kept in memory until the cache file changes)"""
         try:
+            mtime = self.cache_file.stat().st_mtime if self.cache_file.exists() else None
+            if self.cached_data is not None and mtime == self._cache_mtime:
+                return True
+            
             # Use the load_cached_users function which handles Data folder logic
-            self.cached_data = load_cached_users(self.cache_file.name if hasattr(self.cache_file, 'name') else self.cache_file)
+            with tracer.span('cache load'):
+                self.cached_data = load_cached_users(self.cache_file.name if hasattr(self.cache_file, 'name') else self.cache_file)
             
             # Check cache age
             fetch_time = datetime.fromisoformat(self.cached_data['metadata']['fetch_timestamp'])
@@ -123,6 +192,7 @@ class FastEmployeeStatusChecker:
                 logger.warning(f"Cache is {age} old. Consider refreshing with fetch_users.py")
             
             logger.info(f"Loaded {len(self.cached_data['users'])} users from cache (age: {age})")
+            self._cache_mtime = mtime
             return True
             
         except FileNotFoundError:
@@ -132,132 +202,420 @@ class FastEmployeeStatusChecker:
             logger.error(f"Error loading cache: {e}")
             return False
     
+    def _get_session(self, deferred: bool = False) -> requests.Session:
+        """Return the requests session owned by the current worker thread
+        
+        Main-pass sessions retry at most once so a struggling request doesn't
+        hold a worker; the deferred pass uses the full configured retry policy.
+        """
+        attr = 'deferred_session' if deferred else 'session'
+        session = getattr(self._thread_local, attr, None)
+        if session is None:
+            retry_policy = None
+            if not deferred:
+                retry_policy = RetryPolicy.from_config(self.config, max_retries=min(1, self.config.retry_max_attempts))
+            session = self.api.create_session(retry_policy)
+            setattr(self._thread_local, attr, session)
+        session.deadline = self.deadline
+        return session
+    
+    def _request_user_status(self, user_id: str, deferred: bool = False) -> Dict[str, Any]:
+        """Request current status for a user (raises on failure)
+        
+        With hedging on, a request slower than the observed p95 is raced
+        against a duplicate and the first answer wins.
+        """
+        # Duplicate IDs in flight at the same time share one request
+        def request(coalesce=True):
+            return self.api.get_json(f'users/{user_id}/', session=self._get_session(deferred), coalesce=coalesce)
+        
+        if self.hedger is None:
+            return request()
+        return self.hedger.call(request, lambda: request(coalesce=False))
+    
     def get_user_status(self, user_id: str) -> Dict[str, Any]:
         """Get current status for a specific user"""
         try:
-            url = self.config.get_api_url(f'users/{user_id}/')
-            response = self.api.session.get(url, timeout=self.config.request_timeout)
-            response.raise_for_status()
-            return response.json()
+            return self._request_user_status(user_id, deferred=True)
         except Exception as e:
             logger.debug(f"Error getting status for user {user_id}: {e}")
             return {}
     
-    def check_all_employee_status(self) -> Dict[str, Any]:
-        """Check status for all cached employees"""
-        if not self.load_user_cache():
-            return {}
+    def _run_pool(self, func, items: List[Any]) -> List[Any]:
+        """Map ``func`` over ``items`` on the worker pool, preserving order
+        
+        The pool (and each worker's session) is kept between calls, so
+        repeated checks in watch mode reuse warm threads and connections.
+        With a deadline, items not finished when it passes are cancelled (or
+        abandoned if already running) and come back as None.
+        """
+        if self.deadline is None and (self.max_workers == 1 or len(items) <= 1):
+            return [func(item) for item in items]
         
-        logger.info("Checking status for all GlobalNOC employees...")
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='status')
+        futures = [self._pool.submit(func, item) for item in items]
+        if self.deadline is None:
+            return [future.result() for future in futures]
         
-        users = self.cached_data['users']
-        employee_details = []
+        done, not_done = wait(futures, timeout=self.deadline.remaining())
+        # Running requests have timeouts clipped to the deadline, so they end shortly after it
+        for future in not_done:
+            future.cancel()
+        if not_done:
+            logger.warning(f"Deadline of {self.deadline.seconds:g}s reached with {len(not_done)} status requests outstanding")
+        return [future.result() if future in done else None for future in futures]
+    
+    def fetch_all_statuses(self, users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fetch current status for every user concurrently
         
-        # Status counters
-        online_count = 0
-        offline_count = 0
-        unknown_count = 0
+        Requests are spread over a bounded thread pool (one session per worker),
+        or over one event loop and client when ``use_async`` is set (both kept
+        until close(), so watch mode keeps its connections, rate limit state
+        and circuit breakers between refreshes). Results are returned
+        in the same order as ``users``. Users whose request fails are retried in
+        a deferred pass after everyone else has been fetched; users that still
+        fail get an empty status.
+        """
+        if self.use_async:
+            with tracer.span('API fan-out', users=len(users), client='async'):
+                if self._loop is None:
+                    self._loop = asyncio.new_event_loop()
+                statuses = self._loop.run_until_complete(self._fetch_all_statuses_async(users))
+            return self._finish_statuses(users, statuses)
         
-        for i, user in enumerate(users, 1):
-            user_id = user.get('id')
-            if not user_id:
-                continue
-                
+        def fetch(indexed_user, deferred=False):
+            i, user = indexed_user
             logger.debug(f"Checking user {i}/{len(users)}: {user.get('display_name', 'Unknown')}")
+            try:
+                return self._request_user_status(user['id'], deferred)
+            except Exception as e:
+                logger.debug(f"Error getting status for user {user['id']}: {e}")
+                return None
+        
+        indexed_users = list(enumerate(users, 1))
+        with tracer.span('API fan-out', users=len(users), workers=self.max_workers):
+            statuses = self._run_pool(fetch, indexed_users)
+        
+        failed = [index for index, status in enumerate(statuses) if status is None]
+        # Past the deadline, or after it cut a backoff or rate limit wait short, a second pass can't finish either
+        if failed and not (self.deadline and self.deadline.reached()):
+            logger.info(f"Retrying {len(failed)} failed status requests...")
+            with tracer.span('API fan-out (deferred retries)', users=len(failed)):
+                retried = self._run_pool(lambda item: fetch(item, deferred=True), [indexed_users[index] for index in failed])
+            for index, status in zip(failed, retried):
+                statuses[index] = status
             
-            # Get current status
-            current_status = self.get_user_status(user_id)
-            
-            # Extract user information
-            display_name = user.get('display_name', 'Unknown')
-            emails = user.get('emails', [])
-            email = emails[0] if emails else 'No email'
-            
-            # Extract state information (focus on duty status)
-            account_state = current_status.get('state', 'unknown')
-            on_duty_status = current_status.get('on_duty_status', 'unknown')
-            duty_reason = current_status.get('duty_status_reason', '')
-            do_not_disturb = current_status.get('do_not_disturb', False)
-            duty_started = current_status.get('duty_status_started', '')
-            is_online = current_status.get('is_online', False)
-            
-            # Determine display status and color based on duty status
-            if on_duty_status == 'available':
-                status_text = 'Available'
-                online_count += 1
-                status_color = Fore.GREEN
-            elif on_duty_status == 'unavailable':
-                if duty_reason:
-                    status_text = f'Unavailable ({duty_reason})'
-                else:
-                    status_text = 'Unavailable'
-                offline_count += 1
-                status_color = Fore.RED
-            elif account_state == 'active':
-                status_text = 'Active (No Duty Status)'
-                unknown_count += 1
-                status_color = Fore.YELLOW
+            still_failed = sum(1 for status in retried if status is None)
+            if still_failed:
+                logger.warning(f"Could not fetch status for {still_failed} users")
+        
+        stats = self.api.connection_stats()
+        logger.debug(f"Connection pool: {stats['requests']} requests over {stats['connections_opened']} "
+                     f"connections ({stats['reused']} reused)")
+        if self.api.response_cache:
+            logger.debug(f"Response cache: {self.api.cache_stats()}")
+        if self.hedger:
+            logger.debug(f"Hedged requests: {self.hedger.stats()}")
+        rejected = sum(circuit['rejected'] for circuit in self.api.circuit_stats().values())
+        if rejected:
+            logger.warning(f"Skipped {rejected} requests while a circuit breaker was open: {self.api.circuit_stats()}")
+        
+        return self._finish_statuses(users, statuses)
+    
+    async def _fetch_all_statuses_async(self, users: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Fetch current status for every user on a single event loop"""
+        if self._async_api is None:
+            self._async_api = AsyncDialpadAPI(self.config, max_connections=self.max_workers)
+        timeout = self.deadline.remaining() if self.deadline else None
+        return await self._async_api.get_users_by_id((user['id'] for user in users), timeout=timeout)
+    
+    def _finish_statuses(self, users: List[Dict[str, Any]],
+                         statuses: List[Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Record fresh statuses as last known, and fill users missed by the deadline
+        
+        With a deadline set, users without a status (None) get their last
+        known status and are listed in ``stale_statuses``; otherwise a
+        missing status becomes an empty one. Last known statuses only matter
+        to runs with a deadline, so they are only saved then: at most every
+        LAST_STATUS_SAVE_INTERVAL seconds unless statuses went stale, and
+        once more on close().
+        """
+        if self._last_known is None:
+            self._last_known = self.load_last_known_statuses()
+        last_known = self._last_known
+        now = datetime.now().isoformat()
+        fresh = 0
+        for user, status in zip(users, statuses):
+            if status:
+                last_known[user['id']] = {'status': status, 'fetched_at': now}
+                fresh += 1
+        
+        self.stale_statuses = {}
+        if self.deadline and any(status is None for status in statuses):
+            for index, (user, status) in enumerate(zip(users, statuses)):
+                previous = last_known.get(user['id'])
+                if status is None and previous:
+                    statuses[index] = previous['status']
+                    self.stale_statuses[user['id']] = previous['fetched_at']
+            missed = sum(1 for status in statuses if status is None)
+            reason = 'Deadline reached' if self.deadline.reached() else 'Some status requests failed'
+            logger.warning(f"{reason}: {fresh} fresh statuses, {len(self.stale_statuses)} filled from "
+                           f"last known status, {missed} without any status")
+        
+        if fresh and self.deadline is not None:
+            self._last_known_dirty = True
+            if (self.stale_statuses or self._last_known_saved is None
+                    or time.monotonic() - self._last_known_saved >= self.LAST_STATUS_SAVE_INTERVAL):
+                self.save_last_known_statuses(last_known)
+        return [status if status is not None else {} for status in statuses]
+    
+    def fetch_due_statuses(self, users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Poll only the users the scheduler says are due, reusing earlier statuses for the rest
+        
+        Each successfully polled user is rescheduled from their new status.
+        Users whose request failed, or who were filled from their last known
+        status at the deadline, are not rescheduled and stay due.
+        """
+        due = self.scheduler.due(user['id'] for user in users)
+        polled = [user for user in users if user['id'] in due]
+        logger.info(f"Polling {len(polled)} of {len(users)} GlobalNOC employees ({self.max_workers} workers)...")
+        
+        statuses = self.fetch_all_statuses(polled) if polled else []
+        for user, status in zip(polled, statuses):
+            if not status:
+                continue
+            self.current_statuses[user['id']] = status
+            if user['id'] not in self.stale_statuses:
+                emails = user.get('emails') or ['']
+                self.scheduler.record(user['id'], status, self.simplified_users.get(emails[0].lower()))
+        
+        self.last_polled = len(polled)
+        logger.debug(f"Poll schedule: {self.scheduler.stats()}")
+        return [self.current_statuses.get(user['id'], {}) for user in users]
+    
+    def shared_statuses(self, users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Statuses from a snapshot another run fetched within the TTL, or fetched (and shared) now
+        
+        Only complete fetches are shared: not ones where the deadline left
+        users with their last known status.
+        """
+        key = '|'.join([self.config.api_base_url, str(self.config.office_id),
+                        str(Path(self.cache_file).resolve()), str(self._cache_mtime)])
+        
+        def fetch():
+            logger.info(f"Checking status for all GlobalNOC employees ({self.max_workers} workers)...")
+            statuses = self.fetch_all_statuses(users)
+            return {user['id']: status for user, status in zip(users, statuses)}, not self.stale_statuses
+        
+        # Waiting for another run's fetch must not outlast our own deadline
+        lock_timeout = self.deadline.remaining() if self.deadline else None
+        statuses, self.snapshot_age = self.snapshot_cache.get_or_fetch(key, fetch, self.refresh_snapshot, lock_timeout)
+        if self.snapshot_age is not None:
+            self.stale_statuses = {}
+        return [statuses.get(user['id'], {}) for user in users]
+    
+    def _reconcile_statuses(self, users: List[Dict[str, Any]], statuses: List[Dict[str, Any]],
+                            requested_at: float) -> List[Dict[str, Any]]:
+        """Store a full poll in the status table, keeping event updates newer than the poll"""
+        table = self.status_table
+        reconciled = []
+        for user, status in zip(users, statuses):
+            if not (status and table.update_from_poll(user['id'], status, requested_at)):
+                status = table.get(user['id'])
+            reconciled.append(status)
+        table.mark_polled(requested_at)
+        return reconciled
+    
+    def close(self) -> None:
+        """Stop the worker pools and async client, and save last known statuses not yet written"""
+        if self._last_known_dirty:
+            self.save_last_known_statuses(self._last_known)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self.hedger is not None:
+            self.hedger.close()
+        if self._loop is not None:
+            # Requests left running by Ctrl+C mid-check are cancelled first, as asyncio.run() would
+            pending = asyncio.all_tasks(self._loop)
+            for task in pending:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            if self._async_api is not None:
+                self._loop.run_until_complete(self._async_api.close())
+                self._async_api = None
+            self._loop.close()
+            self._loop = None
+    
+    @staticmethod
+    def _last_status_file() -> Path:
+        return Path(__file__).parent.parent / "Data" / "last_status.json"
+    
+    def load_last_known_statuses(self) -> Dict[str, Dict[str, Any]]:
+        """Last successfully fetched status per user ID, with when it was fetched"""
+        path = self._last_status_file()
+        if not path.exists():
+            return {}
+        try:
+            return serializer.load(path).get('statuses', {})
+        except Exception as e:
+            logger.warning(f"Could not load last known statuses: {e}")
+            return {}
+    
+    def save_last_known_statuses(self, last_known: Dict[str, Dict[str, Any]]) -> None:
+        path = self._last_status_file()
+        try:
+            path.parent.mkdir(exist_ok=True)
+            serializer.dump({'updated': datetime.now().isoformat(), 'statuses': last_known}, path, indent=False)
+            self._last_known_saved = time.monotonic()
+            self._last_known_dirty = False
+        except OSError as e:
+            logger.warning(f"Could not save last known statuses: {e}")
+    
+    def check_all_employee_status(self, poll: bool = True) -> Dict[str, Any]:
+        """Check status for all cached employees
+        
+        With a status table, ``poll=False`` builds the report from the table
+        (kept current by webhook events) without calling the API.
+        """
+        if not self.load_user_cache():
+            return {}
+        
+        users = [user for user in self.cached_data['users'] if user.get('id')]
+        self.snapshot_age = None
+        if self.status_table is not None and not poll:
+            statuses = [self.status_table.get(user['id']) for user in users]
+            self.stale_statuses = {user_id: since for user_id, since in self.stale_statuses.items()
+                                   if not self.status_table.from_event(user_id)}
+            self.last_polled = 0
+        elif self.scheduler is None:
+            requested_at = time.monotonic()
+            if self.snapshot_cache is None:
+                logger.info(f"Checking status for all GlobalNOC employees ({self.max_workers} workers)...")
+                statuses = self.fetch_all_statuses(users)
             else:
-                status_text = f'Unknown ({account_state})'
-                unknown_count += 1
-                status_color = Fore.YELLOW
-            
-            # Add DND indicator
-            if do_not_disturb:
-                status_text += ' [DND]'
-            
-            # Calculate duty time information
-            duty_hours = None
-            if duty_started:
-                try:
-                    from datetime import datetime
-                    duty_time = datetime.fromisoformat(duty_started.replace('Z', '+00:00'))
-                    now = datetime.now(duty_time.tzinfo)
-                    duty_hours = (now - duty_time).total_seconds() / 3600
-                except Exception:
-                    pass
-            
-            # Get device information
-            devices = current_status.get('devices', [])
-            device_info = []
-            for device in devices:
-                device_type = device.get('type', 'Unknown')
-                device_name = device.get('name', 'Unknown')
-                device_info.append(f"{device_type}: {device_name}")
+                statuses = self.shared_statuses(users)
+            self.last_polled = len(users)
+            if self.status_table is not None:
+                statuses = self._reconcile_statuses(users, statuses, requested_at)
+        else:
+            statuses = self.fetch_due_statuses(users)
+        
+        if self.history is not None and self.snapshot_age is None:
+            # Statuses carried over at the deadline (or from a snapshot) weren't observed now, so they aren't history
+            with tracer.span('history append'):
+                self.history.record({user['id']: status for user, status in zip(users, statuses)
+                                     if status and user['id'] not in self.stale_statuses})
+        
+        with tracer.span('classification', users=len(users)):
+            employee_details = []
             
-            # Get simplified user data for custom fields (using email as key)
-            simplified_user = self.simplified_users.get(email.lower(), {})
-            if simplified_user:
-                logger.debug(f"Found simplified data for {display_name} ({email})")
-            else:
-                logger.debug(f"No simplified data found for {display_name} ({email})")
+            # Status counters
+            online_count = 0
+            offline_count = 0
+            unknown_count = 0
             
-            employee_details.append({
-                'name': display_name,
-                'email': email,
-                'status': status_text,
-                'on_duty_status': on_duty_status,
-                'duty_reason': duty_reason,
-                'duty_hours': duty_hours,
-                'account_state': account_state,
-                'do_not_disturb': do_not_disturb,
-                'is_online': is_online,
-                'status_color': status_color,
-                'devices': device_info,
-                'department': user.get('department', 'N/A'),
-                'title': user.get('title', 'N/A'),
-                'user_id': user_id,
-                # Custom fields from simplified users
-                'role': simplified_user.get('Role', simplified_user.get('role', '')),
-                'focus_team': simplified_user.get('Focus Team', simplified_user.get('focus_team', '')),
-                'team': simplified_user.get('team', ''),
-                'manager': simplified_user.get('manager', ''),
-                'shift': simplified_user.get('shift', ''),
-                'priority_level': simplified_user.get('priority_level', ''),
-                'skills': simplified_user.get('skills', ''),
-                'backup_contact': simplified_user.get('backup_contact', ''),
-                'notes': simplified_user.get('notes', '')
-            })
+            for user, current_status in zip(users, statuses):
+                user_id = user.get('id')
+                
+                # Extract user information
+                display_name = user.get('display_name', 'Unknown')
+                emails = user.get('emails', [])
+                email = emails[0] if emails else 'No email'
+                
+                # Extract state information (focus on duty status)
+                account_state = current_status.get('state', 'unknown')
+                on_duty_status = current_status.get('on_duty_status', 'unknown')
+                duty_reason = current_status.get('duty_status_reason', '')
+                do_not_disturb = current_status.get('do_not_disturb', False)
+                duty_started = current_status.get('duty_status_started', '')
+                is_online = current_status.get('is_online', False)
+                
+                # Determine display status and color based on duty status
+                if on_duty_status == 'available':
+                    status_text = 'Available'
+                    online_count += 1
+                    status_color = Fore.GREEN
+                elif on_duty_status == 'unavailable':
+                    if duty_reason:
+                        status_text = f'Unavailable ({duty_reason})'
+                    else:
+                        status_text = 'Unavailable'
+                    offline_count += 1
+                    status_color = Fore.RED
+                elif account_state == 'active':
+                    status_text = 'Active (No Duty Status)'
+                    unknown_count += 1
+                    status_color = Fore.YELLOW
+                else:
+                    status_text = f'Unknown ({account_state})'
+                    unknown_count += 1
+                    status_color = Fore.YELLOW
+                
+                # Add DND indicator
+                if do_not_disturb:
+                    status_text += ' [DND]'
+                
+                # Status carried over from an earlier run because the deadline passed
+                stale_since = self.stale_statuses.get(user_id)
+                if stale_since:
+                    status_text += ' [STALE]'
+                
+                # Calculate duty time information
+                duty_hours = None
+                if duty_started:
+                    try:
+                        from datetime import datetime
+                        duty_time = datetime.fromisoformat(duty_started.replace('Z', '+00:00'))
+                        now = datetime.now(duty_time.tzinfo)
+                        duty_hours = (now - duty_time).total_seconds() / 3600
+                    except Exception:
+                        pass
+                
+                # Get device information
+                devices = current_status.get('devices', [])
+                device_info = []
+                for device in devices:
+                    device_type = device.get('type', 'Unknown')
+                    device_name = device.get('name', 'Unknown')
+                    device_info.append(f"{device_type}: {device_name}")
+                
+                # Get simplified user data for custom fields (using email as key)
+                simplified_user = self.simplified_users.get(email.lower(), {})
+                if simplified_user:
+                    logger.debug(f"Found simplified data for {display_name} ({email})")
+                else:
+                    logger.debug(f"No simplified data found for {display_name} ({email})")
+                
+                employee_details.append({
+                    'name': display_name,
+                    'email': email,
+                    'status': status_text,
+                    'on_duty_status': on_duty_status,
+                    'duty_reason': duty_reason,
+                    'duty_hours': duty_hours,
+                    'account_state': account_state,
+                    'do_not_disturb': do_not_disturb,
+                    'is_online': is_online,
+                    'status_color': status_color,
+                    'devices': device_info,
+                    'department': user.get('department', 'N/A'),
+                    'title': user.get('title', 'N/A'),
+                    'user_id': user_id,
+                    'stale': bool(stale_since),
+                    'status_as_of': stale_since,
+                    # Custom fields from simplified users
+                    'role': simplified_user.get('Role', simplified_user.get('role', '')),
+                    'focus_team': simplified_user.get('Focus Team', simplified_user.get('focus_team', '')),
+                    'team': simplified_user.get('team', ''),
+                    'manager': simplified_user.get('manager', ''),
+                    'shift': simplified_user.get('shift', ''),
+                    'priority_level': simplified_user.get('priority_level', ''),
+                    'skills': simplified_user.get('skills', ''),
+                    'backup_contact': simplified_user.get('backup_contact', ''),
+                    'notes': simplified_user.get('notes', '')
+                })
         
         return {
             'metadata': self.cached_data['metadata'],
@@ -267,7 +625,9 @@ class FastEmployeeStatusChecker:
                 'total': len(employee_details),
                 'available': online_count,
                 'unavailable': offline_count,
-                'no_duty_status': unknown_count
+                'no_duty_status': unknown_count,
+                'stale': len(self.stale_statuses),
+                'snapshot_age_seconds': round(self.snapshot_age, 1) if self.snapshot_age is not None else None
             }
         }
 
@@ -295,6 +655,10 @@ class FastStatusDisplay:
         print(f"{Fore.GREEN}Available: {summary['available']}{Style.RESET_ALL}")
         print(f"{Fore.RED}Unavailable: {summary['unavailable']}{Style.RESET_ALL}")
         print(f"{Fore.YELLOW}No Duty Status: {summary['no_duty_status']}{Style.RESET_ALL}")
+        if summary.get('stale'):
+            print(f"{Fore.MAGENTA}Stale (last known status, deadline reached): {summary['stale']}{Style.RESET_ALL}")
+        if summary.get('snapshot_age_seconds') is not None:
+            print(f"{Fore.BLUE}Statuses from shared snapshot:{Style.RESET_ALL} {summary['snapshot_age_seconds']:.0f}s old")
     
     @staticmethod
     def print_detailed(data: Dict[str, Any], sort_by_status: bool = False, online_only: bool = False, group_by_team: bool = False) -> None:
@@ -310,17 +674,18 @@ class FastStatusDisplay:
         
         if group_by_team:
             # Group employees by focus team
-            teams = {}
-            for emp in employees:
-                focus_team = emp.get('focus_team', '') or 'No Team Assigned'
-                if focus_team not in teams:
-                    teams[focus_team] = []
-                teams[focus_team].append(emp)
-            
-            # Sort teams alphabetically, but put 'No Team Assigned' last
-            sorted_teams = sorted([team for team in teams.keys() if team != 'No Team Assigned'])
-            if 'No Team Assigned' in teams:
-                sorted_teams.append('No Team Assigned')
+            with tracer.span('sorting'):
+                teams = {}
+                for emp in employees:
+                    focus_team = emp.get('focus_team', '') or 'No Team Assigned'
+                    if focus_team not in teams:
+                        teams[focus_team] = []
+                    teams[focus_team].append(emp)
+                
+                # Sort teams alphabetically, but put 'No Team Assigned' last
+                sorted_teams = sorted([team for team in teams.keys() if team != 'No Team Assigned'])
+                if 'No Team Assigned' in teams:
+                    sorted_teams.append('No Team Assigned')
             
             print(f"\n{Fore.YELLOW}👥 EMPLOYEE STATUS BY FOCUS TEAM{Style.RESET_ALL}")
             if sort_by_status:
@@ -330,25 +695,26 @@ class FastStatusDisplay:
                 team_employees = teams[team]
                 
                 # Sort within each team
-                if sort_by_status:
-                    def get_status_sort_key(emp):
-                        if emp['on_duty_status'] == 'available':
-                            return "0_available"
-                        elif emp['on_duty_status'] != 'available' and emp['on_duty_status'] != 'unavailable':
-                            return "1_unknown"
-                        elif not emp['duty_reason'] and emp['on_duty_status'] == 'unavailable':
-                            return "2_unavailable"
-                        else:
-                            status_text = emp['duty_reason'] if emp['duty_reason'] else emp['on_duty_status']
-                            return f"2_{status_text}"
-                    
-                    team_employees = sorted(team_employees, key=lambda emp: (
-                        0 if emp['is_online'] else 1,
-                        get_status_sort_key(emp),
-                        emp['name'].lower()
-                    ))
-                else:
-                    team_employees.sort(key=lambda x: x['name'])
+                with tracer.span('sorting', team=team):
+                    if sort_by_status:
+                        def get_status_sort_key(emp):
+                            if emp['on_duty_status'] == 'available':
+                                return "0_available"
+                            elif emp['on_duty_status'] != 'available' and emp['on_duty_status'] != 'unavailable':
+                                return "1_unknown"
+                            elif not emp['duty_reason'] and emp['on_duty_status'] == 'unavailable':
+                                return "2_unavailable"
+                            else:
+                                status_text = emp['duty_reason'] if emp['duty_reason'] else emp['on_duty_status']
+                                return f"2_{status_text}"
+                        
+                        team_employees = sorted(team_employees, key=lambda emp: (
+                            0 if emp['is_online'] else 1,
+                            get_status_sort_key(emp),
+                            emp['name'].lower()
+                        ))
+                    else:
+                        team_employees.sort(key=lambda x: x['name'])
                 
                 print(f"\n{Fore.MAGENTA}🏢 {team} ({len(team_employees)} employees){Style.RESET_ALL}")
                 print("=" * (len(team) + 20))
@@ -369,6 +735,8 @@ class FastStatusDisplay:
                     else:
                         combined_status = 'Unknown'
                         status_color = Fore.YELLOW
+                    if emp.get('stale'):
+                        combined_status += ' (stale)'
                     
                     status_display = f"{status_color}{combined_status}{Style.RESET_ALL}"
                     online_display = f"{Fore.GREEN}Online{Style.RESET_ALL}" if emp['is_online'] else f"{Fore.RED}Offline{Style.RESET_ALL}"
@@ -400,35 +768,36 @@ class FastStatusDisplay:
             # Original unified table format
             # Sort employees if requested
             if sort_by_status:
-                def get_status_sort_key(emp):
-                    """Get sort key for status: Available=0, Unknown=1, others alphabetically starting from 2"""
-                    if emp['on_duty_status'] == 'available':
-                        return "0_available"
-                    elif emp['on_duty_status'] != 'available' and emp['on_duty_status'] != 'unavailable':
-                        # This catches cases where status is neither available nor unavailable (Unknown cases)
-                        return "1_unknown"
-                    elif not emp['duty_reason'] and emp['on_duty_status'] == 'unavailable':
-                        # Generic unavailable without specific reason
-                        return "2_unavailable"
+                with tracer.span('sorting'):
+                    def get_status_sort_key(emp):
+                        """Get sort key for status: Available=0, Unknown=1, others alphabetically starting from 2"""
+                        if emp['on_duty_status'] == 'available':
+                            return "0_available"
+                        elif emp['on_duty_status'] != 'available' and emp['on_duty_status'] != 'unavailable':
+                            # This catches cases where status is neither available nor unavailable (Unknown cases)
+                            return "1_unknown"
+                        elif not emp['duty_reason'] and emp['on_duty_status'] == 'unavailable':
+                            # Generic unavailable without specific reason
+                            return "2_unavailable"
+                        else:
+                            # Sort other statuses alphabetically, starting from priority 2
+                            status_text = emp['duty_reason'] if emp['duty_reason'] else emp['on_duty_status']
+                            return f"2_{status_text}"
+                    
+                    if online_only:
+                        # For online-only: sort by online first, then custom status order
+                        employees = sorted(employees, key=lambda emp: (
+                            0 if emp['is_online'] else 1,  # Online employees first
+                            get_status_sort_key(emp),  # Custom status sorting
+                            emp['name'].lower()  # Final sort by name
+                        ))
                     else:
-                        # Sort other statuses alphabetically, starting from priority 2
-                        status_text = emp['duty_reason'] if emp['duty_reason'] else emp['on_duty_status']
-                        return f"2_{status_text}"
-                
-                if online_only:
-                    # For online-only: sort by online first, then custom status order
-                    employees = sorted(employees, key=lambda emp: (
-                        0 if emp['is_online'] else 1,  # Online employees first
-                        get_status_sort_key(emp),  # Custom status sorting
-                        emp['name'].lower()  # Final sort by name
-                    ))
-                else:
-                    # Default sorting: custom status order, then online first within each status
-                    employees = sorted(employees, key=lambda emp: (
-                        get_status_sort_key(emp),  # Custom status sorting
-                        0 if emp['is_online'] else 1,  # Online first within each status group
-                        emp['name'].lower()  # Final sort by name
-                    ))
+                        # Default sorting: custom status order, then online first within each status
+                        employees = sorted(employees, key=lambda emp: (
+                            get_status_sort_key(emp),  # Custom status sorting
+                            0 if emp['is_online'] else 1,  # Online first within each status group
+                            emp['name'].lower()  # Final sort by name
+                        ))
             
             print(f"\n{Fore.YELLOW}👥 EMPLOYEE DUTY STATUS{Style.RESET_ALL}")
             if sort_by_status:
@@ -453,6 +822,8 @@ class FastStatusDisplay:
                 else:
                     combined_status = 'Unknown'
                     status_color = Fore.YELLOW
+                if emp.get('stale'):
+                    combined_status += ' (stale)'
                 
                 # Apply color to the combined status
                 status_display = f"{status_color}{combined_status}{Style.RESET_ALL}"
@@ -508,13 +879,14 @@ class FastStatusDisplay:
         
         # Sort employees if requested (available first, then online first within each group)
         if sort_by_status:
-            employees = sorted(employees, key=lambda emp: (
-                0 if emp['on_duty_status'] == 'available' else
-                1 if emp['on_duty_status'] == 'unavailable' else
-                2,
-                0 if emp['is_online'] else 1,  # Online first within each status group
-                emp['name'].lower()  # Tertiary sort by name
-            ))
+            with tracer.span('sorting'):
+                employees = sorted(employees, key=lambda emp: (
+                    0 if emp['on_duty_status'] == 'available' else
+                    1 if emp['on_duty_status'] == 'unavailable' else
+                    2,
+                    0 if emp['is_online'] else 1,  # Online first within each status group
+                    emp['name'].lower()  # Tertiary sort by name
+                ))
         
         # Process employees for detailed JSON
         for emp in employees:
@@ -555,6 +927,8 @@ class FastStatusDisplay:
                 "do_not_disturb": emp['do_not_disturb'],
                 "is_online": emp['is_online'],
                 "user_id": emp['user_id'],
+                "stale": emp.get('stale', False),
+                "status_as_of": emp.get('status_as_of'),
                 # Additional custom fields
                 "team": emp.get('team', ''),
                 "manager": emp.get('manager', ''),
@@ -567,7 +941,169 @@ class FastStatusDisplay:
             
             detailed_data["employees"].append(employee_detail)
         
-        print(json.dumps(detailed_data, indent=2, default=str))
+        with tracer.span('serialization'):
+            output = json.dumps(detailed_data, indent=2, default=str)
+        print(output)
+
+def render_report(status_data: Dict[str, Any], args) -> None:
+    """Print the report in the format chosen on the command line"""
+    display = FastStatusDisplay()
+    
+    with tracer.span('rendering', format=args.format):
+        if args.format == 'summary':
+            display.print_summary(status_data)
+        elif args.format == 'detailed':
+            display.print_detailed(status_data, sort_by_status=args.sort_by_status, online_only=args.online_only, group_by_team=args.group_by_team)
+        elif args.format == 'json':
+            # For raw JSON, we'll apply online filter but not sorting
+            if args.online_only:
+                filtered_data = status_data.copy()
+                filtered_data['employees'] = [emp for emp in status_data['employees'] if emp['is_online']]
+                with tracer.span('serialization'):
+                    output = json.dumps(filtered_data, indent=2, default=str)
+            else:
+                with tracer.span('serialization'):
+                    output = json.dumps(status_data, indent=2, default=str)
+            print(output)
+        elif args.format == 'detailed-json':
+            display.print_detailed_json(status_data, sort_by_status=args.sort_by_status, online_only=args.online_only)
+
+# Seconds to wait after a webhook event before redrawing, so bursts share one redraw
+EVENT_BATCH_DELAY = 0.1
+
+_ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]')
+
+class DeltaRenderer:
+    """Redraw only the terminal lines that changed since the previous frame
+    
+    Frames are lists of lines drawn from the top-left corner. Lines that are
+    unchanged are left alone, so a refresh where a handful of statuses
+    changed rewrites a handful of rows instead of the whole table. A frame
+    taller or wider than the terminal can't be addressed line by line and is
+    redrawn in full (still without clearing the screen first).
+    """
+    
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.previous: Optional[List[str]] = None
+    
+    def render(self, lines: List[str]) -> int:
+        """Draw a frame and return how many lines were rewritten"""
+        size = shutil.get_terminal_size()
+        fits = len(lines) < size.lines and all(len(_ANSI_ESCAPE.sub('', line)) <= size.columns for line in lines)
+        
+        if self.previous is None or not fits:
+            # Cursor home, then every line followed by clear-to-end-of-line, then clear below
+            output = ('\x1b[2J' if self.previous is None else '') + '\x1b[H'
+            output += ''.join(f'{line}\x1b[K\n' for line in lines) + '\x1b[J'
+            changed = len(lines)
+        else:
+            changed_rows = [row for row, line in enumerate(lines)
+                            if row >= len(self.previous) or self.previous[row] != line]
+            output = ''.join(f'\x1b[{row + 1};1H{lines[row]}\x1b[K' for row in changed_rows)
+            if len(lines) < len(self.previous):
+                output += f'\x1b[{len(lines) + 1};1H\x1b[J'
+            output += f'\x1b[{len(lines) + 1};1H'
+            changed = len(changed_rows)
+        
+        self.stream.write(output)
+        self.stream.flush()
+        self.previous = lines
+        return changed
+
+class _FooterLogHandler(logging.Handler):
+    """Keeps the last few warnings for the watch footer instead of writing over the frame"""
+    
+    def __init__(self, size: int = 3):
+        super().__init__(level=logging.WARNING)
+        self.records = deque(maxlen=size)
+        self.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', '%H:%M:%S'))
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(self.format(record))
+
+def watch(checker: FastEmployeeStatusChecker, args) -> int:
+    """Re-check status every ``args.watch`` seconds until interrupted
+    
+    The checker (worker threads, sessions, users cache and CSV data) stays
+    loaded between refreshes. On a terminal the report is redrawn in place,
+    rewriting only the rows that changed; when output is redirected the
+    first report is printed in full and then one line per status change.
+    With the checker's poll scheduler set, each refresh only polls the users
+    that are due. With its status table set (``--listen``), the report is
+    redrawn as soon as webhook events arrive, and the API is only polled
+    every ``args.reconcile`` seconds to catch missed events.
+    """
+    interactive = sys.stdout.isatty()
+    renderer = DeltaRenderer() if interactive else None
+    root_logger = logging.getLogger()
+    saved_handlers = list(root_logger.handlers)
+    footer_log = _FooterLogHandler()
+    if interactive:
+        root_logger.handlers = [footer_log]
+        sys.stdout.write('\x1b[?25l')  # Hide the cursor while redrawing
+    
+    table = checker.status_table
+    previous_statuses: Optional[Dict[str, str]] = None
+    last_poll: Optional[float] = None
+    version = 0
+    try:
+        while True:
+            started = time.monotonic()
+            poll = table is None or last_poll is None or started - last_poll >= args.reconcile
+            if poll:
+                last_poll = started
+                if args.deadline:
+                    checker.deadline = Deadline(args.deadline)
+            if table is not None:
+                version = table.version
+            status_data = checker.check_all_employee_status(poll=poll)
+            elapsed = time.monotonic() - started
+            
+            if not status_data:
+                logger.error("Status check failed, retrying at the next refresh")
+            else:
+                names = {emp['user_id']: emp['name'] for emp in status_data['employees']}
+                statuses = {emp['user_id']: emp['status'] for emp in status_data['employees']}
+                changes = [(user_id, previous_statuses.get(user_id), status)
+                           for user_id, status in statuses.items()
+                           if previous_statuses is not None and previous_statuses.get(user_id) != status]
+                
+                polled = f"{checker.last_polled} of {len(statuses)} users polled, " if checker.scheduler else ''
+                if table is not None:
+                    polled = (f"{'polled' if poll else 'from events'}, {table.events} events received "
+                              f"(full poll every {args.reconcile:g}s), ")
+                if interactive:
+                    buffer = io.StringIO()
+                    with redirect_stdout(buffer):
+                        render_report(status_data, args)
+                    footer = [f"{Fore.CYAN}Refreshed {datetime.now():%H:%M:%S} in {elapsed:.1f}s, "
+                              f"{polled}{len(changes)} status changes; next refresh in {args.watch:g}s "
+                              f"(Ctrl+C to stop){Style.RESET_ALL}"]
+                    footer += list(footer_log.records)
+                    with tracer.span('redraw'):
+                        renderer.render(buffer.getvalue().rstrip('\n').split('\n') + [''] + footer)
+                elif previous_statuses is None:
+                    render_report(status_data, args)
+                    sys.stdout.flush()
+                else:
+                    for user_id, old, new in changes:
+                        print(f"{datetime.now():%H:%M:%S} {names[user_id]}: {old or 'new'} -> {new}")
+                    sys.stdout.flush()
+                previous_statuses = statuses
+            
+            if table is None:
+                time.sleep(max(0.0, args.watch - (time.monotonic() - started)))
+            elif table.wait_for_change(version, min(started + args.watch, last_poll + args.reconcile) - time.monotonic()) != version:
+                # Let a burst of events land before redrawing
+                time.sleep(EVENT_BATCH_DELAY)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        if interactive:
+            sys.stdout.write('\x1b[?25h\n')
+            root_logger.handlers = saved_handlers
+        checker.close()
 
 def main():
     """Main function for fast employee status checking"""
@@ -583,20 +1119,68 @@ def main():
                        help='Show only employees who are currently online')
     parser.add_argument('--group-by-team', action='store_true',
                        help='Group employees by their Focus Team')
+    parser.add_argument('--workers', type=int,
+                       help='Number of concurrent status requests (default: MAX_WORKERS or 10)')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                       help='Fetch statuses with the asyncio client instead of a thread pool')
+    parser.add_argument('--deadline', type=parse_duration,
+                       help='Finish within this time (e.g. 20s): outstanding requests are cancelled and '
+                            'unfetched users shown with their last known status')
+    parser.add_argument('--hedge', action='store_true', default=None,
+                       help='Duplicate status requests slower than the observed p95 (default: HEDGE_REQUESTS)')
+    parser.add_argument('--watch', type=float, metavar='SECONDS',
+                       help='Keep running and refresh every SECONDS, redrawing only rows that changed')
+    parser.add_argument('--adaptive', action='store_true', default=None,
+                       help='With --watch, poll each user on their own schedule based on recent changes, '
+                            'shift hours and duty status (default: ADAPTIVE_POLLING)')
+    parser.add_argument('--listen', type=parse_listen_address, metavar='[HOST:]PORT',
+                       help='With --watch, receive Dialpad agent status and user webhook events on this address '
+                            'and redraw as they arrive')
+    parser.add_argument('--reconcile', type=parse_duration, metavar='SECONDS',
+                       help='With --listen, seconds between full polls (default: WEBHOOK_RECONCILE_INTERVAL or 300)')
+    parser.add_argument('--refresh', action='store_true',
+                       help='Fetch statuses even if another run shared a snapshot within STATUS_SNAPSHOT_TTL')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Enable verbose logging')
+    add_trace_arguments(parser)
     
     args = parser.parse_args()
+    if args.watch is not None and (args.watch <= 0 or args.format not in ('summary', 'detailed')):
+        parser.error('--watch needs a positive interval and --format summary or detailed')
+    if args.adaptive and args.watch is None:
+        parser.error('--adaptive only applies to --watch')
+    if args.listen and (args.watch is None or args.adaptive):
+        parser.error('--listen needs --watch and replaces --adaptive polling')
     
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
+    start_tracing(args)
+    # The deadline covers the whole run, starting before config and cache load
+    deadline = Deadline(args.deadline) if args.deadline else None
+    receiver = None
+    checker = None
     
     try:
         # Load configuration
-        config = Config()
+        with tracer.span('config load'):
+            config = Config()
         
         # Create status checker
-        checker = FastEmployeeStatusChecker(config, args.cache)
+        checker = FastEmployeeStatusChecker(config, args.cache, max_workers=args.workers, use_async=args.use_async,
+                                            hedge=args.hedge, deadline=deadline)
+        
+        if args.watch:
+            if args.listen:
+                checker.status_table = StatusTable()
+                receiver = WebhookReceiver(checker.status_table, *args.listen, secret=config.webhook_secret).start()
+                args.reconcile = args.reconcile or config.webhook_reconcile_interval
+            elif config.adaptive_polling if args.adaptive is None else args.adaptive:
+                checker.scheduler = PollScheduler.from_config(config)
+            return watch(checker, args)
+        
+        # One-off reports can reuse a snapshot fetched by another run moments ago
+        checker.snapshot_cache = StatusSnapshotCache.from_config(config)
+        checker.refresh_snapshot = args.refresh
         
         # Check employee status
         status_data = checker.check_all_employee_status()
@@ -605,23 +1189,7 @@ def main():
             print(f"{Fore.RED}❌ Failed to load cached data or check status{Style.RESET_ALL}")
             return 1
         
-        # Display results
-        display = FastStatusDisplay()
-        
-        if args.format == 'summary':
-            display.print_summary(status_data)
-        elif args.format == 'detailed':
-            display.print_detailed(status_data, sort_by_status=args.sort_by_status, online_only=args.online_only, group_by_team=args.group_by_team)
-        elif args.format == 'json':
-            # For raw JSON, we'll apply online filter but not sorting
-            if args.online_only:
-                filtered_data = status_data.copy()
-                filtered_data['employees'] = [emp for emp in status_data['employees'] if emp['is_online']]
-                print(json.dumps(filtered_data, indent=2, default=str))
-            else:
-                print(json.dumps(status_data, indent=2, default=str))
-        elif args.format == 'detailed-json':
-            display.print_detailed_json(status_data, sort_by_status=args.sort_by_status, online_only=args.online_only)
+        render_report(status_data, args)
         
         print(f"\n{Fore.GREEN}✅ Status check completed successfully!{Style.RESET_ALL}")
         
@@ -629,6 +1197,13 @@ def main():
         logger.error(f"Error checking employee status: {e}")
         print(f"\n{Fore.RED}❌ Failed to check status: {e}{Style.RESET_ALL}")
         return 1
+    finally:
+        if receiver is not None:
+            receiver.shutdown()
+        if checker is not None and not args.watch:
+            # watch() closes the checker itself
+            checker.close()
+        finish_tracing(args)
     
     return 0
 
@@ -11,9 +11,11 @@ Also creates simplified user files for easy editing of custom variables.
 Usage:
     python3 fetch_globalnoc_users.py
     python3 fetch_globalnoc_users.py --output custom_filename.json
+    python3 fetch_globalnoc_users.py --async
+    python3 fetch_globalnoc_users.py --trace Data/fetch_users_trace.json
 """
 
-import json
+import asyncio
 import logging
 import csv
 from datetime import datetime
@@ -21,7 +23,8 @@ from pathlib import Path
 import argparse
 import sys
 import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+import requests
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -29,6 +32,9 @@ sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(
 
 from config import Config
 from dialpad_service import DialpadAPI
+from async_dialpad_service import AsyncDialpadAPI
+import serializer
+from tracing import tracer, add_trace_arguments, start_tracing, finish_tracing
 
 # Set up logging
 logging.basicConfig(
@@ -40,39 +46,61 @@ logger = logging.getLogger(__name__)
 class GlobalNOCUserFetcher:
     """Fetches and caches GlobalNOC office users"""
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, use_async: bool = False):
         self.config = config
         self.api = DialpadAPI(config)
+        self.use_async = use_async
+    
+    async def _fetch_users_and_office_async(self):
+        """Fetch users and the office concurrently with the asyncio client"""
+        async with AsyncDialpadAPI(self.config) as api:
+            if not self.config.office_id:
+                return await api.get_users(), None
+            return await asyncio.gather(api.get_users(), api.get_office(self.config.office_id))
+        
+    def _stream_office_users(self) -> Tuple[int, List[Dict[str, Any]]]:
+        """Stream all users page by page, keeping only the configured office's users
+        
+        Returns the total number of users seen and the office users, so memory
+        grows with the office size rather than the whole company.
+        """
+        total_users = 0
+        office_users = []
+        try:
+            for user in self.api.iter_items('users/'):
+                total_users += 1
+                if user.get('office_id') == self.config.office_id:
+                    office_users.append(user)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching users (keeping {len(office_users)} office users from {total_users} fetched): {e}")
+        return total_users, office_users
         
     def fetch_globalnoc_users(self) -> Dict[str, Any]:
         """Fetch all GlobalNOC office users and return structured data"""
         logger.info("Starting GlobalNOC user fetch...")
         
-        # Get all users with pagination
+        # Get all users with pagination and the office information (concurrently in async mode)
         logger.info("Fetching all users from Dialpad API...")
-        all_users = self.api.get_users()
-        logger.info(f"Retrieved {len(all_users)} total users")
-        
-        # Filter for GlobalNOC office
         logger.info(f"Filtering users for office ID: {self.config.office_id}")
-        globalnoc_users = self.api.filter_users_by_office(all_users, self.config.office_id)
+        with tracer.span('API fan-out', client='async' if self.use_async else 'threads') as span:
+            if self.use_async:
+                all_users, office_info = asyncio.run(self._fetch_users_and_office_async())
+                total_users = len(all_users)
+                globalnoc_users = self.api.filter_users_by_office(all_users, self.config.office_id)
+            else:
+                total_users, globalnoc_users = self._stream_office_users()
+                office_info = self.api.get_office(self.config.office_id) if self.config.office_id else None
+            span['users'] = total_users
+        logger.info(f"Retrieved {total_users} total users")
         logger.info(f"Found {len(globalnoc_users)} GlobalNOC office users")
         
-        # Get office information
-        offices = self.api.get_offices()
-        office_info = None
-        for office in offices:
-            if office.get('id') == self.config.office_id:
-                office_info = office
-                break
-        
         # Structure the data
         cache_data = {
             "metadata": {
                 "fetch_timestamp": datetime.now().isoformat(),
                 "office_id": self.config.office_id,
                 "office_name": office_info.get('name', 'Unknown') if office_info else 'Unknown',
-                "total_users_in_system": len(all_users),
+                "total_users_in_system": total_users,
                 "globalnoc_users_count": len(globalnoc_users),
                 "api_version": "v2"
             },
@@ -94,8 +122,8 @@ class GlobalNOCUserFetcher:
         
         logger.info(f"Saving {len(data['users'])} users to {filepath}")
         
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+        with tracer.span('serialization', file=filename):
+            serializer.dump(data, filepath)
         
         logger.info(f"✅ Successfully saved GlobalNOC users to {filepath}")
         
@@ -130,11 +158,10 @@ class GlobalNOCUserFetcher:
         # Try to load from JSON first
         if json_file.exists():
             try:
-                with open(json_file, 'r') as f:
-                    data = json.load(f)
-                    if 'users' in data:
-                        existing_users = {user['id']: user for user in data['users']}
-                        logger.info(f"Loaded {len(existing_users)} existing simplified users from JSON")
+                data = serializer.load(json_file)
+                if 'users' in data:
+                    existing_users = {user['id']: user for user in data['users']}
+                    logger.info(f"Loaded {len(existing_users)} existing simplified users from JSON")
             except Exception as e:
                 logger.warning(f"Could not load existing JSON simplified users: {e}")
         
@@ -159,7 +186,8 @@ class GlobalNOCUserFetcher:
         data_dir.mkdir(exist_ok=True)
         
         # Load existing simplified users to preserve custom data
-        existing_users = self.load_existing_simplified_users(data_dir)
+        with tracer.span('simplified users CSV load'):
+            existing_users = self.load_existing_simplified_users(data_dir)
         
         # Create simplified user list
         simplified_users = []
@@ -231,14 +259,14 @@ class GlobalNOCUserFetcher:
             'users': simplified_users
         }
         
-        with open(json_file, 'w') as f:
-            json.dump(json_data, f, indent=2)
+        with tracer.span('serialization', file='simplified_users.json'):
+            serializer.dump(json_data, json_file)
         
         # Save as CSV
         csv_file = data_dir / 'simplified_users.csv'
         fieldnames = list(simplified_users[0].keys())
         
-        with open(csv_file, 'w', newline='') as f:
+        with tracer.span('serialization', file='simplified_users.csv'), open(csv_file, 'w', newline='') as f:
             writer = csv.DictWriter(f, fieldnames=fieldnames)
             writer.writeheader()
             writer.writerows(simplified_users)
@@ -279,8 +307,7 @@ def load_cached_users(filename: str = "users.json") -> Dict[str, Any]:
         else:
             raise FileNotFoundError(f"Cache file {filename} not found in Data folder or current directory. Run fetch script first.")
     
-    with open(filepath, 'r') as f:
-        data = json.load(f)
+    data = serializer.load(filepath)
     
     logger.info(f"Loaded {len(data.get('users', []))} users from cache at {filepath}")
     return data
@@ -294,18 +321,23 @@ def main():
                        help='Enable verbose logging')
     parser.add_argument('--skip-simplified', action='store_true',
                        help='Skip creating simplified user files')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                       help='Use the asyncio client (fetches users and the office concurrently)')
+    add_trace_arguments(parser)
     
     args = parser.parse_args()
     
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
+    start_tracing(args)
     
     try:
         # Load configuration
-        config = Config()
+        with tracer.span('config load'):
+            config = Config()
         
         # Create fetcher and get users
-        fetcher = GlobalNOCUserFetcher(config)
+        fetcher = GlobalNOCUserFetcher(config, use_async=args.use_async)
         user_data = fetcher.fetch_globalnoc_users()
         
         # Save to file
@@ -324,6 +356,8 @@ def main():
         logger.error(f"Error fetching GlobalNOC users: {e}")
         print(f"\n❌ Failed to fetch users: {e}")
         return 1
+    finally:
+        finish_tracing(args)
     
     return 0
 